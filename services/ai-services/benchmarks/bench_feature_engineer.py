@@ -0,0 +1,79 @@
+"""
+Benchmark FeatureEngineer (pandas groupby) vs VectorizedFeatureEngineer trên dữ liệu giờ giả lập.
+
+Chạy từ thư mục ai-services:
+    python -m benchmarks.bench_feature_engineer --symbols 4 40 400 --years 3
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from src.features.feature_engineer import FeatureEngineer
+from src.features.vectorized_engineer import VectorizedFeatureEngineer
+
+FE_KWARGS = dict(lags=[1, 7], emas=[10, 20], add_volatility=True, add_rsi=True, add_datetime=True)
+
+
+def make_hourly_data(n_symbols: int, years: float, seed: int = 0) -> pd.DataFrame:
+    """Random walk hình học cho n_symbols coin, cùng khung giờ, sort theo (symbol, timestamp) giống CSVLoader."""
+    rng = np.random.default_rng(seed)
+    n_rows = int(years * 365 * 24)
+    timestamps = pd.date_range("2021-01-01", periods=n_rows, freq="h")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_symbols, n_rows)), axis=1))
+    df = pd.DataFrame({
+        "timestamp": np.tile(timestamps, n_symbols),
+        "open": close.ravel(),
+        "high": close.ravel() * 1.01,
+        "low": close.ravel() * 0.99,
+        "close": close.ravel(),
+        "volume": rng.uniform(1, 1000, n_symbols * n_rows),
+        "symbol": np.repeat([f"COIN{i:03d}USDT" for i in range(n_symbols)], n_rows),
+    })
+    return df.set_index("timestamp")
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, nargs="+", default=[4, 40, 400])
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-pandas-above", type=int, default=400,
+                        help="Bỏ qua bản pandas khi số symbol lớn hơn giá trị này (quá chậm/tốn RAM)")
+    args = parser.parse_args()
+
+    reference = FeatureEngineer(**FE_KWARGS)
+    vectorized = VectorizedFeatureEngineer(**FE_KWARGS)
+    vectorized_f32 = VectorizedFeatureEngineer(dtype=np.float32, **FE_KWARGS)
+
+    print(f"{'symbols':>8} {'rows':>12} {'pandas (s)':>11} {'vec f64 (s)':>12} {'vec f32 (s)':>12} {'speedup':>8} {'max abs diff':>13}")
+    for n_symbols in args.symbols:
+        df = make_hourly_data(n_symbols, args.years)
+        t_vec = best_of(lambda: vectorized.transform(df), args.repeat)
+        t_f32 = best_of(lambda: vectorized_f32.transform(df), args.repeat)
+
+        if n_symbols <= args.skip_pandas_above:
+            t_ref = best_of(lambda: reference.transform(df), 1)
+            expected = reference.transform(df)
+            got = vectorized.transform(df)
+            cols = vectorized.feature_names()
+            diff = float(np.nanmax(np.abs(expected[cols].to_numpy() - got[cols].to_numpy())))
+            speedup = f"{t_ref / t_vec:7.1f}x"
+            t_ref = f"{t_ref:11.3f}"
+            diff = f"{diff:13.2e}"
+        else:
+            t_ref, speedup, diff = f"{'-':>11}", f"{'-':>8}", f"{'-':>13}"
+
+        print(f"{n_symbols:>8} {len(df):>12,} {t_ref} {t_vec:12.3f} {t_f32:12.3f} {speedup} {diff}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark thời gian import các module mà process API / prediction import lúc khởi động (python -X importtime).
+
+Mỗi module được import trong 1 process mới (lấy min của --repeat lần). Thoát với mã 1 nếu:
+- module kéo theo backend nặng (torch, lightning, pytorch_forecasting, nixtla, binance, yfinance, boto3...)
+  => có ai đó đã import backend ở top-level thay vì lúc dùng lần đầu;
+- tổng thời gian import vượt --budget-ms.
+Dùng làm bước kiểm tra trong CI. Chạy từ thư mục ai-services:
+    python -m benchmarks.bench_import_time --budget-ms 1500
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULES = (
+    "src.main",
+    "src.pipelines.prediction_pipeline",
+    "src.pipelines.training_pipeline",
+    "src.models_lib.model_factory",
+)
+HEAVY_MODULES = (
+    "torch", "lightning", "pytorch_forecasting", "nixtla", "binance", "yfinance", "boto3", "onnxruntime", "scipy.signal",
+)
+
+
+def import_profile(module: str) -> list:
+    """[(tên module, self_us, cumulative_us, độ sâu)] từ output -X importtime của 1 process mới."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env={**os.environ, "PYTHONPATH": os.getcwd()},
+    )
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def own_time_us(rows: list, module: str) -> int:
+    """Cumulative của module và các package cha của nó (src, src.pipelines...) ở mức top-level."""
+    return sum(cumulative for name, _, cumulative, depth in rows
+               if depth == 0 and (name == module or module.startswith(name + ".")))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", nargs="+", default=list(DEFAULT_MODULES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="Số import chậm nhất in ra cho mỗi module")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Ngưỡng thời gian import của mỗi module")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        try:
+            profiles = [import_profile(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{module}: import failed: {e}")
+            failed = True
+            continue
+        # Lần nhanh nhất (ít nhiễu nhất); không tính các module interpreter import sẵn lúc khởi động
+        rows = min(profiles, key=lambda rows: own_time_us(rows, module))
+        total_ms = own_time_us(rows, module) / 1000
+        heavy = sorted({name for name, _, _, _ in rows if name in HEAVY_MODULES})
+
+        status = "ok"
+        if heavy:
+            status, failed = f"imports {', '.join(heavy)}", True
+        elif args.budget_ms is not None and total_ms > args.budget_ms:
+            status, failed = f"over budget ({args.budget_ms:.0f} ms)", True
+        print(f"{module}: {total_ms:.0f} ms - {status}")
+        for name, _, cumulative_us, _ in sorted(rows, key=lambda r: -r[2])[1:args.top + 1]:
+            print(f"    {cumulative_us / 1000:>8.1f} ms  {name}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
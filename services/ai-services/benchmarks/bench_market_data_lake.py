@@ -0,0 +1,47 @@
+"""
+Benchmark đọc dữ liệu nến: CSVLoader (1 file csv/symbol) vs LakeLoader (parquet chia partition symbol/interval/year).
+
+Chạy từ thư mục ai-services:
+    python -m benchmarks.bench_market_data_lake --symbols 4 40 --years 3
+"""
+import argparse
+import os
+import tempfile
+import pandas as pd
+from benchmarks.bench_feature_engineer import make_hourly_data, best_of
+from src.data.loader.csv_loader import CSVLoader
+from src.data.loader.lake_loader import LakeLoader
+from src.data.savers.lake_saver import LakeSaver
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, nargs="+", default=[4, 40])
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'rows':>10} {'csv all (s)':>12} {'lake all (s)':>13} {'lake 1y close (s)':>18} {'csv MB':>8} {'lake MB':>8}")
+    for n_symbols in args.symbols:
+        df = make_hourly_data(n_symbols, args.years)
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_dir, lake_dir = os.path.join(tmp, "csv"), os.path.join(tmp, "lake")
+            os.makedirs(csv_dir)
+            for symbol, symbol_df in df.groupby("symbol"):
+                symbol_df.drop(columns="symbol").to_csv(os.path.join(csv_dir, f"{symbol}.csv"))
+            LakeSaver(lake_dir).save_data(df, interval="1h")
+
+            t_csv = best_of(lambda: CSVLoader(csv_dir).load_all_data(), args.repeat)
+            t_lake = best_of(lambda: LakeLoader(lake_dir, interval="1h").load_all_data(), args.repeat)
+            last_year = df.index.max() - pd.Timedelta(days=365)
+            t_slice = best_of(lambda: LakeLoader(lake_dir, interval="1h", start=last_year, columns=["close"]).load_all_data(), args.repeat)
+            print(f"{n_symbols:>8} {len(df):>10} {t_csv:>12.3f} {t_lake:>13.3f} {t_slice:>18.3f} "
+                  f"{_size_mb(csv_dir):>8.1f} {_size_mb(lake_dir):>8.1f}")
+
+
+def _size_mb(path: str) -> float:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files) / 2**20
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark micro-batching khi serve TimeXer bằng graph export: nhiều request đồng thời (mỗi thread 1 symbol)
+gọi TimeXerRuntimeModel.predict, so sánh không gom batch với gom batch (max_batch_size / max_wait_ms).
+Trong API mỗi request giữ 1 worker inference nên --concurrency tương ứng executors.inference.max_workers
+và batch không thể lớn hơn số đó.
+
+Cần checkpoint + dataset đã train ở --path (chạy training pipeline trước). Chạy từ thư mục ai-services:
+    python -m benchmarks.bench_micro_batching --pred 7 --concurrency 4 --requests 50
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+
+
+def run(model, frames, requests_per_thread: int) -> dict:
+    latencies = [[] for _ in frames]
+
+    def worker(i):
+        for _ in range(requests_per_thread):
+            start = time.perf_counter()
+            model.predict(frames[i])
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(frames))]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    all_latencies = np.concatenate(latencies) * 1000
+    return {
+        "throughput": len(all_latencies) / elapsed,
+        "p50_ms": float(np.percentile(all_latencies, 50)),
+        "p99_ms": float(np.percentile(all_latencies, 99)),
+        "batch": model.batcher.items / model.batcher.batches if model.batcher and model.batcher.batches else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="models/timexer/day")
+    parser.add_argument("--pred", type=int, default=7)
+    parser.add_argument("--seq", type=int, default=60)
+    parser.add_argument("--runtime", choices=("onnx", "torchscript"), default="onnx")
+    parser.add_argument("--concurrency", type=int, default=4, help="Số request đồng thời (= executors.inference.max_workers)")
+    parser.add_argument("--requests", type=int, default=20, help="Số request mỗi thread")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--num-threads", type=int, default=None)
+    args = parser.parse_args()
+
+    from benchmarks.bench_timexer_inference import make_window_frame
+    from src.models_lib.model_config.timexer_config import TimeXerConfig
+    from src.models_lib.timexer_export import export_timexer
+    from src.models_lib.timexer_runtime import TimeXerRuntimeModel
+
+    frames = [make_window_frame(args.seq, f"COIN{i:03d}USDT") for i in range(args.concurrency)]
+    # TimeXerRuntimeModel chỉ serve graph đã so khớp với lightning: holdout phải là symbol có trong dataset
+    import torch
+    dataset = torch.load(f"{args.path}/timexer_dataset_{args.pred}.pkl", weights_only=False, map_location="cpu")
+    symbol = next(name for name in dataset.get_parameters()["categorical_encoders"]["symbol"].classes_ if isinstance(name, str))
+    with tempfile.TemporaryDirectory() as tmp:
+        export_timexer(f"{args.path}/timexer_pred_{args.pred}.ckpt", f"{args.path}/timexer_dataset_{args.pred}.pkl",
+                       os.path.join(tmp, f"timexer_pred_{args.pred}"), formats=(args.runtime,),
+                       holdout=make_window_frame(args.seq, symbol))
+        config = TimeXerConfig(pred=args.pred, seq=args.seq, path=tmp)
+
+        print(f"{'max_batch_size':>14} {'req/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'avg batch':>10}")
+        for max_batch_size in sorted({1, max(1, args.concurrency // 2), args.concurrency}):
+            model = TimeXerRuntimeModel(config, runtime=args.runtime, num_threads=args.num_threads,
+                                        max_batch_size=max_batch_size, max_wait_ms=args.max_wait_ms)
+            model.predict(frames[0])  # load graph + warm-up
+            if model.batcher:
+                model.batcher.batches = model.batcher.items = 0
+            r = run(model, frames, args.requests)
+            print(f"{max_batch_size:>14} {r['throughput']:>8.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['batch']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
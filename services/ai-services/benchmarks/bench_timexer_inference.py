@@ -0,0 +1,113 @@
+"""
+Benchmark serve TimeXer: checkpoint lightning (TimeXer.load_from_checkpoint + TimeSeriesDataSet) vs graph export
+chạy bằng torchscript / onnxruntime, fp32 và dynamic int8. Mỗi chế độ chạy trong process riêng để đo cả cold start (import + load).
+
+Cần checkpoint + dataset đã train ở --path (chạy training pipeline trước). Chạy từ thư mục ai-services:
+    python -m benchmarks.bench_timexer_inference --pred 7 --calls 50
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ("lightning", "torchscript", "onnx", "torchscript-int8", "onnx-int8")
+
+
+def make_window_frame(seq_len: int, symbol: str):
+    """Dữ liệu ngày giả lập đã qua feature engineering (đủ seq_len dòng cuối) cho 1 symbol."""
+    from benchmarks.bench_feature_engineer import FE_KWARGS
+    from benchmarks.bench_training_throughput import make_daily_data
+    from src.features.vectorized_engineer import VectorizedFeatureEngineer
+    df = make_daily_data(1, seq_len + 80).assign(symbol=symbol)
+    return VectorizedFeatureEngineer(**FE_KWARGS).transform(df)
+
+
+def run_mode(mode: str, args, export_prefix: str):
+    start = time.perf_counter()
+    if mode == "lightning":
+        import torch
+        from pytorch_forecasting import TimeSeriesDataSet
+        from pytorch_forecasting.models.timexer import TimeXer
+        import_s = time.perf_counter() - start
+        network = TimeXer.load_from_checkpoint(f"{args.path}/timexer_pred_{args.pred}.ckpt", map_location="cpu", weights_only=False).eval()
+        dataset = torch.load(f"{args.path}/timexer_dataset_{args.pred}.pkl", weights_only=False, map_location="cpu")
+        load_s = time.perf_counter() - start - import_s
+        symbol = next(name for name in dataset.get_parameters()["categorical_encoders"]["symbol"].classes_ if isinstance(name, str))
+        frame = make_window_frame(args.seq, symbol)
+        data = frame.reset_index()
+        data = data.iloc[-(args.seq + args.pred):].copy()
+        data["time_idx"] = (data["timestamp"] - data["timestamp"].min()).dt.days
+
+        def predict():
+            predict_set = TimeSeriesDataSet.from_dataset(dataset, data, predict=True, stop_randomization=True)
+            with torch.no_grad():
+                return network.predict(predict_set.to_dataloader(train=False, batch_size=128, num_workers=0))
+    else:
+        from src.models_lib.timexer_runtime import TimeXerRuntime
+        import_s = time.perf_counter() - start
+        runtime_name, _, precision = mode.partition("-")
+        suffix = f".{precision}" if precision else ""
+        graph_path = f"{export_prefix}{suffix}.{'onnx' if runtime_name == 'onnx' else 'pt'}"
+        runtime = TimeXerRuntime(graph_path, f"{export_prefix}.json", runtime=runtime_name)
+        load_s = time.perf_counter() - start - import_s
+        frame = make_window_frame(args.seq, "BTCUSDT")
+
+        def predict():
+            return runtime.predict_frames([frame])
+
+    first_start = time.perf_counter()
+    predict()
+    first_s = time.perf_counter() - first_start
+    timings = []
+    for _ in range(args.calls):
+        call_start = time.perf_counter()
+        predict()
+        timings.append(time.perf_counter() - call_start)
+    import resource
+    print("RESULT " + json.dumps({
+        "import_s": import_s, "load_s": load_s, "first_s": first_s,
+        "mean_ms": 1000 * sum(timings) / len(timings),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="models/timexer/day")
+    parser.add_argument("--pred", type=int, default=7)
+    parser.add_argument("--seq", type=int, default=60)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--mode", choices=MODES, help="Chạy 1 chế độ (dùng nội bộ)")
+    parser.add_argument("--export-prefix", default=None)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args, args.export_prefix)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from src.models_lib.timexer_export import export_timexer
+        prefix = os.path.join(tmp, f"timexer_pred_{args.pred}")
+        # Holdout giả lập chỉ để có bản int8 đo tốc độ: không chặn theo độ chính xác (export vẫn in MAE fp32/int8)
+        holdout = make_window_frame(args.seq + args.pred + 30, "BTCUSDT")
+        export_timexer(f"{args.path}/timexer_pred_{args.pred}.ckpt", f"{args.path}/timexer_dataset_{args.pred}.pkl", prefix,
+                       quantize=True, holdout=holdout, max_mae_increase=float("inf"))
+
+        print(f"{'mode':<17} {'import (s)':>10} {'load (s)':>9} {'1st call (s)':>12} {'per call (ms)':>14} {'max RSS (MB)':>13}")
+        for mode in MODES:
+            command = [sys.executable, "-m", "benchmarks.bench_timexer_inference", "--mode", mode, "--export-prefix", prefix,
+                       "--path", args.path, "--pred", str(args.pred), "--seq", str(args.seq), "--calls", str(args.calls)]
+            output = subprocess.run(command, capture_output=True, text=True)
+            results = [line[len("RESULT "):] for line in output.stdout.splitlines() if line.startswith("RESULT ")]
+            if not results:
+                print(f"{mode:<17} failed: {output.stderr.strip().splitlines()[-1:]}")
+                continue
+            r = json.loads(results[-1])
+            print(f"{mode:<17} {r['import_s']:>10.2f} {r['load_s']:>9.2f} {r['first_s']:>12.3f} {r['mean_ms']:>14.1f} {r['max_rss_mb']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
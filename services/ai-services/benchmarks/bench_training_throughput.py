@@ -0,0 +1,104 @@
+"""
+Benchmark số sample/giây khi train TimeXer với các cấu hình TrainingResourcesConfig khác nhau
+(thread intra-op, worker dataloader, bf16, DDP nhiều process trên CPU) trên dữ liệu ngày giả lập.
+
+Mỗi cấu hình chạy trong 1 process riêng để số thread / DDP không ảnh hưởng lẫn nhau.
+Chạy từ thư mục ai-services:
+    python -m benchmarks.bench_training_throughput --cores 32 --symbols 40 --batches 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+def make_daily_data(n_symbols: int, days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2021-01-01", periods=days, freq="D")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_symbols, days)), axis=1))
+    df = pd.DataFrame({
+        "timestamp": np.tile(timestamps, n_symbols),
+        "open": close.ravel(),
+        "high": close.ravel() * 1.02,
+        "low": close.ravel() * 0.98,
+        "close": close.ravel(),
+        "volume": rng.uniform(1, 1000, n_symbols * days),
+        "symbol": np.repeat([f"COIN{i:03d}USDT" for i in range(n_symbols)], days),
+    })
+    return df.set_index("timestamp")
+
+
+def default_configurations(cores: int) -> list:
+    workers = max(1, min(4, cores // 4))
+    return [
+        {"name": "baseline (1 thread)", "num_threads": 1},
+        {"name": f"{cores} threads", "num_threads": cores},
+        {"name": f"{cores} threads + {workers} workers", "num_threads": cores, "num_workers": workers},
+        {"name": f"{cores} threads + {workers} workers + bf16", "num_threads": cores, "num_workers": workers, "precision": "bf16-mixed"},
+        {"name": f"ddp x2 ({cores} threads)", "num_threads": cores, "num_workers": workers, "devices": 2, "strategy": "ddp"},
+    ]
+
+
+def run_single(args, resources: dict):
+    """Chạy 1 cấu hình (trong process con); rank 0 in kết quả dạng JSON."""
+    from src.features.vectorized_engineer import VectorizedFeatureEngineer
+    from src.utils.normalizer import Normalizer
+    from src.models_lib.callbacks import ThroughputMeter
+    from src.models_lib.model_config.timexer_config import TimeXerConfig, TrainingResourcesConfig
+    from src.models_lib.timexer import TimeXerModel
+    from benchmarks.bench_feature_engineer import FE_KWARGS
+
+    data = VectorizedFeatureEngineer(**FE_KWARGS).transform(make_daily_data(args.symbols, args.days))
+    numeric_cols = ["open", "high", "low", "close", "volume", "close_lag_1", "close_lag_7", "ema_10", "ema_20"]
+    data = Normalizer(method="standard", per_symbol=True, columns=numeric_cols).fit_transform(data)
+
+    resources = {name: value for name, value in resources.items() if name != "name"}
+    resources["limit_train_batches"] = args.batches
+    meter = ThroughputMeter(warmup_batches=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        model = TimeXerModel(TimeXerConfig(
+            data=data, pred=7, seq=60, path=tmp, callbacks=[meter],
+            resources=TrainingResourcesConfig.from_config(resources),
+        ))
+        model.trainer, _ = model._build_trainer(max_epochs=args.epochs, patience=args.epochs)
+        model.train()
+        if model.trainer.global_rank == 0:
+            print("RESULT " + json.dumps({"samples_per_second": meter.samples_per_second}), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cores", type=int, default=os.cpu_count())
+    parser.add_argument("--symbols", type=int, default=40)
+    parser.add_argument("--days", type=int, default=1500)
+    parser.add_argument("--batches", type=int, default=30)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--single", help="JSON của 1 cấu hình TrainingResourcesConfig (dùng nội bộ)")
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args, json.loads(args.single))
+        return
+
+    print(f"{'configuration':<40} {'samples/s':>10} {'speedup':>8}")
+    baseline = None
+    for resources in default_configurations(args.cores):
+        command = [sys.executable, "-m", "benchmarks.bench_training_throughput", "--single", json.dumps(resources),
+                   "--symbols", str(args.symbols), "--days", str(args.days),
+                   "--batches", str(args.batches), "--epochs", str(args.epochs)]
+        output = subprocess.run(command, capture_output=True, text=True)
+        results = [line[len("RESULT "):] for line in output.stdout.splitlines() if line.startswith("RESULT ")]
+        if not results:
+            print(f"{resources['name']:<40} {'failed':>10}  {output.stderr.strip().splitlines()[-1:]}")
+            continue
+        throughput = json.loads(results[-1])["samples_per_second"]
+        baseline = baseline or throughput
+        print(f"{resources['name']:<40} {throughput:>10.1f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
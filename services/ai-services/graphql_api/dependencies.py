@@ -1,4 +1,5 @@
 from concurrent.futures import ThreadPoolExecutor
 
-# Threadpool để xử lý hàm blocking (train, predict)
+# Threadpool để xử lý hàm blocking nhẹ (kiểm tra model); training chạy qua training_job_manager,
+# dự đoán qua executor của AIService
 executor = ThreadPoolExecutor(max_workers=4)
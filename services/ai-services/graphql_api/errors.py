@@ -0,0 +1,7 @@
+from graphql import GraphQLError
+from src.services.executors import ExecutorSaturated
+
+
+def saturated_error(error: ExecutorSaturated) -> GraphQLError:
+    """HTTP 429 của REST dưới dạng lỗi GraphQL: client đọc extensions.retryAfter (giây) để gửi lại sau."""
+    return GraphQLError(str(error), extensions={"code": "TOO_MANY_REQUESTS", "retryAfter": error.retry_after})
@@ -1,20 +1,42 @@
 import asyncio
-from graphql_api.types import PredictionRow, TrainResult
-from src.pipelines.training_pipeline import run_training_pipeline
-from src.pipelines.prediction_pipeline import prediction_pipeline
+from typing import Optional
+from graphql_api.types import PredictionRow, TrainResult, TrainingJob
 from graphql_api.dependencies import executor
+from graphql_api.errors import saturated_error
+from src.services.ai_service import AIService
+from src.services.executors import ExecutorSaturated
+from src.pipelines.prediction_pipeline import prediction_pipeline
 from src.utils.model_check import check_model_exists
 
-# Train resolver
-async def resolve_train_model(datatype: str, pred_len: int):
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(executor, run_training_pipeline, datatype, pred_len)
-    return TrainResult(**result)  # trả về instance của TrainResult
+TRAINING_JOB_FIELDS = ("job_id", "status", "datatype", "pre_len", "seq_len", "fine_tune", "epoch", "max_epochs",
+                       "val_loss", "message", "model_path")
 
-# Predict resolver
+# Train resolver: chỉ đưa job vào training_job_manager (pool process riêng, tuần tự theo pre_len) rồi trả job id ngay
+async def resolve_train_model(datatype: str, pred_len: int, seq_len: int = 60, fine_tune: bool = False) -> TrainResult:
+    try:
+        response = await AIService.run_training(datatype=datatype, pre_len=pred_len, seq_len=seq_len, fine_tune=fine_tune)
+    except ExecutorSaturated as e:
+        raise saturated_error(e)
+    return TrainResult(
+        model_name=f"timexer_pred_{pred_len}",
+        status=response.status or "failed",
+        job_id=response.job_id,
+        message=response.message,
+    )
+
+async def resolve_training_job(job_id: str) -> Optional[TrainingJob]:
+    job = AIService.get_training_job(job_id)
+    if job is None:
+        return None
+    return TrainingJob(**{name: getattr(job, name) for name in TRAINING_JOB_FIELDS})
+
+# Predict resolver: chạy trong executor của lớp workload như REST (giới hạn worker/hàng đợi, ghim thread torch),
+# hết chỗ thì trả lỗi GraphQL có retryAfter thay vì xếp hàng vô hạn
 async def resolve_predict_model(model_name: str, pred_len: int, symbol: str, datatype: str):
-    loop = asyncio.get_event_loop()
-    df = await loop.run_in_executor(executor, prediction_pipeline, model_name, symbol, pred_len, datatype)
+    try:
+        df = await AIService.executor_for(model_name).run(prediction_pipeline, model_name, symbol, pred_len, datatype)
+    except ExecutorSaturated as e:
+        raise saturated_error(e)
     records = df.to_dict(orient="records")
     return [PredictionRow(**r) for r in records]  # trả về list của PredictionRow
 
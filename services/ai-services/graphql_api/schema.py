@@ -1,7 +1,7 @@
 import strawberry
 import typing
-from graphql_api.resolvers import resolve_train_model, resolve_predict_model, resolve_model_check
-from graphql_api.types import PredictionRow, TrainResult
+from graphql_api.resolvers import resolve_train_model, resolve_training_job, resolve_predict_model, resolve_model_check
+from graphql_api.types import PredictionRow, TrainResult, TrainingJob
 
 # ==== Root Schema ====
 @strawberry.type
@@ -13,7 +13,8 @@ class Query:
     health_check: str = strawberry.field(resolver=lambda: "OK")
     predict_model: typing.List[PredictionRow] = strawberry.field(resolver=resolve_predict_model)
     check_model: bool = strawberry.field(resolver=resolve_model_check)
+    training_job: typing.Optional[TrainingJob] = strawberry.field(resolver=resolve_training_job)
 
 schema = strawberry.federation.Schema(
-    query=Query, mutation=Mutation, types=[PredictionRow, TrainResult], enable_federation_2=True
+    query=Query, mutation=Mutation, types=[PredictionRow, TrainResult, TrainingJob], enable_federation_2=True
 )
@@ -1,4 +1,5 @@
 # ==== Types ====
+from typing import Optional
 import strawberry
 
 
@@ -6,6 +7,23 @@ import strawberry
 class TrainResult:
     model_name: str
     status: str
+    # Job training chạy nền: theo dõi bằng query trainingJob(jobId)
+    job_id: Optional[str] = None
+    message: Optional[str] = None
+
+@strawberry.federation.type
+class TrainingJob:
+    job_id: str
+    status: str
+    datatype: str
+    pre_len: int
+    seq_len: int
+    fine_tune: bool
+    epoch: Optional[int] = None
+    max_epochs: Optional[int] = None
+    val_loss: Optional[float] = None
+    message: Optional[str] = None
+    model_path: Optional[str] = None
 
 @strawberry.federation.type
 class PredictionRow:
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+from ...utils.auth import get_current_user
+from ...services.executors import executor_metrics
+from ...services.training_jobs import training_job_manager
+
+router = APIRouter()
+
+@router.get("")
+async def get_metrics(current_user: dict = Depends(get_current_user)):
+    """Executor metrics: running/queued/rejected tasks, queue wait vs run time (ms) per workload class"""
+    return {
+        "executors": executor_metrics(),
+        "training": training_job_manager.metrics(),
+    }
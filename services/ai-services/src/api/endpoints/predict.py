@@ -1,19 +1,61 @@
-from fastapi import APIRouter, Depends
-from ...models.schemas import PredictionRequest, PredictionResponse
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from ...models.schemas import PredictionRequest, PredictionResponse, StreamPredictionRequest
 from ...utils.auth import get_current_user
 from ...services.ai_service import AIService
+from ...services.executors import ExecutorSaturated
 
 router = APIRouter()
 
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
 @router.post("", response_model=PredictionResponse)
 async def predict(
     request: PredictionRequest,
     current_user: dict = Depends(get_current_user)
 ):
     """Run prediction pipeline"""
-    return await AIService.run_prediction(
-        model_name=request.model_name,
-        symbol=request.symbol,
-        pred_length=request.pred_length,
-        datatype=request.datatype
-    )
\ No newline at end of file
+    try:
+        return await AIService.run_prediction(
+            model_name=request.model_name,
+            symbol=request.symbol,
+            pred_length=request.pred_length,
+            datatype=request.datatype
+        )
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+@router.post("/stream")
+async def predict_stream(
+    request: StreamPredictionRequest,
+    format: Literal["ndjson", "sse"] = "ndjson",
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream forecasts of many symbols: one event per symbol as soon as it is ready
+    ({"symbol", "success", "timestamp": [...], "close": [...]}), then {"done": true, "count": n}.
+    """
+    # Kiểm tra trước khi bắt đầu stream (sau khi đã gửi header 200 thì không trả 429 được nữa):
+    # stream chỉ được nhận khi executor còn chỗ cho mọi symbol
+    if AIService.executor_for(request.model_name).saturated(len(set(request.symbols))):
+        raise HTTPException(status_code=429, detail="Prediction executor is saturated, retry later", headers={"Retry-After": "1"})
+
+    async def events():
+        count = 0
+        async for payload in AIService.stream_predictions(
+            model_name=request.model_name,
+            symbols=request.symbols,
+            pred_length=request.pred_length,
+            datatype=request.datatype
+        ):
+            count += 1
+            yield AIService.encode_stream_event(payload, format)
+        yield AIService.encode_stream_event({"done": True, "count": count}, format)
+
+    return StreamingResponse(
+        events(),
+        media_type=STREAM_MEDIA_TYPES[format],
+        # Tắt buffer của reverse proxy (nginx) để client nhận từng event ngay
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends
-from ...models.schemas import TrainingRequest, TrainingResponse
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from ...models.schemas import TrainingRequest, TrainingResponse, TrainingJobStatus
 from ...utils.auth import get_current_user
 from ...services.ai_service import AIService
+from ...services.executors import ExecutorSaturated
 
 router = APIRouter()
 
@@ -10,9 +12,29 @@ async def train_model(
     request: TrainingRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    """Run training pipeline"""
-    return await AIService.run_training(
-        datatype=request.datatype,
-        pre_len=request.pre_len,
-        seq_len=request.seq_len
-    )
\ No newline at end of file
+    """Submit training job (returns job id immediately)"""
+    try:
+        return await AIService.run_training(
+            datatype=request.datatype,
+            pre_len=request.pre_len,
+            seq_len=request.seq_len,
+            fine_tune=request.fine_tune
+        )
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+@router.get("", response_model=List[TrainingJobStatus])
+async def list_training_jobs(current_user: dict = Depends(get_current_user)):
+    """List recent training jobs"""
+    return AIService.list_training_jobs()
+
+@router.get("/{job_id}", response_model=TrainingJobStatus)
+async def get_training_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get training job status and progress (epoch, val_loss)"""
+    job = AIService.get_training_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return job
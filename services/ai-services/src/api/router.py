@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import auth, predict, train
+from .endpoints import auth, metrics, predict, train
 
 api_router = APIRouter()
 
@@ -10,4 +10,7 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(predict.router, prefix="/predict", tags=["predict"])
 
 # Training routes
-api_router.include_router(train.router, prefix="/train", tags=["train"])
\ No newline at end of file
+api_router.include_router(train.router, prefix="/train", tags=["train"])
+
+# Executor / queue metrics
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
\ No newline at end of file
@@ -1,13 +1,13 @@
 from .fetchers.base_fetcher import DataFetchStrategy
-from .fetchers.binace_fetcher import BinanceFetchStrategy
-from .fetchers.yahoo_fetcher import YahooFetchStrategy
+from src.utils.lazy_import import import_object
 
 
 class FetcherFactory:
 
+    # python-binance / yfinance chỉ được import khi tạo fetcher lần đầu
     _FACTORY_MAPPING = {
-    "binance": BinanceFetchStrategy,
-    "yahoo": YahooFetchStrategy,
+    "binance": "src.data.fetchers.binace_fetcher:BinanceFetchStrategy",
+    "yahoo": "src.data.fetchers.yahoo_fetcher:YahooFetchStrategy",
     }
 
     @staticmethod
@@ -15,7 +15,7 @@ class FetcherFactory:
         """
         tạo các data fetcher khác nhau
         """
-        strategy_class = FetcherFactory._FACTORY_MAPPING.get(strategy_name)
-        if not strategy_class:
+        strategy_path = FetcherFactory._FACTORY_MAPPING.get(strategy_name)
+        if not strategy_path:
             raise ValueError(f"Unknown strategy: {strategy_name}")
-        return strategy_class(**kwargs)
\ No newline at end of file
+        return import_object(strategy_path)(**kwargs)
\ No newline at end of file
@@ -15,7 +15,8 @@ class BinanceFetchStrategy(DataFetchStrategy):
             symbol = kwargs.get("symbol", "BTCUSDT")
             interval = kwargs.get("interval", "1h")
             start_str = kwargs.get("start_str", "1 Jan, 2020")
-            klines = self.client.get_historical_klines(symbol, interval, start_str)
+            end_str = kwargs.get("end_str")
+            klines = self.client.get_historical_klines(symbol, interval, start_str, end_str)
             df = pd.DataFrame(klines, columns=[
                 'timestamp', 'open', 'high', 'low', 'close', 'volume', 
                 'close_time', 'quote_asset_volume', 'number_of_trades', 
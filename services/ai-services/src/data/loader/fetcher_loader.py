@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from src.data.fetchers.base_fetcher import DataFetchStrategy
+from src.data.loader.data_repository import DataRepository
+
+
+class FetcherLoader(DataRepository):
+    """
+    Fetch song song nhiều symbol qua 1 DataFetchStrategy và gộp thẳng thành 1 DataFrame trong bộ nhớ
+    (cùng định dạng với CSVLoader: index timestamp, có cột symbol, sort theo symbol + thời gian),
+    không cần ghi CSV rồi đọc lại.
+    """
+    def __init__(self, fetcher: DataFetchStrategy, symbols: list, max_workers: int = 8, start_by_symbol: dict = None, end_by_symbol: dict = None, **fetch_kwargs):
+        """
+        fetcher => strategy dùng để fetch (binance, yahoo...)
+        symbols => danh sách coin cần lấy
+        max_workers => số request chạy song song tối đa (giới hạn để không vượt rate limit của API)
+        start_by_symbol => start_str riêng cho từng symbol (vd: fetch tiếp từ nến cuối đã có trong lake)
+        end_by_symbol => end_str riêng cho từng symbol (vd: backfill đến trước nến đầu tiên đã có trong lake)
+        fetch_kwargs => tham số truyền cho fetch_data (interval, start_str...)
+        """
+        self.fetcher = fetcher
+        self.symbols = list(symbols)
+        self.max_workers = max_workers
+        self.start_by_symbol = start_by_symbol or {}
+        self.end_by_symbol = end_by_symbol or {}
+        self.fetch_kwargs = fetch_kwargs
+
+    def _fetch_one(self, symbol: str) -> pd.DataFrame:
+        kwargs = dict(self.fetch_kwargs)
+        if symbol in self.start_by_symbol:
+            kwargs["start_str"] = self.start_by_symbol[symbol]
+        if symbol in self.end_by_symbol:
+            kwargs["end_str"] = self.end_by_symbol[symbol]
+        df = self.fetcher.fetch_data(symbol=symbol, **kwargs)
+        if df.empty:
+            print(f"Warning: no data fetched for {symbol}")
+            return df
+        df = df.copy()
+        df["symbol"] = symbol
+        return df
+
+    def load_all_data(self) -> pd.DataFrame:
+        if not self.symbols:
+            return pd.DataFrame()
+        workers = max(1, min(self.max_workers, len(self.symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            all_dfs = [df for df in executor.map(self._fetch_one, self.symbols) if not df.empty]
+        if not all_dfs:
+            return pd.DataFrame()
+
+        combined_df = pd.concat(all_dfs)
+        combined_df.index.name = "timestamp"
+        # Sắp xếp lại theo cả symbol và thời gian (giống CSVLoader)
+        combined_df = combined_df.reset_index().sort_values(["symbol", "timestamp"], kind="stable").set_index("timestamp")
+        return combined_df
@@ -0,0 +1,20 @@
+import pandas as pd
+from src.data.loader.data_repository import DataRepository
+from src.data.market_data_lake import MarketDataLake
+
+
+class LakeLoader(DataRepository):
+    """
+    Đọc dữ liệu từ data lake parquet (cùng định dạng với CSVLoader: index timestamp, có cột symbol,
+    sort theo symbol + thời gian). Chỉ đọc các partition, khoảng thời gian và cột được yêu cầu.
+    """
+    def __init__(self, root: str, symbols: list = None, interval: str = "1d", start=None, end=None, columns: list = None):
+        self.lake = MarketDataLake(root)
+        self.symbols = symbols
+        self.interval = interval
+        self.start = start
+        self.end = end
+        self.columns = columns
+
+    def load_all_data(self) -> pd.DataFrame:
+        return self.lake.read(symbols=self.symbols, interval=self.interval, start=self.start, end=self.end, columns=self.columns)
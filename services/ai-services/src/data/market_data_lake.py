@@ -0,0 +1,160 @@
+import os
+import uuid
+from datetime import datetime
+from typing import Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Schema cố định cho nến OHLCV (không phải parse text/timestamp mỗi lần đọc như CSV)
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+FILE_SCHEMA = pa.schema(
+    [("timestamp", pa.timestamp("ms"))] + [(col, pa.float64()) for col in PRICE_COLUMNS]
+)
+PARTITION_SCHEMA = pa.schema([("symbol", pa.string()), ("interval", pa.string()), ("year", pa.int32())])
+
+_INTERVAL_UNITS = {"m": "min", "h": "h", "d": "D", "w": "W"}
+# Lake dùng chung cho mọi pre_len nên luôn giữ lịch sử từ mốc sớm nhất mà các model cần
+HISTORY_START = "2021-01-01"
+
+
+def interval_to_timedelta(interval: str) -> pd.Timedelta:
+    """'1h' -> 1 giờ, '1d' -> 1 ngày... (định dạng interval của Binance)."""
+    return pd.Timedelta(int(interval[:-1]), unit=_INTERVAL_UNITS[interval[-1]])
+
+
+class MarketDataLake:
+    """
+    Kho dữ liệu nến dạng Parquet, chia partition kiểu hive: {root}/symbol=.../interval=.../year=.../part-*.parquet
+
+    - read(): chỉ đọc các partition cần (symbol/interval/year), đẩy điều kiện khoảng thời gian xuống
+      thống kê row group và chỉ đọc các cột được yêu cầu => bộ nhớ tỉ lệ với lượng dữ liệu thực sự cần.
+    - append(): chỉ ghi thêm file mới chứa các nến đã đóng và nằm ngoài khoảng đã lưu (append-only):
+      mới hơn nến cuối, hoặc cũ hơn nến đầu khi backfill lịch sử.
+    - compact(): gộp các file nhỏ của 1 partition lại thành 1 file khi cần.
+    """
+    def __init__(self, root: str = "data/lake"):
+        self.root = root
+
+    def _partitioning(self):
+        return ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+    def _dataset(self) -> Optional[ds.Dataset]:
+        if not os.path.isdir(self.root):
+            return None
+        return ds.dataset(self.root, schema=pa.unify_schemas([FILE_SCHEMA, PARTITION_SCHEMA]),
+                          format="parquet", partitioning=self._partitioning())
+
+    def _partition_dir(self, symbol: str, interval: str, year: int) -> str:
+        return os.path.join(self.root, f"symbol={symbol}", f"interval={interval}", f"year={year}")
+
+    def _edge_timestamp(self, symbol: str, interval: str, last: bool) -> Optional[pd.Timestamp]:
+        """Timestamp nến cuối (last=True) / đầu tiên đã lưu; chỉ đọc cột timestamp của partition năm mới nhất / cũ nhất."""
+        base = os.path.join(self.root, f"symbol={symbol}", f"interval={interval}")
+        if not os.path.isdir(base):
+            return None
+        years = sorted((int(name.split("=")[1]) for name in os.listdir(base) if name.startswith("year=")), reverse=last)
+        for year in years:
+            table = ds.dataset(self._partition_dir(symbol, interval, year), schema=FILE_SCHEMA, format="parquet").to_table(columns=["timestamp"])
+            if table.num_rows:
+                edge = pc.max(table["timestamp"]) if last else pc.min(table["timestamp"])
+                return pd.Timestamp(edge.as_py())
+        return None
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[pd.Timestamp]:
+        """Timestamp nến cuối đã lưu của (symbol, interval)."""
+        return self._edge_timestamp(symbol, interval, last=True)
+
+    def first_timestamp(self, symbol: str, interval: str) -> Optional[pd.Timestamp]:
+        """Timestamp nến đầu tiên đã lưu của (symbol, interval)."""
+        return self._edge_timestamp(symbol, interval, last=False)
+
+    def next_start_ms(self, symbol: str, interval: str) -> Optional[int]:
+        """Mốc (ms) để fetch tiếp các nến chưa có trong lake; None nếu lake chưa có dữ liệu của symbol."""
+        last = self.last_timestamp(symbol, interval)
+        if last is None:
+            return None
+        return int((last + interval_to_timedelta(interval)).value // 10**6)
+
+    def head_end_ms(self, symbol: str, interval: str, start=HISTORY_START) -> Optional[int]:
+        """
+        Mốc (ms, tính cả) kết thúc đoạn lịch sử [start, nến đầu tiên) còn thiếu ở đầu lake, để backfill;
+        None nếu lake chưa có dữ liệu của symbol hoặc đã có từ `start`.
+        Symbol niêm yết sau `start` sẽ luôn có đoạn này nhưng fetch lại chỉ trả về rỗng.
+        """
+        first = self.first_timestamp(symbol, interval)
+        if first is None or first - interval_to_timedelta(interval) < pd.Timestamp(start):
+            return None
+        return int(first.value // 10**6) - 1
+
+    def append(self, df: pd.DataFrame, symbol: str, interval: str, now: Optional[datetime] = None) -> int:
+        """
+        Ghi thêm các nến mới của 1 symbol. df giống output của fetcher (index timestamp, cột OHLCV).
+        Bỏ qua nến chưa đóng và nến đã có trong lake. Trả về số dòng đã ghi.
+        """
+        if df is None or df.empty:
+            return 0
+        df = df.reset_index() if "timestamp" not in df.columns else df
+        df = df[["timestamp"] + PRICE_COLUMNS].copy()
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+
+        # Chỉ lưu nến đã đóng để lake không bao giờ phải sửa lại dữ liệu cũ
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now("UTC").tz_localize(None)
+        df = df[df["timestamp"] + interval_to_timedelta(interval) <= now]
+        first, last = self.first_timestamp(symbol, interval), self.last_timestamp(symbol, interval)
+        if last is not None:
+            df = df[(df["timestamp"] < first) | (df["timestamp"] > last)]
+        df = df.drop_duplicates("timestamp").sort_values("timestamp")
+        if df.empty:
+            return 0
+
+        for year, part in df.groupby(df["timestamp"].dt.year):
+            path = self._partition_dir(symbol, interval, int(year))
+            os.makedirs(path, exist_ok=True)
+            table = pa.Table.from_pandas(part, schema=FILE_SCHEMA, preserve_index=False)
+            pq.write_table(table, os.path.join(path, f"part-{uuid.uuid4().hex}.parquet"))
+        return len(df)
+
+    def read(self, symbols: Optional[list] = None, interval: str = "1d", start=None, end=None, columns: Optional[list] = None) -> pd.DataFrame:
+        """
+        Đọc dữ liệu của các symbol trong khoảng [start, end). Trả về DataFrame giống CSVLoader:
+        index timestamp, cột symbol, sort theo (symbol, timestamp).
+        """
+        dataset = self._dataset()
+        columns = list(columns) if columns else list(PRICE_COLUMNS)
+        if dataset is None:
+            return pd.DataFrame(columns=columns + ["symbol"], index=pd.DatetimeIndex([], name="timestamp"))
+
+        condition = ds.field("interval") == interval
+        if symbols:
+            condition &= ds.field("symbol").isin(list(symbols))
+        if start is not None:
+            start = pd.Timestamp(start)
+            condition &= (ds.field("year") >= start.year) & (ds.field("timestamp") >= pa.scalar(start.to_pydatetime(), pa.timestamp("ms")))
+        if end is not None:
+            end = pd.Timestamp(end)
+            condition &= (ds.field("year") <= end.year) & (ds.field("timestamp") < pa.scalar(end.to_pydatetime(), pa.timestamp("ms")))
+
+        table = dataset.to_table(columns=["timestamp", "symbol"] + columns, filter=condition)
+        df = table.to_pandas(coerce_temporal_nanoseconds=True)
+        df.sort_values(["symbol", "timestamp"], inplace=True, kind="stable")
+        df.set_index("timestamp", inplace=True)
+        return df[columns + ["symbol"]]
+
+    def compact(self, symbol: str, interval: str, year: int) -> None:
+        """Gộp tất cả file của 1 partition thành 1 file (đã sort, bỏ trùng)."""
+        path = self._partition_dir(symbol, interval, year)
+        if not os.path.isdir(path):
+            return
+        old_files = [os.path.join(path, name) for name in os.listdir(path) if name.endswith(".parquet")]
+        if len(old_files) <= 1:
+            return
+        df = ds.dataset(old_files, schema=FILE_SCHEMA, format="parquet").to_table().to_pandas()
+        df = df.drop_duplicates("timestamp").sort_values("timestamp")
+        tmp_path = os.path.join(path, f"part-{uuid.uuid4().hex}.parquet.tmp")
+        pq.write_table(pa.Table.from_pandas(df, schema=FILE_SCHEMA, preserve_index=False), tmp_path)
+        os.replace(tmp_path, tmp_path[:-len(".tmp")])
+        for file in old_files:
+            os.remove(file)
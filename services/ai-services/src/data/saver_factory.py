@@ -1,20 +1,20 @@
-from src.data.savers.s3_saver import S3Saver
 from src.data.savers.base_saver import DataSaverStrategy
-from src.data.savers.csv_saver import CSVSaver
-from src.data.savers.parquet_saver import ParquetSaver
+from src.utils.lazy_import import import_object
 
 
 
 class SaverFactory:
+    # boto3 / pyarrow chỉ được import khi tạo saver lần đầu
     _SAVER_MAPPING = {
-    "csv": CSVSaver,
-    "parquet": ParquetSaver,
-    "s3": S3Saver,
+    "csv": "src.data.savers.csv_saver:CSVSaver",
+    "parquet": "src.data.savers.parquet_saver:ParquetSaver",
+    "s3": "src.data.savers.s3_saver:S3Saver",
+    "lake": "src.data.savers.lake_saver:LakeSaver",
     }
 
     @staticmethod
     def create_data_saver(strategy: str, **kwargs) -> DataSaverStrategy:
-        saver_class = SaverFactory._SAVER_MAPPING.get(strategy)
-        if not saver_class:
+        saver_path = SaverFactory._SAVER_MAPPING.get(strategy)
+        if not saver_path:
             raise ValueError(f"Unknown saver strategy: {strategy}")
-        return saver_class(**kwargs)
\ No newline at end of file
+        return import_object(saver_path)(**kwargs)
\ No newline at end of file
@@ -0,0 +1,23 @@
+import pandas as pd
+from src.data.savers.base_saver import DataSaverStrategy
+from src.data.market_data_lake import MarketDataLake
+
+
+class LakeSaver(DataSaverStrategy):
+    def __init__(self, root: str = "data/lake"):
+        self.lake = MarketDataLake(root)
+
+    def save_data(self, df: pd.DataFrame, **kwargs) -> None:
+        """
+        Ghi thêm (append-only) nến mới vào data lake parquet, chia partition theo symbol/interval/year
+        interval => khung thời gian của dữ liệu ('1h', '1d'...)
+        symbol => tên coin, không cần nếu df đã có cột symbol
+        """
+        interval = kwargs.get("interval", "1d")
+        if "symbol" in df.columns:
+            groups = df.groupby("symbol", sort=False)
+        else:
+            groups = [(kwargs.get("symbol"), df)]
+        for symbol, symbol_df in groups:
+            written = self.lake.append(symbol_df, symbol=symbol, interval=interval)
+            print(f"Appended {written} new candles for {symbol} ({interval}) to {self.lake.root}")
@@ -0,0 +1,35 @@
+from src.features.feature_engineer import FeatureEngineer
+from src.features.vectorized_engineer import VectorizedFeatureEngineer
+from src.features.streaming_engineer import StreamingFeatureEngineer
+
+
+class FeatureEngineerFactory:
+    _ENGINE_MAPPING = {
+    "pandas": FeatureEngineer,
+    "vectorized": VectorizedFeatureEngineer,
+    "streaming": StreamingFeatureEngineer,
+    }
+
+    @staticmethod
+    def create_feature_engineer(engine: str = "pandas", **kwargs) -> FeatureEngineer:
+        """
+        tạo feature engineer theo engine trong config (fe.engine)
+        """
+        engineer_class = FeatureEngineerFactory._ENGINE_MAPPING.get(engine)
+        if not engineer_class:
+            raise ValueError(f"Unknown feature engine: {engine}")
+        return engineer_class(**kwargs)
+
+    @staticmethod
+    def from_config(fe_config: dict) -> FeatureEngineer:
+        """
+        tạo feature engineer từ block `fe` của configs/main_config.yaml
+        """
+        return FeatureEngineerFactory.create_feature_engineer(
+            fe_config.get('engine', 'pandas'),
+            lags=fe_config['lags'],
+            emas=fe_config['emas'],
+            add_volatility=fe_config['add_volatility'],
+            add_rsi=fe_config['add_rsi'],
+            add_datetime=fe_config['add_datetime'],
+        )
@@ -3,6 +3,9 @@ import numpy as np
 import ta
 from typing import Optional
 
+# Độ dài bucket (giây) của bảng tổng hợp sentiment
+SENTIMENT_GRANULARITIES = {"hour": 3600, "day": 86400}
+
 class FeatureEngineer:
     """
     Lớp chịu trách nhiệm biến dữ liệu thô thành các features sẵn sàng cho model (thêm các dữ liệu dặc trưng để học khôn hơn)
@@ -29,25 +32,46 @@ class FeatureEngineer:
         self.add_datetime = add_datetime
     
     def _integrate_sentiment(self, price_df: pd.DataFrame, news_df: Optional[pd.DataFrame]) -> pd.DataFrame:
-        """Tích hợp điểm sentiment từ dữ liệu tin tức vào dữ liệu giá."""
+        """
+        Tích hợp điểm sentiment từ dữ liệu tin tức vào dữ liệu giá. news_df (index là thời điểm UTC) là một trong hai dạng:
+        - tin tức thô có cột sentiment_score (-1/0/1): lấy trung bình theo giờ;
+        - bảng tổng hợp theo giờ/ngày của sentiment service (sentimentAggregates): cột mean_score, news_count,
+          granularity ('hour'/'day'), index là bucket_start.
+        Mỗi bucket chỉ được gắn cho các nến từ lúc bucket kết thúc, để feature không nhìn thấy tin tương lai.
+        """
         if news_df is None or news_df.empty:
             price_df['sentiment_score'] = 0.0
             return price_df
 
         print("Integrating sentiment data...")
-        # (Giả lập logic sentiment analysis)
-        news_df['sentiment_score'] = [0.8, -0.5, 0.1] * (len(news_df) // 3 + 1)[:len(news_df)]
-        
-        sentiment_per_hour = news_df['sentiment_score'].resample('H').mean()
-        
-        price_df = pd.merge_asof(
-            left=price_df.sort_index(),
-            right=sentiment_per_hour.to_frame(name='sentiment_score').sort_index(),
-            left_index=True,
-            right_index=True,
-            direction='backward'
-        )
-        price_df['sentiment_score'].fillna(0, inplace=True)
+        if "mean_score" in news_df.columns:
+            counts = news_df["news_count"] if "news_count" in news_df.columns else pd.Series(1.0, index=news_df.index)
+            if "granularity" in news_df.columns:
+                lengths = pd.to_timedelta(news_df["granularity"].map(SENTIMENT_GRANULARITIES).to_numpy(), unit="s")
+            else:
+                lengths = pd.Timedelta(hours=1)
+            buckets = pd.DataFrame({"score_sum": (news_df["mean_score"] * counts).to_numpy(), "news_count": counts.to_numpy()},
+                                   index=news_df.index + lengths).groupby(level=0).sum()
+            sentiment = buckets["score_sum"] / buckets["news_count"]
+        else:
+            sentiment = news_df["sentiment_score"].resample("h").mean().dropna()
+            sentiment.index = sentiment.index + pd.Timedelta(hours=1)
+
+        timestamps = price_df["timestamp"] if "timestamp" in price_df.columns else price_df.index.to_series()
+        if sentiment.index.tz is not None and getattr(timestamps.dt, "tz", None) is None:
+            sentiment.index = sentiment.index.tz_convert("UTC").tz_localize(None)
+        # merge_asof cần cùng kiểu (đơn vị thời gian, timezone) với cột thời gian của giá
+        sentiment.index = sentiment.index.astype(timestamps.dtype)
+        sentiment = sentiment.sort_index().rename("sentiment_score").astype(float)
+
+        price_df = price_df.drop(columns="sentiment_score", errors="ignore")
+        if "timestamp" in price_df.columns:
+            price_df = pd.merge_asof(price_df.sort_values("timestamp", kind="stable"), sentiment,
+                                     left_on="timestamp", right_index=True, direction="backward")
+        else:
+            price_df = pd.merge_asof(price_df.sort_index(kind="stable"), sentiment,
+                                     left_index=True, right_index=True, direction="backward")
+        price_df["sentiment_score"] = price_df["sentiment_score"].fillna(0.0)
         return price_df
 
     def transform(self, df: pd.DataFrame, news_df: Optional[pd.DataFrame] = None, symbol: Optional[str] = None) -> pd.DataFrame:
@@ -0,0 +1,110 @@
+import numpy as np
+
+
+def segment_layout(codes_sorted: np.ndarray):
+    """
+    Tính bố cục các đoạn liên tiếp (mỗi symbol là 1 đoạn) trên mảng đã sort theo (symbol, timestamp).
+
+    Returns
+    -------
+    starts : np.ndarray
+        Vị trí bắt đầu của từng đoạn.
+    lengths : np.ndarray
+        Độ dài từng đoạn.
+    pos : np.ndarray
+        Vị trí của từng dòng bên trong đoạn của nó (0 là nến đầu tiên của symbol).
+    """
+    n = len(codes_sorted)
+    if n == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    boundary = np.empty(n, dtype=bool)
+    boundary[0] = True
+    np.not_equal(codes_sorted[1:], codes_sorted[:-1], out=boundary[1:])
+    starts = np.flatnonzero(boundary)
+    lengths = np.diff(np.append(starts, n))
+    pos = np.arange(n, dtype=np.int64) - np.repeat(starts, lengths)
+    return starts, lengths, pos
+
+
+def shift(values: np.ndarray, pos: np.ndarray, lag: int) -> np.ndarray:
+    """Tương đương groupby(symbol).shift(lag): không lấy giá trị từ symbol khác."""
+    out = np.full(len(values), np.nan)
+    if lag < len(values):
+        out[lag:] = values[:len(values) - lag]
+    out[pos < lag] = np.nan
+    return out
+
+
+def ewm(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, pos: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    EMA với adjust=False cho tất cả các đoạn cùng lúc:
+        y_0 = x_0,  y_t = alpha * x_t + (1 - alpha) * y_{t-1}
+
+    Các đoạn được xếp thành ma trận (n_segments x max_len) rồi chạy 1 lần lfilter theo trục thời gian,
+    phần padding ở cuối không ảnh hưởng vì bộ lọc là nhân quả.
+    """
+    if len(values) == 0:
+        return np.zeros(0)
+    # scipy.signal import mất ~0.4s nên chỉ import khi tính EMA lần đầu, không lúc khởi động
+    from scipy.signal import lfilter
+    # Điều kiện đầu để y_0 = x_0
+    zi = ((1.0 - alpha) * values[starts])[:, None]
+    if (lengths == lengths[0]).all():
+        # Các symbol dài bằng nhau: reshape trực tiếp, không cần padding
+        filtered, _ = lfilter([alpha], [1.0, alpha - 1.0], values.reshape(len(starts), -1), axis=1, zi=zi)
+        return filtered.ravel()
+    rows = np.repeat(np.arange(len(starts)), lengths)
+    padded = np.zeros((len(starts), lengths.max()))
+    padded[rows, pos] = values
+    filtered, _ = lfilter([alpha], [1.0, alpha - 1.0], padded, axis=1, zi=zi)
+    return filtered[rows, pos]
+
+
+def rolling_std(values: np.ndarray, pos: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    """
+    Tương đương groupby(symbol).rolling(window).std(): NaN cho đến khi đủ window nến của cùng symbol.
+    Tính 2 lượt (mean rồi tổng bình phương độ lệch) bằng window phép cộng dịch trên toàn mảng,
+    không tạo mảng tạm n x window.
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    m = n - window + 1
+    total = values[:m].copy()
+    for k in range(1, window):
+        total += values[k:k + m]
+    mean = total / window
+    squares = np.zeros(m)
+    for k in range(window):
+        dev = values[k:k + m] - mean
+        squares += dev * dev
+    out[window - 1:] = np.sqrt(squares / (window - ddof))
+    out[pos < window - 1] = np.nan
+    return out
+
+
+def rsi(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, pos: np.ndarray, window: int = 14) -> np.ndarray:
+    """
+    RSI theo Wilder, cho kết quả giống ta.momentum.RSIIndicator(close, window).rsi():
+    diff đầu tiên của mỗi symbol coi là 0, EMA alpha=1/window, NaN cho window-1 nến đầu.
+    """
+    ema_up, ema_down = wilder_averages(values, starts, lengths, pos, window)
+    return rsi_from_averages(ema_up, ema_down, pos, window)
+
+
+def wilder_averages(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, pos: np.ndarray, window: int = 14):
+    """Trung bình Wilder (EMA alpha=1/window) của phần tăng và phần giảm giá, diff đầu tiên mỗi symbol coi là 0."""
+    diff = values - shift(values, pos, 1)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    alpha = 1.0 / window
+    return ewm(up, starts, lengths, pos, alpha), ewm(down, starts, lengths, pos, alpha)
+
+
+def rsi_from_averages(ema_up, ema_down, pos, window: int = 14):
+    """Chuyển 2 trung bình Wilder (up/down) thành RSI, dùng chung cho bản batch và bản streaming."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(ema_down == 0, 100.0, 100.0 - 100.0 / (1.0 + ema_up / ema_down))
+    return np.where(np.asarray(pos) < window - 1, np.nan, out)
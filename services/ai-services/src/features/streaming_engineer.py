@@ -0,0 +1,217 @@
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+from typing import Optional
+from src.features.vectorized_engineer import VectorizedFeatureEngineer
+from src.features import kernels
+
+VOLATILITY_WINDOW = 10
+RSI_WINDOW = 14
+
+
+@dataclass
+class SymbolState:
+    """Trạng thái chạy của 1 symbol sau nến cuối cùng đã xử lý."""
+    last_timestamp: pd.Timestamp
+    count: int
+    closes: deque
+    emas: dict = field(default_factory=dict)
+    avg_up: float = 0.0
+    avg_down: float = 0.0
+
+
+class StreamingFeatureEngineer(VectorizedFeatureEngineer):
+    """
+    Feature engineer có trạng thái cho dự đoán live: giữ EMA, trung bình Wilder của RSI và ring buffer
+    các giá close gần nhất cho từng symbol, mỗi nến mới chỉ tốn O(1) thay vì tính lại toàn bộ lịch sử.
+
+    - transform(df): giống VectorizedFeatureEngineer.transform và đồng thời khởi tạo trạng thái từ df.
+    - update(df): nhận các nến mới đóng, trả về các dòng feature giống hệt các dòng tương ứng của
+      transform(toàn bộ lịch sử) (sai khác chỉ ở mức làm tròn số thực).
+    """
+    def __init__(self, lags=None, emas=None, add_volatility=True, add_rsi=True, add_datetime=True, dtype=np.float64):
+        super().__init__(lags=lags, emas=emas, add_volatility=add_volatility, add_rsi=add_rsi, add_datetime=add_datetime, dtype=dtype)
+        self.states = {}
+        self._buffer_len = max([lag + 1 for lag in self.lags] + [VOLATILITY_WINDOW if self.add_volatility else 0, 1])
+
+    def transform(self, df: pd.DataFrame, news_df: Optional[pd.DataFrame] = None, symbol: Optional[str] = None) -> pd.DataFrame:
+        result = super().transform(df, news_df=news_df, symbol=symbol)
+        self.warm_up(df, symbol=symbol)
+        return result
+
+    def warm_up(self, df: pd.DataFrame, symbol: Optional[str] = None) -> None:
+        """Khởi tạo (ghi đè) trạng thái của các symbol có trong df bằng các kernel vector hoá."""
+        df, order, starts, lengths, pos, close = self._prepare(df)
+        if len(df) == 0:
+            return
+        symbols = df["symbol"].to_numpy() if "symbol" in df.columns else np.full(len(df), symbol, dtype=object)
+        timestamps = df.index
+        if order is not None:
+            symbols, timestamps = symbols[order], timestamps[order]
+        ends = starts + lengths - 1
+
+        ema_last = {span: kernels.ewm(close, starts, lengths, pos, alpha=2.0 / (span + 1))[ends] for span in self.emas}
+        if self.add_rsi:
+            avg_up, avg_down = kernels.wilder_averages(close, starts, lengths, pos, RSI_WINDOW)
+            avg_up, avg_down = avg_up[ends], avg_down[ends]
+
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            self.states[symbols[start]] = SymbolState(
+                last_timestamp=timestamps[end],
+                count=int(lengths[i]),
+                closes=deque(close[max(start, end - self._buffer_len + 1):end + 1].tolist(), maxlen=self._buffer_len),
+                emas={span: float(values[i]) for span, values in ema_last.items()},
+                avg_up=float(avg_up[i]) if self.add_rsi else 0.0,
+                avg_down=float(avg_down[i]) if self.add_rsi else 0.0,
+            )
+
+    def update(self, df: pd.DataFrame, symbol: Optional[str] = None) -> pd.DataFrame:
+        """
+        Cập nhật trạng thái với các nến mới đóng (có thể nhiều symbol) và trả về các dòng feature đủ dữ liệu.
+        Nến có timestamp <= nến cuối đã xử lý của symbol đó sẽ bị bỏ qua, nên gọi lại với dữ liệu chồng lấn vẫn an toàn.
+        """
+        if "timestamp" in df.columns:
+            df = df.set_index("timestamp")
+        df = df.sort_index(kind="stable")
+        other_cols = [c for c in df.columns if c != "symbol"]
+        symbols = df["symbol"].tolist() if "symbol" in df.columns else [symbol] * len(df)
+
+        rows, index = [], []
+        for timestamp, sym, values in zip(df.index, symbols, df[other_cols].itertuples(index=False, name=None)):
+            record = dict(zip(other_cols, values))
+            features = self._step(sym, timestamp, float(record["close"]))
+            if features is None:
+                continue
+            record["symbol"] = sym
+            record["sentiment_score"] = 0.0
+            record.update(features)
+            rows.append(record)
+            index.append(timestamp)
+
+        result = pd.DataFrame(rows, index=pd.DatetimeIndex(index, name="timestamp"),
+                              columns=other_cols + ["symbol"] + self._extra_columns())
+        # Giữ đúng dtype như transform, kể cả khi không có dòng nào
+        dtypes = {c: df[c].dtype for c in df.columns}
+        dtypes.update({c: self.dtype for c in ["sentiment_score"] + self.feature_names()})
+        if self.add_datetime:
+            dtypes.update({"day_of_week": np.int32, "day_sin": self.dtype, "day_cos": self.dtype})
+        return result.astype(dtypes)
+
+    def _extra_columns(self) -> list:
+        columns = ["sentiment_score"] + self.feature_names()
+        if self.add_datetime:
+            columns += ["day_of_week", "day_sin", "day_cos"]
+        return columns
+
+    def _step(self, symbol, timestamp, close: float) -> Optional[dict]:
+        """Xử lý 1 nến mới của 1 symbol trong O(1); trả về None nếu nến đã xử lý hoặc chưa đủ dữ liệu (giống dropna)."""
+        state = self.states.get(symbol)
+        if state is None:
+            state = SymbolState(last_timestamp=timestamp, count=0, closes=deque(maxlen=self._buffer_len))
+            self.states[symbol] = state
+        elif timestamp <= state.last_timestamp:
+            return None
+
+        pos = state.count
+        prev_close = state.closes[-1] if state.closes else close
+        state.closes.append(close)
+        state.count += 1
+        state.last_timestamp = timestamp
+
+        # Cùng công thức với kernels.ewm: y_0 = x_0, y_t = alpha * x_t + (1 - alpha) * y_{t-1}
+        for span in self.emas:
+            alpha = 2.0 / (span + 1)
+            previous = state.emas.get(span, close) if pos > 0 else close
+            state.emas[span] = alpha * close + (1.0 - alpha) * previous
+        if self.add_rsi:
+            alpha = 1.0 / RSI_WINDOW
+            diff = close - prev_close if pos > 0 else 0.0
+            state.avg_up = alpha * (diff if diff > 0 else 0.0) + (1.0 - alpha) * state.avg_up
+            state.avg_down = alpha * (-diff if diff < 0 else 0.0) + (1.0 - alpha) * state.avg_down
+
+        features = {}
+        for lag in self.lags:
+            if pos < lag:
+                return None
+            features[f"close_lag_{lag}"] = state.closes[-1 - lag]
+        for span in self.emas:
+            features[f"ema_{span}"] = state.emas[span]
+        if self.add_volatility:
+            if pos < VOLATILITY_WINDOW - 1:
+                return None
+            features[f"volatility_{VOLATILITY_WINDOW}"] = self._window_std(list(state.closes)[-VOLATILITY_WINDOW:])
+        if self.add_rsi:
+            if pos < RSI_WINDOW - 1:
+                return None
+            if state.avg_down == 0:
+                features[f"rsi_{RSI_WINDOW}"] = 100.0
+            else:
+                features[f"rsi_{RSI_WINDOW}"] = 100.0 - 100.0 / (1.0 + state.avg_up / state.avg_down)
+        if self.add_datetime:
+            day_of_week = timestamp.weekday()
+            features["day_of_week"] = day_of_week
+            features["day_sin"] = np.sin(2 * np.pi * day_of_week / 7)
+            features["day_cos"] = np.cos(2 * np.pi * day_of_week / 7)
+        return features
+
+    @staticmethod
+    def _window_std(values: list, ddof: int = 1) -> float:
+        """Độ lệch chuẩn 2 lượt, cùng thứ tự phép tính với kernels.rolling_std."""
+        total = values[0]
+        for v in values[1:]:
+            total += v
+        mean = total / len(values)
+        squares = 0.0
+        for v in values:
+            dev = v - mean
+            squares += dev * dev
+        return math.sqrt(squares / (len(values) - ddof))
+
+
+class LiveFeatureStore:
+    """
+    Feature cho dự đoán live dùng StreamingFeatureEngineer: giữ trạng thái + `history_len` dòng feature cuối
+    của mỗi symbol giữa các request. Lần đầu fetch từ start_str và transform (khởi tạo trạng thái), các lần sau
+    chỉ fetch từ nến cuối đã xử lý và update() các nến mới đóng, nên mỗi request chỉ tốn O(số nến mới).
+    Chỉ dùng nến đã đóng (timestamp + interval <= hiện tại) để trạng thái không bị ghi bởi nến đang chạy.
+    """
+    def __init__(self, engineer: StreamingFeatureEngineer, history_len: int):
+        self.engineer = engineer
+        self.history_len = history_len
+        self._tails = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    @staticmethod
+    def closed_candles(df: pd.DataFrame, interval: str, now: pd.Timestamp = None) -> pd.DataFrame:
+        if len(df) == 0:
+            return df
+        now = pd.Timestamp.now(tz="UTC").tz_localize(None) if now is None else now
+        timestamps = df["timestamp"] if "timestamp" in df.columns else df.index.to_series()
+        return df[(timestamps + pd.Timedelta(interval) <= now).to_numpy()]
+
+    def _lock(self, key) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def features(self, fetcher, symbol: str, interval: str, start_str: str, now: pd.Timestamp = None) -> pd.DataFrame:
+        """history_len dòng feature cuối (đã đóng) của symbol, giống transform(toàn bộ nến từ start_str)."""
+        key = (symbol, interval)
+        with self._lock(key):
+            tail = self._tails.get(key)
+            state = self.engineer.states.get(symbol)
+            if tail is None or state is None:
+                data = fetcher.fetch_data(symbol=symbol, interval=interval, start_str=start_str)
+                tail = self.engineer.transform(self.closed_candles(data, interval, now), symbol=symbol)
+            else:
+                data = fetcher.fetch_data(symbol=symbol, interval=interval,
+                                          start_str=state.last_timestamp.strftime("%Y-%m-%d %H:%M:%S"))
+                new_rows = self.engineer.update(self.closed_candles(data, interval, now), symbol=symbol)
+                if len(new_rows):
+                    tail = pd.concat([tail, new_rows])
+            tail = tail.iloc[-self.history_len:]
+            self._tails[key] = tail
+            return tail.copy()
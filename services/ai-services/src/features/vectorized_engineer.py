@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+from src.features.feature_engineer import FeatureEngineer
+from src.features import kernels
+
+
+class VectorizedFeatureEngineer(FeatureEngineer):
+    """
+    Bản vector hoá của FeatureEngineer: sort 1 lần theo (symbol, timestamp), tính lag/EMA/volatility/RSI
+    bằng các kernel NumPy trên từng đoạn liên tiếp của mỗi symbol, ghi vào 1 ma trận cấp phát sẵn
+    và chỉ tạo DataFrame ở bước cuối. Kết quả giống FeatureEngineer.transform (cùng cột, cùng thứ tự dòng).
+    """
+    def __init__(self, lags=None, emas=None, add_volatility=True, add_rsi=True, add_datetime=True, dtype=np.float64):
+        """
+        Parameters
+        ----------
+        dtype : np.float32 | np.float64
+            Kiểu dữ liệu của ma trận feature; float32 giảm một nửa bộ nhớ khi dữ liệu lớn.
+        """
+        super().__init__(lags=lags, emas=emas, add_volatility=add_volatility, add_rsi=add_rsi, add_datetime=add_datetime)
+        self.dtype = np.dtype(dtype)
+
+    def feature_names(self) -> list:
+        names = [f"close_lag_{lag}" for lag in self.lags]
+        names += [f"ema_{span}" for span in self.emas]
+        if self.add_volatility:
+            names.append("volatility_10")
+        if self.add_rsi:
+            names.append("rsi_14")
+        return names
+
+    def transform(self, df: pd.DataFrame, news_df: Optional[pd.DataFrame] = None, symbol: Optional[str] = None) -> pd.DataFrame:
+        # Logic sentiment vẫn dùng bản gốc
+        if news_df is not None and not news_df.empty:
+            return super().transform(df, news_df=news_df, symbol=symbol)
+
+        df, order, starts, lengths, pos, close = self._prepare(df)
+        names = self.feature_names()
+        extra_names = ["sentiment_score"] + names
+        if self.add_datetime:
+            extra_names += ["day_sin", "day_cos"]
+        n_features = len(names)
+        # Ma trận lưu theo (feature x dòng): mỗi feature ghi tuần tự, DataFrame nhận lại bản chuyển vị không cần copy
+        matrix = np.zeros((len(extra_names), len(df)), dtype=self.dtype)
+        features = matrix[1:1 + n_features]
+        col = 0
+        for lag in self.lags:
+            features[col] = kernels.shift(close, pos, lag)
+            col += 1
+        for span in self.emas:
+            features[col] = kernels.ewm(close, starts, lengths, pos, alpha=2.0 / (span + 1))
+            col += 1
+        if self.add_volatility:
+            features[col] = kernels.rolling_std(close, pos, window=10)
+            col += 1
+        if self.add_rsi:
+            features[col] = kernels.rsi(close, starts, lengths, pos, window=14)
+            col += 1
+
+        # Giữ thứ tự dòng ban đầu giống groupby().transform và bỏ các dòng chưa đủ dữ liệu (dropna)
+        keep = ~np.isnan(features).any(axis=0)
+        if order is not None:
+            restore = np.empty_like(order)
+            restore[order] = np.arange(len(order))
+            keep = keep[restore]
+        keep &= df.notna().all(axis=1).to_numpy()
+        rows = np.flatnonzero(keep)
+        matrix = matrix[:, rows] if order is None else matrix[:, restore[rows]]
+
+        result = df.iloc[rows]
+        if "symbol" not in result.columns:
+            result = result.assign(symbol=symbol)
+        result = result.rename_axis("timestamp")
+
+        # Datetime features
+        day_of_week = None
+        if self.add_datetime:
+            day_of_week = self._weekday(result.index)
+            matrix[-2] = np.sin(2 * np.pi * day_of_week / 7)
+            matrix[-1] = np.cos(2 * np.pi * day_of_week / 7)
+
+        extra = pd.DataFrame(matrix.T, index=result.index, columns=extra_names, copy=False)
+        if day_of_week is not None:
+            extra.insert(len(extra_names) - 2, "day_of_week", day_of_week)
+        return pd.concat([result, extra], axis=1)
+
+    def _prepare(self, df: pd.DataFrame):
+        """
+        Đưa timestamp về index, mã hoá symbol và sort 1 lần theo (symbol, timestamp).
+
+        Returns
+        -------
+        df, order (None nếu dữ liệu đã đúng thứ tự), starts, lengths, pos, close (đã sort, float64)
+        """
+        if "timestamp" in df.columns:
+            df = df.set_index("timestamp")
+        timestamps = pd.DatetimeIndex(df.index)
+
+        if "symbol" in df.columns:
+            codes, _ = pd.factorize(df["symbol"])
+        else:
+            codes = np.zeros(len(df), dtype=np.int64)
+
+        # Dữ liệu từ loader/fetcher thường đã đúng thứ tự nên bỏ qua bước sort
+        order = None if self._is_sorted(codes, timestamps.asi8) else np.lexsort((timestamps.asi8, codes))
+        codes_sorted = codes if order is None else codes[order]
+        starts, lengths, pos = kernels.segment_layout(codes_sorted)
+        close = df["close"].to_numpy(dtype=np.float64)
+        if order is not None:
+            close = close[order]
+        return df, order, starts, lengths, pos, close
+
+    @staticmethod
+    def _weekday(index: pd.DatetimeIndex) -> np.ndarray:
+        if index.tz is not None:
+            return np.asarray(index.weekday, dtype=np.int32)
+        # 1970-01-01 là thứ Năm (weekday = 3)
+        days = index.to_numpy().astype("datetime64[D]").astype(np.int64)
+        return ((days + 3) % 7).astype(np.int32)
+
+    @staticmethod
+    def _is_sorted(codes: np.ndarray, timestamps: np.ndarray) -> bool:
+        """True nếu dữ liệu đã nằm thành từng đoạn symbol liên tiếp, timestamp tăng dần trong mỗi đoạn."""
+        if len(codes) < 2:
+            return True
+        code_step = np.diff(codes)
+        # factorize đánh mã theo thứ tự xuất hiện nên các đoạn liên tiếp <=> mã không giảm
+        return bool((code_step >= 0).all() and ((np.diff(timestamps) > 0) | (code_step != 0)).all())
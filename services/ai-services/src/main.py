@@ -55,6 +55,14 @@ app.add_middleware(
 # Include API router
 app.include_router(api_router, prefix="/api")
 
+
+@app.on_event("startup")
+async def validate_config():
+    # Cấu hình sai (vd: micro-batch lớn hơn số worker inference) thì dừng ngay lúc khởi động
+    from src.services.executors import validate_batching
+    from src.utils.config import load_config
+    validate_batching(load_config())
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -33,13 +33,39 @@ class PredictionResponse(BaseModel):
     message: str
     data: List[PredictionResult]
 
+class StreamPredictionRequest(BaseModel):
+    model_name: str = "Ensemble"
+    symbols: List[str] = ["BTCUSDT"]
+    pred_length: int = 7
+    datatype: str = "1d"
+
 # Training models
 class TrainingRequest(BaseModel):
     datatype: str = "1d"
     pre_len: int = 7
     seq_len: int = 60
+    # Train tiếp từ checkpoint gần nhất trên các nến mới thay vì train lại từ đầu
+    fine_tune: bool = False
 
 class TrainingResponse(BaseModel):
     success: bool
     message: str
-    model_path: Optional[str] = None
\ No newline at end of file
+    model_path: Optional[str] = None
+    job_id: Optional[str] = None
+    status: Optional[str] = None
+
+class TrainingJobStatus(BaseModel):
+    job_id: str
+    status: str
+    datatype: str
+    pre_len: int
+    seq_len: int
+    fine_tune: bool = False
+    epoch: Optional[int] = None
+    max_epochs: Optional[int] = None
+    val_loss: Optional[float] = None
+    message: Optional[str] = None
+    model_path: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
\ No newline at end of file
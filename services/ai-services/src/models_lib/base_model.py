@@ -16,4 +16,16 @@ class BaseModel(ABC):
 
    @abstractmethod
    def evaluate(self, X_test: pd.DataFrame, y_test: pd.Series) -> float:
-       pass
\ No newline at end of file
+       pass
+
+class ServingModel(ABC):
+   """
+   Model chỉ dùng để dự đoán (vd: graph đã export), không có train/evaluate như BaseModel.
+   """
+   @abstractmethod
+   def predict(self, X: pd.DataFrame) -> pd.DataFrame:
+       pass
+
+   @abstractmethod
+   def fetch_data_and_predict(self, **kwargs):
+       pass
@@ -0,0 +1,97 @@
+import statistics
+import time
+import lightning.pytorch as pl
+import torch
+
+
+class ProgressReporter(pl.Callback):
+    """
+    Callback báo tiến độ training (epoch, val_loss) ra ngoài qua hàm `report`,
+    ví dụ đẩy vào queue để API trả về trạng thái job.
+    """
+    def __init__(self, report):
+        self.report = report
+
+    def on_validation_epoch_end(self, trainer, pl_module):
+        # Với DDP chỉ rank 0 báo để mỗi epoch chỉ có 1 bản tiến độ
+        if trainer.sanity_checking or not trainer.is_global_zero:
+            return
+        val_loss = trainer.callback_metrics.get("val_loss")
+        self.report(
+            epoch=trainer.current_epoch,
+            max_epochs=trainer.max_epochs,
+            val_loss=float(val_loss) if val_loss is not None else None,
+        )
+
+
+class TorchThreads(pl.Callback):
+    """
+    Đặt số thread intra-op của torch trong từng process train (kể cả các process DDP được spawn),
+    tránh nhiều process cùng dùng toàn bộ core gây tranh chấp.
+    """
+    def __init__(self, num_threads: int):
+        self.num_threads = num_threads
+
+    def setup(self, trainer, pl_module, stage):
+        torch.set_num_threads(self.num_threads)
+
+
+class ThroughputMeter(pl.Callback):
+    """
+    Đo số sample/giây trong lúc train: thời gian giữa 2 batch liên tiếp trong cùng epoch (gồm cả chờ dataloader),
+    bỏ qua `warmup_batches` batch đầu để không tính thời gian khởi động.
+    """
+    def __init__(self, warmup_batches: int = 2):
+        self.warmup_batches = warmup_batches
+        self.samples = 0
+        self.seconds = 0.0
+        self._seen = 0
+        self._last = None
+
+    def on_train_epoch_start(self, trainer, pl_module):
+        # Không tính khoảng validation/khởi tạo dataloader giữa các epoch
+        self._last = None
+
+    def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx):
+        now = time.perf_counter()
+        self._seen += 1
+        if self._last is not None and self._seen > self.warmup_batches:
+            x, _ = batch
+            # Batch của pytorch_forecasting: x là dict tensor, chiều 0 là số sample; nhân world_size khi chạy DDP
+            self.samples += len(x["encoder_lengths"]) * trainer.world_size
+            self.seconds += now - self._last
+        self._last = now
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.samples / self.seconds if self.seconds else 0.0
+
+
+class MedianPruner(pl.Callback):
+    """
+    Dừng sớm trial tuning nếu val_loss tốt nhất tới epoch hiện tại tệ hơn trung vị của các trial khác ở cùng epoch.
+    `history` là dict dùng chung giữa các process (Manager().dict(): epoch -> list val_loss), `lock` bảo vệ việc ghi.
+    """
+    def __init__(self, history, lock, warmup_epochs: int = 3, min_trials: int = 3):
+        self.history = history
+        self.lock = lock
+        self.warmup_epochs = warmup_epochs
+        self.min_trials = min_trials
+        self.best = float("inf")
+        self.pruned = False
+
+    def on_validation_epoch_end(self, trainer, pl_module):
+        # Với DDP chỉ rank 0 báo để mỗi epoch chỉ có 1 bản tiến độ
+        if trainer.sanity_checking or not trainer.is_global_zero:
+            return
+        val_loss = trainer.callback_metrics.get("val_loss")
+        if val_loss is None:
+            return
+        self.best = min(self.best, float(val_loss))
+        epoch = trainer.current_epoch
+        with self.lock:
+            others = list(self.history.get(epoch, []))
+            self.history[epoch] = others + [self.best]
+        if epoch >= self.warmup_epochs and len(others) >= self.min_trials and self.best > statistics.median(others):
+            self.pruned = True
+            trainer.should_stop = True
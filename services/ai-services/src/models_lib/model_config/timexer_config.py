@@ -3,6 +3,40 @@ from typing import Any
 import pandas as pd
 
 
+@dataclass
+class TrainingResourcesConfig:
+   """Tài nguyên CPU dùng khi train (đọc từ mục `training` trong main_config.yaml)."""
+   # Số thread intra-op của torch cho mỗi process train (None: để torch tự chọn)
+   num_threads: int = None
+   # Dataloader: số process chuẩn bị batch song song với process train
+   num_workers: int = 0
+   persistent_workers: bool = True
+   prefetch_factor: int = 2
+   pin_memory: bool = False
+   batch_size: int = 128
+   limit_train_batches: Any = 32
+   # Trainer: devices > 1 với strategy "ddp"/"ddp_spawn" => chạy nhiều process train trên CPU
+   devices: int = 1
+   strategy: str = "auto"
+   # "32-true" hoặc "bf16-mixed" (autocast bf16 trên CPU)
+   precision: str = "32-true"
+
+   @classmethod
+   def from_config(cls, config: dict = None) -> "TrainingResourcesConfig":
+      return cls(**(config or {}))
+
+   def dataloader_kwargs(self, train: bool) -> dict:
+      kwargs = dict(train=train, batch_size=self.batch_size, num_workers=self.num_workers, pin_memory=self.pin_memory)
+      if self.num_workers > 0:
+         kwargs.update(persistent_workers=self.persistent_workers, prefetch_factor=self.prefetch_factor)
+      return kwargs
+
+   def threads_per_process(self) -> int:
+      if self.num_threads is None:
+         return None
+      return max(1, self.num_threads // max(1, self.devices))
+
+
 @dataclass
 class TimeXerConfig:
    data: pd.DataFrame = None
@@ -10,6 +44,19 @@ class TimeXerConfig:
    seq: int = None
    path: str = None
    model_path: str = None
+   # Callback lightning thêm vào trainer (vd: báo tiến độ cho job manager)
+   callbacks: list = None
+   # Fine-tune: load checkpoint + dataset đã lưu ở `path` và train tiếp vài epoch trên dữ liệu mới
+   fine_tune: bool = False
+   fine_tune_epochs: int = 5
+   fine_tune_lr: float = 0.003
+   # Thread/worker/DDP/precision khi train (None: 1 process, dataloader không dùng worker như trước)
+   resources: TrainingResourcesConfig = None
+   # Hyperparameter của TimeXer ghi đè DEFAULT_HPARAMS (vd: kết quả tuning)
+   hparams: dict = None
+   # (training, validation) TimeSeriesDataSet đã chuẩn bị sẵn, dùng thay cho `data` (vd: dùng chung giữa các trial)
+   datasets: tuple = None
+   max_epochs: int = 100
 
 @dataclass
 class TimexerDataConfig:
@@ -17,4 +64,13 @@ class TimexerDataConfig:
      interval: str = None
      fetcher: Any = None
      engineer: Any = None
-     norm: Any = None
\ No newline at end of file
+     norm: Any = None
+     # LiveFeatureStore (fe.engine: streaming): giữ feature giữa các request, chỉ update nến mới đóng
+     live_features: Any = None
+
+     def features(self, start_str: str) -> pd.DataFrame:
+          """Feature (chưa chuẩn hoá) của symbol để dự đoán: qua live_features nếu có, ngược lại fetch + transform."""
+          if self.live_features is not None:
+               return self.live_features.features(self.fetcher, self.symbol, self.interval, start_str)
+          data = self.fetcher.fetch_data(symbol=self.symbol, interval=self.interval, start_str=start_str)
+          return self.engineer.transform(df=data, symbol=self.symbol)
\ No newline at end of file
@@ -1,21 +1,32 @@
-from src.models_lib.base_model import BaseModel
-from src.models_lib.xgboots import XGBootsModel
-from src.models_lib.timegpt import TimeGPTModel
-from src.models_lib.timexer import TimeXerModel
+from src.models_lib.base_model import BaseModel, ServingModel
+from src.utils.lazy_import import import_object
 
 
 
 class ModelFactory:
+    # Model backend chỉ được import khi get_model lần đầu (torch/lightning/nixtla rất nặng)
     _MODEL_MAPPING = {
-    "XGBoots": XGBootsModel,
-    "TimeGPT": TimeGPTModel,
-    "TimeXer": TimeXerModel,
+    "XGBoots": "src.models_lib.xgboots:XGBootsModel",
+    "TimeGPT": "src.models_lib.timegpt:TimeGPTModel",
+    "TimeXer": "src.models_lib.timexer:TimeXerModel",
+    }
+    # Model chỉ dự đoán (không train/evaluate), tách riêng để không bị dùng nhầm ở luồng training
+    _SERVING_MODEL_MAPPING = {
+    "TimeXerRuntime": "src.models_lib.timexer_runtime:TimeXerRuntimeModel",
     }
 
     @staticmethod
     def get_model(model_name: str, **kwargs) -> BaseModel:
-        model_class = ModelFactory._MODEL_MAPPING.get(model_name)
-        if model_class:
-            return model_class(**kwargs)
+        model_path = ModelFactory._MODEL_MAPPING.get(model_name)
+        if model_path:
+            return import_object(model_path)(**kwargs)
+        else:
+            raise ValueError(f"Unknown model name: {model_name}")
+
+    @staticmethod
+    def get_serving_model(model_name: str, **kwargs) -> ServingModel:
+        model_path = ModelFactory._SERVING_MODEL_MAPPING.get(model_name)
+        if model_path:
+            return import_object(model_path)(**kwargs)
         else:
-            raise ValueError(f"Unknown model name: {model_name}")
\ No newline at end of file
+            raise ValueError(f"Unknown serving model name: {model_name}")
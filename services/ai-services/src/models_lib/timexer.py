@@ -1,6 +1,8 @@
+import json
+import os
+import shutil
 from datetime import datetime, timedelta
 import torch
-import yaml
 from .base_model import BaseModel
 from pytorch_forecasting import TimeSeriesDataSet
 import lightning as L
@@ -15,11 +17,19 @@ from pytorch_forecasting.metrics import QuantileLoss
 from pytorch_forecasting.models.timexer import TimeXer
 from src.models_lib.model_config.timexer_config import TimeXerConfig
 from src.models_lib.model_config.timexer_config import TimexerDataConfig
-import yaml
+from src.models_lib.model_config.timexer_config import TrainingResourcesConfig
+from src.models_lib.callbacks import TorchThreads
+from src.utils.config import load_config
 
-CONFIG_PATH = "configs/main_config.yaml"
-with open(CONFIG_PATH, 'r') as f:
-    read_config = yaml.safe_load(f)
+# Hyperparameter mặc định của mạng TimeXer (có thể ghi đè qua TimeXerConfig.hparams)
+DEFAULT_HPARAMS = {
+    "hidden_size": 256,
+    "n_heads": 4,
+    "e_layers": 3,
+    "d_ff": 256,
+    "dropout": 0.1,
+    "learning_rate": 0.03,
+}
 
 class TimeXerModel(BaseModel):
 
@@ -28,27 +38,57 @@ class TimeXerModel(BaseModel):
         Khởi tạo chỉ với các tham số, model thật sẽ được tạo lúc training.
         """
         # Bỏ index
+        self.data = None
         if config.data is not None:
             self.data = config.data.reset_index(drop=False)
         self.pred = config.pred
         self.seq = config.seq
         self.path = config.path
         self.model_path = None
+        self.callbacks = config.callbacks or []
+        self.resources = config.resources or TrainingResourcesConfig()
+        self.hparams = {**DEFAULT_HPARAMS, **(config.hparams or {})}
+        self.datasets = config.datasets
+        self.max_epochs = config.max_epochs
+        self.fine_tune = config.fine_tune
+        self.baseline_val_loss = None
 
         if config.model_path is not None:
             self.model_path = config.model_path
+        elif config.fine_tune:
+            self._load_for_fine_tune(config)
         else:
             self._create_model()
 
+    @property
+    def checkpoint_file(self) -> str:
+        return f"{self.path}/timexer_pred_{self.pred}.ckpt"
+
+    @property
+    def dataset_file(self) -> str:
+        return f"{self.path}/timexer_dataset_{self.pred}.pkl"
+
+    @property
+    def meta_file(self) -> str:
+        return f"{self.path}/timexer_meta_{self.pred}.json"
+
+    @staticmethod
+    def can_fine_tune(path: str, pred: int) -> bool:
+        """Có đủ checkpoint, dataset và meta của lần train trước để fine-tune không."""
+        return all(os.path.exists(f"{path}/{name}") for name in (
+            f"timexer_pred_{pred}.ckpt", f"timexer_dataset_{pred}.pkl", f"timexer_meta_{pred}.json"))
+
+    @staticmethod
+    def load_meta(path: str, pred: int) -> dict:
+        """Meta của lần train trước: time_origin (mốc tính time_idx) và last_timestamp (nến cuối đã train)."""
+        with open(f"{path}/timexer_meta_{pred}.json", "r") as f:
+            meta = json.load(f)
+        return {name: pd.Timestamp(value) for name, value in meta.items()}
+
 
     def fetch_data_and_predict(self, config: TimexerDataConfig):
-        data = config.fetcher.fetch_data(
-        symbol=config.symbol,
-        interval=config.interval,
         # do tính lag_7
-        start_str=(datetime.now()-timedelta(days=73)).strftime("%Y-%m-%d"))
-    
-        data_processed = config.engineer.transform(df=data, symbol=config.symbol)
+        data_processed = config.features(start_str=(datetime.now()-timedelta(days=73)).strftime("%Y-%m-%d"))
         data_processed = config.norm.transform(data_processed)
         # Dự đoán
         pred_timexer = self.predict(data_processed)
@@ -58,16 +98,23 @@ class TimeXerModel(BaseModel):
         return pred_timexer
 
 
-    def _create_model(self):
-        self.data["time_idx"] = (self.data["timestamp"] - self.data["timestamp"].min()).dt.days
+    @staticmethod
+    def build_datasets(data: pd.DataFrame, seq: int, pred: int, time_origin=None):
+        """
+        Tạo (training, validation) TimeSeriesDataSet từ data đã chuẩn hoá (cột timestamp, không phải index).
+        time_idx tính theo số ngày từ time_origin (mặc định là timestamp nhỏ nhất).
+        """
+        data = data.copy()
+        time_origin = data["timestamp"].min() if time_origin is None else time_origin
+        data["time_idx"] = (data["timestamp"] - time_origin).dt.days
 
-        max_encoder_length = self.seq  # số ngày nhìn lại
-        max_prediction_length = self.pred  # số ngày dự đoán tới
+        max_encoder_length = seq  # số ngày nhìn lại
+        max_prediction_length = pred  # số ngày dự đoán tới
 
-        training_cutoff = self.data["time_idx"].max() - max_prediction_length
+        training_cutoff = data["time_idx"].max() - max_prediction_length
 
         training = TimeSeriesDataSet(
-            self.data[self.data.time_idx <= training_cutoff],
+            data[data.time_idx <= training_cutoff],
             time_idx="time_idx",
             target="close",
             group_ids=["symbol"],
@@ -91,18 +138,45 @@ class TimeXerModel(BaseModel):
             max_prediction_length=max_prediction_length,
         )
 
-        # 3. Train/Val dataloader
+        # Validation: dự đoán pred ngày cuối của mỗi symbol
         validation = TimeSeriesDataSet.from_dataset(
-            training, self.data, predict=True, stop_randomization=True
+            training, data, predict=True, stop_randomization=True
         )
+        return training, validation
+
+    def _create_model(self):
+        if self.datasets is not None:
+            training, validation = self.datasets
+        else:
+            self.time_origin = self.data["timestamp"].min()
+            training, validation = self.build_datasets(self.data, self.seq, self.pred, self.time_origin)
+            training.save(self.dataset_file)
 
-        batch_size = 128
-        self.train_dataloader = training.to_dataloader(train=True, batch_size=batch_size, num_workers=0)
-        self.val_dataloader = validation.to_dataloader(train=False, batch_size=batch_size, num_workers=0)
+        # 3. Train/Val dataloader
+        self.train_dataloader = training.to_dataloader(**self.resources.dataloader_kwargs(train=True))
+        self.val_dataloader = validation.to_dataloader(**self.resources.dataloader_kwargs(train=False))
 
         # 4. Trainer với EarlyStopping + Save Model
+        self.trainer, checkpoint_callback = self._build_trainer(max_epochs=self.max_epochs, patience=12)
+
+        # 5. Model TimeXer
+        self.model = TimeXer.from_dataset(
+            training,
+            context_length=self.seq,
+            prediction_length=self.pred,
+            **self.hparams,
+            output_size=7,   # quantile loss => cần output_size=7
+            loss=QuantileLoss(),
+            log_interval=2,
+            reduce_on_plateau_patience=4,
+        )
+        self.model_path = checkpoint_callback.best_model_path
+        print(f"Number of parameters in network: {self.model.size()/1e3:.1f}k")
+
+    def _build_trainer(self, max_epochs: int, patience: int):
+        resources = self.resources
         early_stop_callback = EarlyStopping(
-            monitor="val_loss", min_delta=1e-4, patience=12, verbose=False, mode="min"
+            monitor="val_loss", min_delta=1e-4, patience=patience, verbose=False, mode="min"
         )
 
         checkpoint_callback = ModelCheckpoint(
@@ -110,49 +184,97 @@ class TimeXerModel(BaseModel):
             filename=f"timexer_pred_{self.pred}",
             monitor="val_loss",
             save_top_k=1,
-            mode="min"
+            mode="min",
+            # Ghi đè checkpoint cũ thay vì tạo timexer_pred_x-v1.ckpt
+            enable_version_counter=False,
         )
 
-        self.trainer = pl.Trainer(
-            max_epochs=100,
+        callbacks = [early_stop_callback, checkpoint_callback, *self.callbacks]
+        threads = resources.threads_per_process()
+        if threads is not None:
+            torch.set_num_threads(threads)
+            callbacks.append(TorchThreads(threads))
+
+        trainer = pl.Trainer(
+            max_epochs=max_epochs,
             accelerator="cpu",
-            devices=1,
+            devices=resources.devices,
+            strategy=resources.strategy,
+            precision=resources.precision,
             gradient_clip_val=0.1,
-            limit_train_batches=32,
-            callbacks=[early_stop_callback, checkpoint_callback],
+            limit_train_batches=resources.limit_train_batches,
+            callbacks=callbacks,
         )
+        return trainer, checkpoint_callback
 
-        # 5. Model TimeXer
-        self.model = TimeXer.from_dataset(
-            training,
-            context_length=max_encoder_length,
-            prediction_length=max_prediction_length,
-            hidden_size=256,
-            n_heads=4,
-            e_layers=3,
-            d_ff=256,
-            dropout=0.1,
-            learning_rate=0.03,
-            output_size=7,   # quantile loss => cần output_size=7
-            loss=QuantileLoss(),
-            log_interval=2,
-            reduce_on_plateau_patience=4,
+    def _load_for_fine_tune(self, config: TimeXerConfig):
+        """
+        Fine-tune từ lần train trước: dùng lại TimeSeriesDataSet đã lưu (encoder symbol, scaler, normalizer target)
+        để tạo dataset từ dữ liệu gần đây, load checkpoint và chỉ train tiếp vài epoch với learning rate nhỏ.
+        self.data chỉ cần chứa các nến mới + đủ seq nến trước đó làm context.
+        """
+        meta = self.load_meta(self.path, self.pred)
+        self.time_origin = meta["time_origin"]
+        # time_idx phải tính từ cùng mốc với lần train đầu để scaler của time_idx vẫn đúng
+        self.data["time_idx"] = (self.data["timestamp"] - self.time_origin).dt.days
+
+        # torch >= 2.6 mặc định weights_only=True, không load được dataset / hparams của pytorch_forecasting
+        training_loaded = torch.load(self.dataset_file, weights_only=False, map_location=torch.device("cpu"))
+        training_cutoff = self.data["time_idx"].max() - self.pred
+        training = TimeSeriesDataSet.from_dataset(training_loaded, self.data[self.data.time_idx <= training_cutoff])
+        validation = TimeSeriesDataSet.from_dataset(
+            training_loaded, self.data, predict=True, stop_randomization=True
         )
+
+        self.train_dataloader = training.to_dataloader(**self.resources.dataloader_kwargs(train=True))
+        self.val_dataloader = validation.to_dataloader(**self.resources.dataloader_kwargs(train=False))
+
+        self.model = TimeXer.load_from_checkpoint(self.checkpoint_file, map_location=torch.device("cpu"), weights_only=False)
+        self.model.hparams.learning_rate = config.fine_tune_lr
+        self.trainer, checkpoint_callback = self._build_trainer(max_epochs=config.fine_tune_epochs, patience=2)
         self.model_path = checkpoint_callback.best_model_path
-        training.save(self.path + f"/timexer_dataset_{self.pred}.pkl")
-        print(f"Number of parameters in network: {self.model.size()/1e3:.1f}k")
+
+    def _save_meta(self):
+        with open(self.meta_file, "w") as f:
+            json.dump({
+                "time_origin": str(self.time_origin),
+                "last_timestamp": str(self.data["timestamp"].max()),
+            }, f)
 
     def train(self, **kwargs):
         """
         Huấn luyện model TimeXer.
         Lưu ý: Input là TimeSeriesDataSet, không phải DataFrame.
         """
+        if not self.fine_tune:
+            self.trainer.fit(
+                self.model,
+                train_dataloaders=self.train_dataloader,
+                val_dataloaders=self.val_dataloader,
+            )
+            # Dataset truyền sẵn (vd: trial tuning) thì không có data gốc để ghi meta
+            if self.data is not None:
+                self._save_meta()
+            print("Training complete.")
+            return
+
+        # Fine-tune: giữ checkpoint cũ nếu train tiếp không làm val_loss trên dữ liệu mới tốt hơn
+        backup_file = self.checkpoint_file + ".bak"
+        shutil.copyfile(self.checkpoint_file, backup_file)
+        self.baseline_val_loss = self.trainer.validate(self.model, dataloaders=self.val_dataloader, verbose=False)[0]["val_loss"]
         self.trainer.fit(
             self.model,
             train_dataloaders=self.train_dataloader,
             val_dataloaders=self.val_dataloader,
         )
-        print("Training complete.")
+        best_score = self.trainer.checkpoint_callback.best_model_score
+        if best_score is None or float(best_score) >= self.baseline_val_loss:
+            shutil.move(backup_file, self.checkpoint_file)
+            print(f"Fine-tune did not improve val_loss ({self.baseline_val_loss:.4f}), kept previous checkpoint.")
+            return
+        os.remove(backup_file)
+        self._save_meta()
+        print(f"Fine-tune complete: val_loss {self.baseline_val_loss:.4f} -> {float(best_score):.4f}")
 
     def predict(self, data_to_predict: pd.DataFrame, **kwargs):
         # Force CPU device
@@ -174,8 +296,10 @@ class TimeXerModel(BaseModel):
         # Load model với map_location=cpu
         # Load model từ s3
         timexer_loaded = TimeXer.load_from_checkpoint(
-            checkpoint_path=read_config['cloudfront_url'] + self.model_path,
-            map_location=device
+            checkpoint_path=load_config()['cloudfront_url'] + self.model_path,
+            map_location=device,
+            # torch >= 2.6 mặc định weights_only=True, không load được hparams (encoder, loss) của pytorch_forecasting
+            weights_only=False,
         )
         timexer_loaded.to(device)
         timexer_loaded.eval()  # Set to evaluation mode
@@ -0,0 +1,350 @@
+import copy
+import json
+import os
+import numpy as np
+import pandas as pd
+import torch
+from torch import nn
+from pytorch_forecasting import TimeSeriesDataSet
+from pytorch_forecasting.data.encoders import EncoderNormalizer
+from pytorch_forecasting.models.timexer import TimeXer
+from sklearn.preprocessing import RobustScaler, StandardScaler
+
+EXPORT_FORMATS = ("torchscript", "onnx")
+INPUT_NAME = "encoder_reals"
+OUTPUT_NAME = "prediction"
+
+
+class PatchEmbeddingForExport(nn.Module):
+    """
+    EnEmbedding của TimeXer (dùng chung tham số) với bước chia patch viết lại bằng reshape.
+    Patch không chồng nhau (step == patch_len) nên unfold tương đương bỏ phần dư cuối chuỗi rồi reshape;
+    exporter ONNX xuất unfold(dimension=-1) thành [..., patch_len, n_patches] (sai thứ tự trục) nên graph ONNX
+    lệch với lightning, còn reshape thì export đúng.
+    """
+    def __init__(self, embedding: nn.Module):
+        super().__init__()
+        self.embedding = embedding
+
+    def forward(self, x: torch.Tensor):
+        embedding = self.embedding
+        batch_size, n_vars = x.shape[0], x.shape[1]
+        n_patches = x.shape[-1] // embedding.patch_len
+        glb = embedding.glb_token.repeat((batch_size, 1, 1, 1))
+
+        x = x[..., :n_patches * embedding.patch_len].reshape(batch_size * n_vars, n_patches, embedding.patch_len)
+        x = embedding.value_embedding(x) + embedding.position_embedding(x)
+        x = torch.reshape(x, (-1, n_vars, x.shape[-2], x.shape[-1]))
+        x = torch.cat([x, glb], dim=2)
+        x = torch.reshape(x, (x.shape[0] * x.shape[1], x.shape[2], x.shape[3]))
+        return embedding.dropout(x), n_vars
+
+
+class TimeXerInferenceGraph(nn.Module):
+    """
+    Bọc mạng TimeXer thành graph có input cố định để export:
+
+        encoder_reals : float32 [batch, seq_len, n_reals]  -- giá trị đã qua Normalizer của pipeline,
+                        cột theo đúng thứ tự `reals` trong file spec, time_idx tính theo time_origin
+        prediction    : float32 [batch, pred_len, n_quantiles] -- cùng thang đo với cột close đầu vào
+
+    Phần tiền xử lý của TimeSeriesDataSet (StandardScaler cho từng biến, EncoderNormalizer cho target theo từng
+    cửa sổ encoder) và phần inverse của target được đưa vào graph, nên lúc serve không cần pytorch_forecasting.
+    """
+    def __init__(self, network: TimeXer, center: torch.Tensor, scale: torch.Tensor, target_position: int):
+        super().__init__()
+        # Bản sao: mạng gốc vẫn chạy đúng code của pytorch_forecasting để làm chuẩn khi kiểm tra tương đương
+        self.network = copy.deepcopy(network)
+        self.network.en_embedding = PatchEmbeddingForExport(self.network.en_embedding)
+        self.register_buffer("center", center)
+        self.register_buffer("scale", scale)
+        target_mask = torch.zeros(len(center), dtype=torch.bool)
+        target_mask[target_position] = True
+        self.register_buffer("target_mask", target_mask)
+        self.target_position = target_position
+        self.eps = float(torch.finfo(torch.float32).eps)
+
+    def forward(self, encoder_reals: torch.Tensor) -> torch.Tensor:
+        # EncoderNormalizer(method="standard") fit trên target của từng cửa sổ encoder: mean và std (unbiased) + eps
+        target = encoder_reals[..., self.target_position]
+        target_center = target.mean(dim=1)
+        target_scale = target.std(dim=1) + self.eps
+        normalized_target = (target - target_center[:, None]) / target_scale[:, None]
+
+        encoder_cont = (encoder_reals - self.center) / self.scale
+        encoder_cont = torch.where(self.target_mask, normalized_target.unsqueeze(-1), encoder_cont)
+        output = self.network({
+            "encoder_cont": encoder_cont,
+            "target_scale": torch.stack([target_center, target_scale], dim=-1),
+        })
+        return output.prediction
+
+
+def _real_scaling(dataset: TimeSeriesDataSet):
+    """center/scale cố định của từng biến real (target để 0/1 vì được chuẩn hoá theo cửa sổ trong graph)."""
+    center, scale = [], []
+    for name in dataset.reals:
+        if name in dataset.target_names:
+            center.append(0.0)
+            scale.append(1.0)
+            continue
+        scaler = dataset.get_transformer(name)
+        if isinstance(scaler, StandardScaler):
+            center.append(float(scaler.mean_[0]) if scaler.with_mean else 0.0)
+            scale.append(float(scaler.scale_[0]) if scaler.with_std else 1.0)
+        elif isinstance(scaler, RobustScaler):
+            center.append(float(scaler.center_[0]) if scaler.with_centering else 0.0)
+            scale.append(float(scaler.scale_[0]) if scaler.with_scaling else 1.0)
+        elif scaler is None:
+            center.append(0.0)
+            scale.append(1.0)
+        else:
+            raise ValueError(f"Unsupported scaler for export: {name} -> {type(scaler).__name__}")
+    return torch.tensor(center, dtype=torch.float32), torch.tensor(scale, dtype=torch.float32)
+
+
+def holdout_windows(data: pd.DataFrame, reals: list, time_idx: str, time_origin, seq: int, pred: int, per_symbol: int = 30):
+    """
+    Các cửa sổ gần nhất của mỗi symbol để so sánh model fp32/int8: (windows [N, seq, n_reals], targets [N, pred]).
+    data là dữ liệu đã chuẩn hoá (index hoặc cột timestamp, có cột symbol); cửa sổ cuối của mỗi symbol
+    dự đoán đúng đoạn validation không dùng để train.
+    """
+    if "timestamp" in data.columns:
+        data = data.set_index("timestamp")
+    windows, targets = [], []
+    for _, group in data.groupby("symbol", sort=False):
+        group = group.sort_index()
+        origin = group.index.min() if time_origin is None else pd.Timestamp(time_origin)
+        columns = [(group.index - origin).days.to_numpy(dtype=np.float64) if name == time_idx
+                   else group[name].to_numpy(dtype=np.float64) for name in reals]
+        values = np.stack(columns, axis=-1).astype(np.float32)
+        close = group["close"].to_numpy(dtype=np.float32)
+        last_start = len(group) - seq - pred
+        for start in range(max(0, last_start - per_symbol + 1), last_start + 1):
+            windows.append(values[start:start + seq])
+            targets.append(close[start + seq:start + seq + pred])
+    if not windows:
+        return np.zeros((0, seq, len(reals)), dtype=np.float32), np.zeros((0, pred), dtype=np.float32)
+    return np.stack(windows), np.stack(targets)
+
+
+def lightning_reference(network: TimeXer, dataset: TimeSeriesDataSet, data: pd.DataFrame, time_origin, point_index: int):
+    """
+    Dự đoán điểm của checkpoint qua đúng đường lightning/pytorch_forecasting (TimeSeriesDataSet.from_dataset như
+    TimeXerModel.predict) cho cửa sổ seq_len nến cuối của mỗi symbol trong data (đã chuẩn hoá).
+    Trả về (windows [N, seq, n_reals] dựng giống TimeXerRuntime.window, predictions [N, pred_len]).
+    """
+    if "timestamp" not in data.columns:
+        data = data.reset_index()
+    seq_len, pred_len = dataset.max_encoder_length, dataset.max_prediction_length
+    windows, predictions = [], []
+    for _, group in data.groupby("symbol", sort=False):
+        group = group.sort_values("timestamp").iloc[-seq_len:]
+        if len(group) < seq_len:
+            continue
+        # Giống TimeXerModel.predict: thêm pred_len dòng tương lai (copy nến cuối) làm phần decoder
+        future = pd.DataFrame([group.iloc[-1]] * pred_len)
+        future["timestamp"] = [group["timestamp"].iloc[-1] + pd.Timedelta(days=i) for i in range(1, pred_len + 1)]
+        frame = pd.concat([group, future], ignore_index=True)
+        origin = frame["timestamp"].min() if time_origin is None else pd.Timestamp(time_origin)
+        frame[dataset.time_idx] = (frame["timestamp"] - origin).dt.days
+
+        predict_set = TimeSeriesDataSet.from_dataset(dataset, frame, predict=True, stop_randomization=True)
+        with torch.no_grad():
+            x, _ = next(iter(predict_set.to_dataloader(train=False, batch_size=1, num_workers=0)))
+            output = network(x)
+        predictions.append(output.prediction[0, :, point_index].numpy())
+        windows.append(frame.iloc[:seq_len][list(dataset.reals)].to_numpy(dtype=np.float32))
+    if not windows:
+        return np.zeros((0, seq_len, len(dataset.reals)), dtype=np.float32), np.zeros((0, pred_len), dtype=np.float32)
+    return np.stack(windows), np.stack(predictions)
+
+
+def equivalence_report(reference: np.ndarray, outputs: dict, max_rel_diff: float) -> dict:
+    """
+    So sánh dự đoán của từng graph export với lightning trên cùng các cửa sổ; `passed` là các định dạng có sai lệch
+    tuyệt đối lớn nhất / max|lightning| không quá max_rel_diff. Chỉ các định dạng này được serve (TimeXerRuntimeModel).
+    """
+    scale = max(float(np.abs(reference).max()), 1e-6) if len(reference) else 1.0
+    diffs = {name: float(np.abs(values - reference).max()) / scale for name, values in outputs.items()}
+    return {
+        "windows": int(len(reference)),
+        "max_rel_diff": diffs,
+        "passed": [name for name, diff in diffs.items() if len(reference) and diff <= max_rel_diff],
+    }
+
+
+def quantization_report(fp32_predictions: np.ndarray, int8_predictions: np.ndarray, targets: np.ndarray, max_mae_increase: float) -> dict:
+    """So sánh dự đoán điểm của model int8 với fp32 trên tập holdout; passed=False nếu MAE tăng quá max_mae_increase (tỉ lệ)."""
+    mae_fp32 = float(np.abs(fp32_predictions - targets).mean())
+    mae_int8 = float(np.abs(int8_predictions - targets).mean())
+    return {
+        "windows": int(len(targets)),
+        "mae_fp32": mae_fp32,
+        "mae_int8": mae_int8,
+        "mae_increase": (mae_int8 - mae_fp32) / mae_fp32 if mae_fp32 > 0 else 0.0,
+        "max_abs_diff": float(np.abs(fp32_predictions - int8_predictions).max()),
+        "passed": mae_int8 <= mae_fp32 * (1.0 + max_mae_increase),
+    }
+
+
+def export_timexer(checkpoint_path: str, dataset_path: str, out_prefix: str, time_origin=None, formats=EXPORT_FORMATS,
+                   quantize: bool = False, holdout: pd.DataFrame = None, max_mae_increase: float = 0.02,
+                   holdout_per_symbol: int = 30, max_rel_diff: float = 1e-3) -> dict:
+    """
+    Export checkpoint TimeXer thành TorchScript (`{out_prefix}.pt`) và/hoặc ONNX (`{out_prefix}.onnx`)
+    kèm file spec `{out_prefix}.json` mô tả input (thứ tự cột, seq_len, time_origin) và output (quantile).
+
+    quantize=True: ghi thêm bản dynamic int8 cho các lớp Linear (`{out_prefix}.int8.pt` / `.int8.onnx`),
+    chỉ giữ lại nếu trên `holdout` (dữ liệu đã chuẩn hoá) MAE không tăng quá max_mae_increase so với fp32;
+    kết quả kiểm tra được ghi vào spec["quantized"].
+    Nếu có `holdout`, graph của từng định dạng được so với dự đoán qua lightning (lightning_reference) trên cửa sổ cuối
+    của mỗi symbol; kết quả ghi vào spec["equivalence"], định dạng lệch quá max_rel_diff sẽ không được serve.
+    Trả về dict {format: path} các file đã ghi (kể cả "spec").
+    """
+    # Từ torch 2.6 torch.load mặc định weights_only=True, không load được dataset / hparams (encoder, normalizer)
+    # của pytorch_forecasting => load tường minh với weights_only=False (file do chính training pipeline ghi)
+    dataset = torch.load(dataset_path, weights_only=False, map_location="cpu")
+    normalizer = dataset.target_normalizer
+    if not isinstance(normalizer, EncoderNormalizer) or normalizer.method != "standard" \
+            or normalizer.transformation is not None or normalizer.max_length is not None:
+        # Vd: max_encoder_length <= 20 thì pytorch_forecasting mặc định dùng GroupNormalizer cho target
+        raise ValueError(f"Unsupported target normalizer for export: {normalizer} "
+                         f"(needs EncoderNormalizer, max_encoder_length={dataset.max_encoder_length})")
+
+    network = TimeXer.load_from_checkpoint(checkpoint_path, map_location=torch.device("cpu"), weights_only=False)
+    network.eval()
+    # Như LightningModule.to_torchscript: không có Trainer thì các property như current_stage raise khi trace
+    network._jit_is_scripting = True
+    center, scale = _real_scaling(dataset)
+    target_position = dataset.reals.index(dataset.target)
+    graph = TimeXerInferenceGraph(network, center, scale, target_position).eval()
+
+    seq_len, pred_len = dataset.max_encoder_length, dataset.max_prediction_length
+    example = torch.randn(2, seq_len, len(dataset.reals))
+    written = {}
+    with torch.no_grad():
+        expected = graph(example)
+        if "torchscript" in formats:
+            traced = torch.jit.trace(graph, example)
+            # Kiểm tra graph trace cho kết quả giống module gốc
+            torch.testing.assert_close(traced(example), expected)
+            written["torchscript"] = f"{out_prefix}.pt"
+            torch.jit.save(traced, written["torchscript"])
+        if "onnx" in formats:
+            written["onnx"] = f"{out_prefix}.onnx"
+            torch.onnx.export(
+                graph, (example,), written["onnx"],
+                input_names=[INPUT_NAME], output_names=[OUTPUT_NAME],
+                dynamic_axes={INPUT_NAME: {0: "batch"}, OUTPUT_NAME: {0: "batch"}},
+                opset_version=17,
+                dynamo=False,
+            )
+
+    quantiles = list(getattr(network.loss, "quantiles", [0.5]))
+    point_index = quantiles.index(0.5) if 0.5 in quantiles else 0
+    equivalence = None
+    if holdout is not None:
+        equivalence = _check_equivalence(network, dataset, written, holdout, time_origin, point_index, max_rel_diff)
+    quantized = None
+    if quantize:
+        if holdout is None:
+            raise ValueError("Quantized export needs a holdout set for the accuracy check")
+        windows, targets = holdout_windows(holdout, list(dataset.reals), dataset.time_idx, time_origin,
+                                           seq_len, pred_len, per_symbol=holdout_per_symbol)
+        # Chỉ lượng tử hoá các graph fp32 đã khớp với lightning
+        verified = {name: path for name, path in written.items() if name in equivalence["passed"]}
+        quantized = _export_quantized(graph, example, windows, targets, point_index, verified, out_prefix, max_mae_increase)
+        written.update({f"{name}_int8": path for name, path in quantized.get("files", {}).items()})
+
+    spec = {
+        "input": INPUT_NAME,
+        "output": OUTPUT_NAME,
+        "reals": list(dataset.reals),
+        "target": dataset.target,
+        "time_idx": dataset.time_idx,
+        "time_origin": str(time_origin) if time_origin is not None else None,
+        "seq_len": seq_len,
+        "pred_len": pred_len,
+        "quantiles": quantiles,
+        "point_index": point_index,
+        "quantized": quantized,
+        "equivalence": equivalence,
+    }
+    written["spec"] = f"{out_prefix}.json"
+    with open(written["spec"], "w") as f:
+        json.dump(spec, f, indent=2)
+    return written
+
+
+def _check_equivalence(network: TimeXer, dataset: TimeSeriesDataSet, written: dict, holdout: pd.DataFrame,
+                       time_origin, point_index: int, max_rel_diff: float) -> dict:
+    """Chạy lightning và graph đã ghi (torch.jit / onnxruntime, giống lúc serve) trên cùng cửa sổ rồi so sánh."""
+    windows, reference = lightning_reference(network, dataset, holdout, time_origin, point_index)
+
+    def run_torchscript(path):
+        traced = torch.jit.load(path, map_location="cpu")
+        with torch.no_grad():
+            return traced(torch.from_numpy(windows)).numpy()
+
+    def run_onnx(path):
+        import onnxruntime as ort
+        session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        return session.run(None, {INPUT_NAME: windows})[0]
+
+    outputs, errors = {}, {}
+    for name, run in (("torchscript", run_torchscript), ("onnx", run_onnx)):
+        if name not in written:
+            continue
+        try:
+            outputs[name] = run(written[name])[..., point_index]
+        except Exception as e:
+            # Graph export được nhưng không chạy được (vd: op export sai) => chỉ không serve định dạng này
+            errors[name] = str(e)
+    report = equivalence_report(reference, outputs, max_rel_diff)
+    report["errors"] = errors
+    for name, diff in report["max_rel_diff"].items():
+        print(f"{name} vs lightning on {report['windows']} windows: max rel diff {diff:.2e} "
+              f"{'ok' if name in report['passed'] else 'MISMATCH, will not be served'}")
+    for name, error in errors.items():
+        print(f"{name} graph failed to run, will not be served: {error}")
+    return report
+
+
+def _export_quantized(graph: nn.Module, example: torch.Tensor, windows: np.ndarray, targets: np.ndarray,
+                      point_index: int, written: dict, out_prefix: str, max_mae_increase: float) -> dict:
+    """Dynamic int8 (trọng số Linear int8, activation lượng tử hoá lúc chạy) cho từng định dạng đã export."""
+    if len(windows) == 0:
+        raise ValueError("Holdout set has no complete window for the accuracy check")
+    inputs = torch.from_numpy(windows)
+    with torch.no_grad():
+        fp32 = graph(inputs)[..., point_index].numpy()
+
+    files, reports = {}, {}
+    if "torchscript" in written:
+        quantized_graph = torch.ao.quantization.quantize_dynamic(graph, {nn.Linear}, dtype=torch.qint8)
+        with torch.no_grad():
+            traced = torch.jit.trace(quantized_graph, example)
+            int8 = traced(inputs)[..., point_index].numpy()
+        reports["torchscript"] = quantization_report(fp32, int8, targets, max_mae_increase)
+        if reports["torchscript"]["passed"]:
+            files["torchscript"] = f"{out_prefix}.int8.pt"
+            torch.jit.save(traced, files["torchscript"])
+    if "onnx" in written:
+        import onnxruntime as ort
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        path = f"{out_prefix}.int8.onnx"
+        # Chỉ lượng tử hoá MatMul/Gemm (tương ứng nn.Linear như bản torchscript); ConvInteger không có kernel CPU
+        quantize_dynamic(written["onnx"], path, weight_type=QuantType.QInt8, op_types_to_quantize=["MatMul", "Gemm"])
+        session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        int8 = session.run(None, {INPUT_NAME: windows})[0][..., point_index]
+        reports["onnx"] = quantization_report(fp32, int8, targets, max_mae_increase)
+        if reports["onnx"]["passed"]:
+            files["onnx"] = path
+        else:
+            os.remove(path)
+
+    for name, report in reports.items():
+        print(f"int8 {name}: MAE {report['mae_fp32']:.4f} -> {report['mae_int8']:.4f} "
+              f"({report['mae_increase']:+.1%}) {'kept' if report['passed'] else 'rejected'}")
+    return {"files": files, "reports": reports}
@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import urllib.request
+from datetime import datetime, timedelta
+from typing import List
+import numpy as np
+import pandas as pd
+from src.models_lib.base_model import ServingModel
+from src.models_lib.model_config.timexer_config import TimeXerConfig, TimexerDataConfig
+from src.services.micro_batcher import MicroBatcher
+
+RUNTIMES = ("onnx", "torchscript")
+
+
+class UnverifiedGraphError(RuntimeError):
+    """Graph export chưa được so sánh với lightning lúc export, hoặc kết quả lệch quá ngưỡng."""
+
+
+class TimeXerRuntime:
+    """
+    Chạy graph TimeXer đã export (timexer_export.export_timexer) chỉ với onnxruntime hoặc torch.jit,
+    không cần lightning / pytorch_forecasting. Đầu vào là các cửa sổ feature dựng trực tiếp bằng numpy
+    theo file spec (thứ tự cột, seq_len, time_origin).
+    """
+    def __init__(self, graph_path: str, spec_path: str, runtime: str = "onnx", num_threads: int = None):
+        if runtime not in RUNTIMES:
+            raise ValueError(f"Unknown TimeXer runtime: {runtime}")
+        self.runtime = runtime
+        with open(spec_path, "r") as f:
+            self.spec = json.load(f)
+        self.seq_len = self.spec["seq_len"]
+        self.pred_len = self.spec["pred_len"]
+        self.time_origin = pd.Timestamp(self.spec["time_origin"]) if self.spec.get("time_origin") else None
+        self._run = self._load(graph_path, num_threads)
+
+    def _load(self, graph_path: str, num_threads: int):
+        if self.runtime == "onnx":
+            import onnxruntime as ort
+            options = ort.SessionOptions()
+            if num_threads:
+                options.intra_op_num_threads = num_threads
+            session = ort.InferenceSession(graph_path, sess_options=options, providers=["CPUExecutionProvider"])
+            input_name = self.spec["input"]
+            return lambda batch: session.run(None, {input_name: batch})[0]
+
+        import torch
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        module = torch.jit.load(graph_path, map_location="cpu").eval()
+
+        def run(batch):
+            with torch.inference_mode():
+                return module(torch.from_numpy(batch)).numpy()
+        return run
+
+    def window(self, df: pd.DataFrame) -> np.ndarray:
+        """Cửa sổ encoder [seq_len, n_reals] float32 từ seq_len nến cuối của 1 symbol (df index hoặc cột timestamp)."""
+        if "timestamp" in df.columns:
+            df = df.set_index("timestamp")
+        df = df.sort_index()
+        # Model export trước khi có time_origin: giống TimeXerModel.predict, tính từ nến đầu của dữ liệu truyền vào
+        origin = self.time_origin if self.time_origin is not None else df.index.min()
+        df = df.iloc[-self.seq_len:]
+        if len(df) < self.seq_len:
+            raise ValueError(f"Need {self.seq_len} rows to predict, got {len(df)}")
+        columns = []
+        for name in self.spec["reals"]:
+            if name == self.spec["time_idx"]:
+                columns.append((df.index - origin).days.to_numpy(dtype=np.float64))
+            else:
+                columns.append(df[name].to_numpy(dtype=np.float64))
+        window = np.stack(columns, axis=-1).astype(np.float32)
+        if not np.isfinite(window).all():
+            raise ValueError("Prediction window contains NaN/inf values")
+        return window
+
+    def predict_windows(self, windows: np.ndarray) -> np.ndarray:
+        """windows [batch, seq_len, n_reals] -> dự đoán điểm (quantile 0.5) [batch, pred_len]."""
+        quantiles = self._run(np.ascontiguousarray(windows, dtype=np.float32))
+        return quantiles[..., self.spec["point_index"]]
+
+    def predict_frames(self, frames: List[pd.DataFrame]) -> List[pd.DataFrame]:
+        """Dự đoán nhiều symbol trong 1 lần chạy graph; mỗi phần tử trả về giống TimeXerModel.predict."""
+        if not frames:
+            return []
+        windows = np.stack([self.window(df) for df in frames])
+        predictions = self.predict_windows(windows)
+        return [self.forecast_frame(df, values) for df, values in zip(frames, predictions)]
+
+    def predict_frames_isolated(self, frames: List[pd.DataFrame]) -> list:
+        """Như predict_frames nhưng frame không dựng được cửa sổ chỉ trả về lỗi của nó, không làm hỏng cả batch."""
+        windows, results = [], []
+        for df in frames:
+            try:
+                windows.append(self.window(df))
+                results.append(None)
+            except (ValueError, KeyError) as e:
+                results.append(e)
+        if windows:
+            predictions = iter(self.predict_windows(np.stack(windows)))
+            results = [result if result is not None else self.forecast_frame(df, next(predictions))
+                       for df, result in zip(frames, results)]
+        return results
+
+    def forecast_frame(self, df: pd.DataFrame, values: np.ndarray) -> pd.DataFrame:
+        last_day = (df["timestamp"] if "timestamp" in df.columns else df.index.to_series()).max()
+        return pd.DataFrame({
+            "timestamp": [last_day + pd.Timedelta(days=i) for i in range(1, self.pred_len + 1)],
+            "close": values.astype(np.float64),
+        })
+
+
+class TimeXerRuntimeModel(ServingModel):
+    """
+    Model serve TimeXer bằng graph đã export thay cho checkpoint lightning (chỉ dự đoán, không train).
+    Graph + spec được lấy ở `path`, nếu chưa có thì tải từ cloudfront giống checkpoint.
+    Chỉ serve định dạng đã khớp với lightning lúc export (spec["equivalence"]), ngược lại raise UnverifiedGraphError.
+    quantized=True dùng bản dynamic int8 nếu lúc export nó qua được kiểm tra độ chính xác, ngược lại dùng fp32.
+    max_batch_size > 1: các predict đồng thời trên cùng instance được gom (MicroBatcher) thành 1 forward pass;
+    graph được load lại khi file spec đổi (model vừa train/export lại).
+    """
+    def __init__(self, config: TimeXerConfig, runtime: str = "onnx", base_url: str = None, num_threads: int = None,
+                 quantized: bool = False, max_batch_size: int = 1, max_wait_ms: float = 5.0):
+        self.pred = config.pred
+        self.seq = config.seq
+        self.path = config.path.rstrip("/")
+        self.runtime_name = runtime
+        self.base_url = base_url
+        self.num_threads = num_threads
+        self.quantized = quantized
+        self._runtime = None
+        self._spec_mtime = None
+        self._lock = threading.Lock()
+        self.batcher = MicroBatcher(self._predict_batch, max_batch_size, max_wait_ms) if max_batch_size > 1 else None
+
+    @property
+    def runtime(self) -> TimeXerRuntime:
+        prefix = f"{self.path}/timexer_pred_{self.pred}"
+        with self._lock:
+            if self._runtime is None or self._spec_changed(f"{prefix}.json"):
+                spec_path = self._ensure_local(f"{prefix}.json")
+                self._check_verified(spec_path)
+                graph_path = self._ensure_local(f"{prefix}{self._graph_suffix(spec_path)}")
+                self._runtime = TimeXerRuntime(graph_path, spec_path, runtime=self.runtime_name, num_threads=self.num_threads)
+                self._spec_mtime = os.path.getmtime(spec_path)
+            return self._runtime
+
+    def _spec_changed(self, spec_path: str) -> bool:
+        return os.path.exists(spec_path) and os.path.getmtime(spec_path) != self._spec_mtime
+
+    def _check_verified(self, spec_path: str):
+        with open(spec_path, "r") as f:
+            equivalence = json.load(f).get("equivalence") or {}
+        if self.runtime_name not in equivalence.get("passed", []):
+            raise UnverifiedGraphError(f"{self.runtime_name} graph of timexer_pred_{self.pred} was not verified against lightning "
+                                       f"(max rel diff: {equivalence.get('max_rel_diff')})")
+
+    def _graph_suffix(self, spec_path: str) -> str:
+        ext = "onnx" if self.runtime_name == "onnx" else "pt"
+        if not self.quantized:
+            return f".{ext}"
+        with open(spec_path, "r") as f:
+            quantized = json.load(f).get("quantized") or {}
+        if self.runtime_name not in quantized.get("files", {}):
+            print(f"No accepted int8 {self.runtime_name} graph for timexer_pred_{self.pred}, serving fp32")
+            return f".{ext}"
+        return f".int8.{ext}"
+
+    def _ensure_local(self, file_path: str) -> str:
+        if not os.path.exists(file_path):
+            if not self.base_url:
+                raise FileNotFoundError(f"Exported TimeXer graph not found: {file_path}")
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            urllib.request.urlretrieve(self.base_url + file_path, file_path)
+        return file_path
+
+    def fetch_data_and_predict(self, config: TimexerDataConfig):
+        # do tính lag_7
+        data_processed = config.features(start_str=(datetime.now() - timedelta(days=73)).strftime("%Y-%m-%d"))
+        data_processed = config.norm.transform(data_processed)
+        pred_timexer = self.predict(data_processed)
+        pred_timexer['symbol'] = config.symbol
+        return config.norm.inverse_transform(pred_timexer)
+
+    def predict(self, data_to_predict: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        if self.batcher is None:
+            return self.runtime.predict_frames([data_to_predict])[0]
+        return self.batcher.submit(data_to_predict)
+
+    def _predict_batch(self, frames: List[pd.DataFrame]) -> list:
+        return self.runtime.predict_frames_isolated(frames)
@@ -2,29 +2,86 @@ import logging
 import numpy as np
 import pickle
 import dotenv
-import yaml
-from src.features.feature_engineer import FeatureEngineer
+from src.features.engineer_factory import FeatureEngineerFactory
 from src.models_lib.model_factory import ModelFactory
 import os
+import threading
 from src.data.fecther_factory import FetcherFactory
-from src.pipelines.training_pipeline import run_training_pipeline
 import glob
+from urllib.error import URLError
 from src.models_lib.model_config.timexer_config import TimeXerConfig, TimexerDataConfig
 from src.models_lib.model_config.timegpt_config import TimeGPTDataConfig, TimeGPTConfig
+from src.models_lib.timexer_runtime import UnverifiedGraphError
 from src.utils.ensemble import ForecastEnsemble
+from src.utils.config import load_config
 
 logger = logging.getLogger(__name__)
 
 dotenv.load_dotenv()
 
-# Config
-CONFIG_PATH = "configs/main_config.yaml"
+# Model graph export dùng chung giữa các request (session đã load + micro-batcher), theo graph được serve
+_RUNTIME_MODELS = {}
+_RUNTIME_MODELS_LOCK = threading.Lock()
+# fe.engine: streaming => trạng thái feature theo symbol giữ giữa các request, theo (interval, số dòng giữ lại)
+_LIVE_FEATURES = {}
+_LIVE_FEATURES_LOCK = threading.Lock()
+
+
+def shared_runtime_model(read_config: dict, timexer_config: TimeXerConfig):
+    """TimeXerRuntimeModel dùng chung cho mọi request cùng (path, pred_len, runtime, quantized)."""
+    serving = read_config.get('serving', {})
+    runtime = serving.get('timexer_runtime', 'lightning')
+    key = (timexer_config.path, timexer_config.pred, runtime, serving.get('quantized', False))
+    with _RUNTIME_MODELS_LOCK:
+        model = _RUNTIME_MODELS.get(key)
+        if model is None:
+            batching = serving.get('batching', {})
+            model = _RUNTIME_MODELS[key] = ModelFactory.get_serving_model(
+                "TimeXerRuntime", config=timexer_config, runtime=runtime,
+                base_url=read_config['cloudfront_url'], num_threads=serving.get('num_threads'),
+                quantized=serving.get('quantized', False),
+                max_batch_size=batching.get('max_batch_size', 1),
+                max_wait_ms=batching.get('max_wait_ms', 5.0))
+    return model
+
+
+def shared_live_features(read_config: dict, interval: str, history_len: int):
+    """LiveFeatureStore dùng chung cho mọi request cùng interval khi fe.engine là streaming, ngược lại None."""
+    if read_config['fe'].get('engine') != 'streaming':
+        return None
+    from src.features.streaming_engineer import LiveFeatureStore
+    with _LIVE_FEATURES_LOCK:
+        store = _LIVE_FEATURES.get((interval, history_len))
+        if store is None:
+            store = _LIVE_FEATURES[(interval, history_len)] = LiveFeatureStore(
+                FeatureEngineerFactory.from_config(read_config['fe']), history_len=history_len)
+    return store
+
+
+def predict_timexer(read_config: dict, timexer_config: TimeXerConfig, timexer_data_config: TimexerDataConfig):
+    """
+    Dự đoán TimeXer bằng graph đã export (onnx/torchscript), chỉ cần torch/onnxruntime lúc serve.
+    Graph không có hoặc không khớp với lightning lúc export thì báo lỗi, trừ khi bật serving.lightning_fallback
+    (dùng checkpoint lightning, cần pytorch_forecasting). runtime: lightning thì luôn dùng checkpoint.
+    """
+    serving = read_config.get('serving', {})
+    runtime = serving.get('timexer_runtime', 'lightning')
+    if runtime != 'lightning':
+        try:
+            model = shared_runtime_model(read_config, timexer_config)
+            return model.fetch_data_and_predict(config=timexer_data_config)
+        except (FileNotFoundError, URLError, UnverifiedGraphError) as e:
+            if not serving.get('lightning_fallback', False):
+                raise RuntimeError(f"Exported TimeXer graph unavailable ({e}); "
+                                   f"set serving.lightning_fallback: true to serve the lightning checkpoint instead") from e
+            logger.warning(f"Exported TimeXer graph unavailable ({e}), falling back to lightning checkpoint")
+    timexer = ModelFactory.get_model("TimeXer", config=timexer_config)
+    return timexer.fetch_data_and_predict(config=timexer_data_config)
 
 
 def prediction_pipeline(model_name: str = "Ensemble", symbol: str = "BTCUSDT", pred_len: int = 7, datatype: str = "1d"):
     print(f"Starting prediction pipeline with model: {model_name}, symbol: {symbol}, pred_len: {pred_len}, datatype: {datatype}")
-    with open(CONFIG_PATH, 'r') as f:
-        read_config = yaml.safe_load(f)
+    read_config = load_config()
 
 
     # Xác định khoảng fetch data
@@ -33,7 +90,7 @@ def prediction_pipeline(model_name: str = "Ensemble", symbol: str = "BTCUSDT", p
 
     # Tạo fetcher và engineer + loader
     fetcher = FetcherFactory.create_data_fetcher("binance", api_key=os.getenv("API-Key"), api_secret=os.getenv("Secret-Key"))
-    engineer = FeatureEngineer(lags=read_config['fe']['lags'], emas=read_config['fe']['emas'], add_volatility=read_config['fe']['add_volatility'], add_rsi=read_config['fe']['add_rsi'], add_datetime=read_config['fe']['add_datetime'])
+    engineer = FeatureEngineerFactory.from_config(read_config['fe'])
     
     # API for TimeGPT
     api = os.getenv("TimeGPT-API-Key")
@@ -47,6 +104,7 @@ def prediction_pipeline(model_name: str = "Ensemble", symbol: str = "BTCUSDT", p
     check = f"timexer_dataset_{pred_len}.pkl" in list_model
     # Training model nếu không tìm thấy
     if (not check) and (model_name in ["TimeXer", "Ensemble"]):
+        from src.pipelines.training_pipeline import run_training_pipeline
         temp = run_training_pipeline(datatype='1d', pre_len=pred_len, seq_len=60)
     
     if (model_name in ["TimeXer", "Ensemble"]):
@@ -67,7 +125,8 @@ def prediction_pipeline(model_name: str = "Ensemble", symbol: str = "BTCUSDT", p
             interval="1d",
             fetcher=fetcher,
             engineer=engineer,
-            norm=norm
+            norm=norm,
+            live_features=shared_live_features(read_config, "1d", history_len=timexer_config.seq)
         )
 
     # config model and data
@@ -97,8 +156,7 @@ def prediction_pipeline(model_name: str = "Ensemble", symbol: str = "BTCUSDT", p
 
 
     # load model timexer, chuẩn hoá dữ liệu
-    timexer = ModelFactory.get_model("TimeXer", config=timexer_config)
-    timexer_pred = timexer.fetch_data_and_predict(config=timexer_data_config)
+    timexer_pred = predict_timexer(read_config, timexer_config, timexer_data_config)
     print(timexer_pred)
     if model_name == "TimeXer":
         return timexer_pred
@@ -1,30 +1,84 @@
 # training_pipeline.py
 
 import os
+import json
 import dotenv
-import yaml
 import pickle
 # Use relative imports
 from src.data.saver_factory import SaverFactory
 from src.data.fecther_factory import FetcherFactory
-from src.features.feature_engineer import FeatureEngineer
+from src.features.engineer_factory import FeatureEngineerFactory
 from src.utils.normalizer import Normalizer
-from src.data.loader.csv_loader import CSVLoader
+from src.data.loader.fetcher_loader import FetcherLoader
+from src.data.loader.lake_loader import LakeLoader
+from src.data.market_data_lake import HISTORY_START, MarketDataLake, interval_to_timedelta
 from src.data.loader.data_loader_service import DataLoaderService
 from src.models_lib.model_factory import ModelFactory
-from src.models_lib.timexer import TimeXerConfig
+from src.models_lib.model_config.timexer_config import TimeXerConfig, TrainingResourcesConfig
+from src.services.tuning_service import load_best_hparams
+from src.utils.config import load_config
 
 dotenv.load_dotenv()
 
 # Import các lớp và hàm helper đã xây dựng
 
 # --- CONFIGURATION ---
-CONFIG_PATH = "configs/main_config.yaml"
 SYMBOLS_TO_TRAIN =  ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT']
 ARTIFACTS_DIR = "artifacts" # Thư mục để lưu tất cả các kết quả
 
 
-def run_training_pipeline(datatype: str = '1d', pre_len: int = 7, seq_len: int = 60):
+def history_start(pre_len: int) -> str:
+    """Mốc bắt đầu dữ liệu lịch sử dùng để train."""
+    return "2023-01-01" if pre_len < 7 else "2021-01-01"
+
+
+def sync_market_data(read_config: dict, datatype: str) -> str:
+    """
+    Chỉ fetch (song song) các nến chưa có trong data lake rồi ghi thêm vào lake:
+    - các nến mới hơn nến cuối đã lưu;
+    - đoạn lịch sử [HISTORY_START, nến đầu tiên) còn thiếu nếu lake được tạo với mốc bắt đầu muộn hơn.
+    Trả về thư mục lake để đọc lại đúng khoảng thời gian cần.
+    """
+    fetch = FetcherFactory.create_data_fetcher("binance", api_key=os.getenv("API-Key"), api_secret=os.getenv("Secret-Key"))
+    lake_root = read_config.get('lake_root', 'data/lake')
+    lake = MarketDataLake(lake_root)
+    saver = SaverFactory.create_data_saver("lake", root=lake_root)
+    max_workers = read_config.get('fetch_workers', 8)
+
+    head_end_by_symbol = {}
+    for symbol in read_config['coins']:
+        head_end = lake.head_end_ms(symbol, datatype, HISTORY_START)
+        if head_end is not None:
+            head_end_by_symbol[symbol] = head_end
+    if head_end_by_symbol:
+        print(f"Backfilling history from {HISTORY_START} for {list(head_end_by_symbol)}...")
+        loader = FetcherLoader(fetcher=fetch, symbols=list(head_end_by_symbol), max_workers=max_workers,
+                               end_by_symbol=head_end_by_symbol, interval=datatype, start_str=HISTORY_START)
+        old_data = DataLoaderService(loader).load_data()
+        if not old_data.empty:
+            saver.save_data(old_data, interval=datatype)
+
+    print(f"Fetching new candles (history from {HISTORY_START})...")
+    start_by_symbol = {}
+    for symbol in read_config['coins']:
+        next_start = lake.next_start_ms(symbol, datatype)
+        if next_start is not None:
+            start_by_symbol[symbol] = next_start
+    loader = FetcherLoader(
+        fetcher=fetch,
+        symbols=read_config['coins'],
+        max_workers=max_workers,
+        start_by_symbol=start_by_symbol,
+        interval=datatype,
+        start_str=HISTORY_START,
+    )
+    new_data = DataLoaderService(loader).load_data()
+    if not new_data.empty:
+        saver.save_data(new_data, interval=datatype)
+    return lake_root
+
+
+def run_training_pipeline(datatype: str = '1d', pre_len: int = 7, seq_len: int = 60, callbacks: list = None, fine_tune: bool = False):
     try:  
         """
         Thực thi toàn bộ quy trình training model từ đầu đến cuối.
@@ -33,73 +87,134 @@ def run_training_pipeline(datatype: str = '1d', pre_len: int = 7, seq_len: int =
             datatype (str): Tần suất dữ liệu ('h' cho hàng giờ, 'd' cho hàng ngày).
             pre_len (int): Prediction length - số bước thời gian cần dự đoán.
             seq_len (int): Sequence length - số bước thời gian model nhìn lại (encoder).
+            callbacks (list): Callback lightning thêm vào trainer (vd: báo tiến độ epoch/val_loss).
+            fine_tune (bool): Train tiếp từ checkpoint gần nhất trên các nến mới thay vì train lại từ đầu
+                (tự chuyển về train từ đầu nếu chưa có checkpoint/dataset/normalizer của lần trước).
         """
         print("=============================================")
         print("🚀 STARTING TRAINING PIPELINE...")
-        print(f"Params: DataType='{datatype}', PredictionLength={pre_len}, SequenceLength={seq_len}")
+        print(f"Params: DataType='{datatype}', PredictionLength={pre_len}, SequenceLength={seq_len}, FineTune={fine_tune}")
         print("=============================================")
 
-        with open(CONFIG_PATH, 'r') as f:
-            read_config = yaml.safe_load(f)
-
-        # TẢI DỮ LIỆU và SAVE
-        # Khoi tao cac factory cho load + save + fetch
-        fetch = FetcherFactory.create_data_fetcher("binance", api_key=os.getenv("API-Key"), api_secret=os.getenv("Secret-Key"))
-        save = SaverFactory.create_data_saver("csv")
+        read_config = load_config()
+        # torch/lightning chỉ import khi thật sự train, không khi module được import (API, prediction pipeline)
+        from src.models_lib.timexer import TimeXerModel
 
         print("\n Loading data...")
-
-        date_fetch = "2023-01-01" if pre_len < 7 else "2021-01-01"
-        time_path = "day" if datatype == "1d" else "hour"
-        print(f"Fetching data from {date_fetch}...")
-        for symbol in read_config['coins']:
-            data = fetch.fetch_data(
-                symbol=symbol,
-                interval=datatype,
-                start_str=date_fetch,
-            )
-            save.save_data(data,file_path=f"data/raw/{time_path}/{symbol}.csv")
+        lake_root = sync_market_data(read_config, datatype)
+        date_fetch = history_start(pre_len)
+
+        model_dir = "models/timexer/day"
+        normalizer_path = f"{ARTIFACTS_DIR}/normalizer_{pre_len}.pkl"
+        if fine_tune and not (TimeXerModel.can_fine_tune(model_dir, pre_len) and os.path.exists(normalizer_path)):
+            print("No previous checkpoint to fine-tune from, training from scratch.")
+            fine_tune = False
+
+        fine_tune_config = read_config.get('fine_tune', {})
+        start, keep_from = date_fetch, None
+        if fine_tune:
+            # Chỉ cần các nến mới + (replay_steps + seq + pred) nến trước đó, cộng thêm warmup cho EMA/RSI
+            last_trained = TimeXerModel.load_meta(model_dir, pre_len)["last_timestamp"]
+            step = interval_to_timedelta(datatype)
+            keep_from = last_trained - step * (fine_tune_config.get('replay_steps', 90) + seq_len + pre_len)
+            start = keep_from - step * fine_tune_config.get('warmup_steps', 60)
+
+        data = DataLoaderService(LakeLoader(lake_root, symbols=read_config['coins'], interval=datatype, start=start)).load_data()
+        if data.empty:
+            raise ValueError("No market data fetched for training")
+        if fine_tune and data.index.max() <= last_trained:
+            print("No new candles since last training, nothing to fine-tune.")
+            return {
+                "model_name": f"timexer_pred_{pre_len}",
+                "status": "success"
+            }
 
         # #  FEATURE ENGINEERING 
         print("\n Engineering features...")
-        engineer = FeatureEngineer(lags=read_config['fe']['lags'], emas=read_config['fe']['emas'], add_volatility=read_config['fe']['add_volatility'], add_rsi=read_config['fe']['add_rsi'], add_datetime=read_config['fe']['add_datetime'])
-        
-        loader = CSVLoader(file_path=f"data/raw/{time_path}")
-        data = DataLoaderService(loader).load_data()
-        # luu backup 2 cai data cho norm
+        engineer = FeatureEngineerFactory.from_config(read_config['fe'])
 
         data_processed = engineer.transform(data)
-
-        #Chuẩn hoá dữ liệu cho từng đồng (per_symbol - True)
-        norm = Normalizer(method="standard", per_symbol=True, columns=read_config['numeric_cols'])
-        # Lưu lại file pkl thay vì sử dụng dataloader csv
-        data_normalized = norm.fit_transform(data_processed)
-        with open(f"artifacts/normalizer_{pre_len}.pkl", "wb") as f:
-            pickle.dump(norm, f)
-
-        ## Bước train và lưu model:
+        if keep_from is not None:
+            data_processed = data_processed[data_processed.index >= keep_from]
+
+        if fine_tune:
+            # Dùng lại normalizer của lần train đầu để dữ liệu mới cùng thang đo với checkpoint
+            with open(normalizer_path, "rb") as f:
+                norm = pickle.load(f)
+            data_normalized = norm.transform(data_processed)
+        else:
+            #Chuẩn hoá dữ liệu cho từng đồng (per_symbol - True)
+            norm = Normalizer(method="standard", per_symbol=True, columns=read_config['numeric_cols'])
+            # Lưu lại file pkl thay vì sử dụng dataloader csv
+            data_normalized = norm.fit_transform(data_processed)
+            with open(normalizer_path, "wb") as f:
+                pickle.dump(norm, f)
+
+        ## Bước train và lưu model (dùng hyperparameter tốt nhất của lần tuning gần nhất nếu có):
+        hparams = load_best_hparams(datatype, pre_len, seq_len)
+        if hparams and not fine_tune:
+            print(f"Using tuned hyperparameters: {hparams}")
         timxer_config = TimeXerConfig(
             data=data_normalized,
             pred=pre_len,
             seq=seq_len,
-            path="models/timexer/day",
-            model_path=None
+            path=model_dir,
+            model_path=None,
+            callbacks=callbacks,
+            fine_tune=fine_tune,
+            fine_tune_epochs=fine_tune_config.get('epochs', 5),
+            fine_tune_lr=fine_tune_config.get('learning_rate', 0.003),
+            resources=TrainingResourcesConfig.from_config(read_config.get('training')),
+            hparams=hparams,
         )
         model = ModelFactory.get_model("TimeXer", config=timxer_config)
         print(model)
         model.train()
 
-        #Upload model lên S3
+        #Upload model lên S3 (trước khi export để lỗi export không làm mất checkpoint vừa train)
         s3_saver = SaverFactory.create_data_saver(
             "s3", aws_access_key_id=os.getenv("Aws_access_key_id"), 
             aws_secret_access_key=os.getenv("Aws_secret_access_key"), 
             bucket_name="crypto-ai-prediction")
         s3_saver.save_data(file_path=f"models/timexer/day/timexer_pred_{pre_len}.ckpt")
 
+        # Export graph TorchScript/ONNX + spec để serve không cần lightning.
+        # Không bắt buộc: lỗi export (vd: seq_len <= 20 => target dùng GroupNormalizer) chỉ được báo trong kết quả,
+        # lúc serve sẽ tự dùng checkpoint lightning vì không có graph đã kiểm tra.
+        from src.models_lib.timexer_export import export_timexer
+        quantization = read_config.get('quantization', {})
+        try:
+            exported = export_timexer(
+                checkpoint_path=model.checkpoint_file,
+                dataset_path=model.dataset_file,
+                out_prefix=f"{model_dir}/timexer_pred_{pre_len}",
+                time_origin=model.time_origin,
+                formats=read_config.get('export_formats', ["torchscript", "onnx"]),
+                # Bản int8 chỉ được giữ nếu không làm MAE trên các cửa sổ cuối (holdout) tăng quá ngưỡng
+                quantize=quantization.get('enabled', False),
+                # holdout cũng dùng để so graph export với lightning trước khi cho phép serve
+                holdout=data_normalized,
+                max_mae_increase=quantization.get('max_mae_increase', 0.02),
+                holdout_per_symbol=quantization.get('holdout_windows', 30),
+            )
+            print(f"Exported inference graphs: {exported}")
+            for file_path in exported.values():
+                s3_saver.save_data(file_path=file_path)
+            export_status = {"files": exported}
+        except Exception as e:
+            print(f"Export failed, serving will use the lightning checkpoint: {e}")
+            export_status = {"error": str(e)}
+            # Ghi đè spec của lần export trước để graph cũ không được serve cùng checkpoint mới
+            spec_path = f"{model_dir}/timexer_pred_{pre_len}.json"
+            with open(spec_path, "w") as f:
+                json.dump({"error": str(e), "equivalence": None}, f)
+            s3_saver.save_data(file_path=spec_path)
+
         # tra kết quả về cho model
         return {
             "model_name": f"timexer_pred_{pre_len}",
-            "status": "success"
+            "status": "success",
+            "export": export_status,
         }
     except Exception as e:
         print(f"Error: {e}")
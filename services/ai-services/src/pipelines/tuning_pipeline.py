@@ -0,0 +1,69 @@
+# tuning_pipeline.py
+
+import argparse
+from src.data.loader.lake_loader import LakeLoader
+from src.data.loader.data_loader_service import DataLoaderService
+from src.features.engineer_factory import FeatureEngineerFactory
+from src.utils.normalizer import Normalizer
+from src.pipelines.training_pipeline import history_start, sync_market_data
+from src.services.tuning_service import HyperparameterTuner, TuningConfig, results_path
+from src.utils.config import load_config
+
+
+def run_tuning_pipeline(datatype: str = '1d', pre_len: int = 7, seq_len: int = 60, n_trials: int = None, n_workers: int = None):
+    """
+    Tuning hyperparameter TimeXer: chuẩn bị dữ liệu/dataset 1 lần rồi chạy các trial song song (offline trên 1 máy).
+    Bộ tham số tốt nhất được lưu vào artifacts/tuning và được run_training_pipeline dùng cho các lần train sau.
+
+    Args:
+        datatype (str): Tần suất dữ liệu ('1h', '1d'...).
+        pre_len (int): Prediction length.
+        seq_len (int): Sequence length.
+        n_trials (int): Ghi đè tuning.n_trials trong config.
+        n_workers (int): Ghi đè tuning.n_workers trong config.
+    """
+    print("=============================================")
+    print("🔎 STARTING TUNING PIPELINE...")
+    print(f"Params: DataType='{datatype}', PredictionLength={pre_len}, SequenceLength={seq_len}")
+    print("=============================================")
+
+    read_config = load_config()
+    config = TuningConfig.from_config(read_config.get('tuning'))
+    if n_trials is not None:
+        config.n_trials = n_trials
+    if n_workers is not None:
+        config.n_workers = n_workers
+
+    print("\n Loading data...")
+    lake_root = sync_market_data(read_config, datatype)
+    data = DataLoaderService(LakeLoader(lake_root, symbols=read_config['coins'], interval=datatype, start=history_start(pre_len))).load_data()
+    if data.empty:
+        raise ValueError("No market data available for tuning")
+
+    print("\n Engineering features...")
+    engineer = FeatureEngineerFactory.from_config(read_config['fe'])
+    data_processed = engineer.transform(data)
+    norm = Normalizer(method="standard", per_symbol=True, columns=read_config['numeric_cols'])
+    data_normalized = norm.fit_transform(data_processed)
+
+    # Import torch/pytorch_forecasting chỉ khi thật sự tuning
+    from src.models_lib.timexer import TimeXerModel
+    datasets = TimeXerModel.build_datasets(data_normalized.reset_index(drop=False), seq=seq_len, pred=pre_len)
+
+    print(f"\n Running {config.n_trials} trials on {config.workers()} workers...")
+    summary = HyperparameterTuner(config).run(datasets, datatype=datatype, pre_len=pre_len, seq_len=seq_len)
+    print(f"Trials: {summary['counts']}")
+    print(f"Best: {summary['best']}")
+    print(f"Results saved to {results_path(datatype, pre_len, seq_len)}")
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--datatype", default="1d")
+    parser.add_argument("--pre-len", type=int, default=7)
+    parser.add_argument("--seq-len", type=int, default=60)
+    parser.add_argument("--trials", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    run_tuning_pipeline(args.datatype, args.pre_len, args.seq_len, n_trials=args.trials, n_workers=args.workers)
@@ -1,13 +1,22 @@
 import logging
 import asyncio
+import json
 from datetime import datetime
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
-from ..models.schemas import PredictionResult, PredictionResponse, TrainingResponse
+from typing import AsyncIterator, List, Dict, Any, Optional
+from ..models.schemas import PredictionResult, PredictionResponse, TrainingResponse, TrainingJobStatus
+from .training_jobs import training_job_manager
+from .executors import BoundedExecutor, ExecutorSaturated, get_executor
 
 logger = logging.getLogger(__name__)
 
 class AIService:
+    @staticmethod
+    def executor_for(model_name: str) -> BoundedExecutor:
+        """TimeGPT chỉ gọi API ngoài; TimeXer/Ensemble chạy model trên CPU."""
+        return get_executor("remote" if model_name == "TimeGPT" else "inference")
+
     @staticmethod
     async def run_prediction(
         model_name: str,
@@ -18,24 +27,22 @@ class AIService:
         try:
             logger.info(f"Running prediction for {symbol} with model {model_name}")
             
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            result_df = await loop.run_in_executor(
-                None,
+            # Chạy trong executor riêng của lớp workload (giới hạn số task chạy/chờ)
+            result_df = await AIService.executor_for(model_name).run(
                 AIService._run_prediction_sync,
                 model_name, symbol, pred_length, datatype
             )
             
-            # Convert DataFrame to response
-            predictions = []
-            for _, row in result_df.iterrows():
-                predictions.append(
-                    PredictionResult(
-                        timestamp=row['timestamp'],
-                        close=float(row['close']),
-                        symbol=row.get('symbol', symbol)
-                    )
+            # Convert DataFrame to response (đọc thẳng các cột, không iterrows)
+            symbols = result_df['symbol'] if 'symbol' in result_df.columns else [symbol] * len(result_df)
+            predictions = [
+                PredictionResult(timestamp=timestamp, close=close, symbol=row_symbol)
+                for timestamp, close, row_symbol in zip(
+                    result_df['timestamp'].tolist(),
+                    result_df['close'].to_numpy(dtype=np.float64).tolist(),
+                    symbols
                 )
+            ]
             
             return PredictionResponse(
                 success=True,
@@ -43,6 +50,8 @@ class AIService:
                 data=predictions
             )
             
+        except ExecutorSaturated:
+            raise
         except Exception as e:
             logger.error(f"Prediction failed: {str(e)}")
             return PredictionResponse(
@@ -51,6 +60,71 @@ class AIService:
                 data=[]
             )
     
+    @staticmethod
+    async def stream_predictions(
+        model_name: str,
+        symbols: List[str],
+        pred_length: int,
+        datatype: str
+    ) -> AsyncIterator[dict]:
+        """
+        Chạy dự đoán cho từng symbol song song và trả về từng kết quả ngay khi symbol đó xong
+        (symbol nhanh không phải chờ symbol chậm nhất). Các request TimeXer chạy cùng lúc còn được
+        micro-batching gom thành ít forward pass hơn. Cả stream được nhận hoặc từ chối cùng lúc: nếu executor
+        không còn đủ chỗ cho mọi symbol thì mỗi symbol trả về 1 event lỗi.
+        """
+        executor = AIService.executor_for(model_name)
+        symbols = list(dict.fromkeys(symbols))
+        try:
+            reservation = executor.reserve(len(symbols))
+        except ExecutorSaturated as e:
+            for symbol in symbols:
+                yield {"symbol": symbol, "success": False, "message": str(e)}
+            return
+
+        async def predict_symbol(symbol: str):
+            try:
+                result_df = await executor.run(
+                    AIService._run_prediction_sync,
+                    model_name, symbol, pred_length, datatype,
+                    reservation=reservation
+                )
+                return AIService.forecast_payload(symbol, result_df)
+            except ExecutorSaturated as e:
+                return {"symbol": symbol, "success": False, "message": str(e)}
+            except Exception as e:
+                logger.error(f"Prediction failed for {symbol}: {str(e)}")
+                return {"symbol": symbol, "success": False, "message": f"Prediction failed: {str(e)}"}
+
+        with reservation:
+            tasks = [asyncio.ensure_future(predict_symbol(symbol)) for symbol in symbols]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+            finally:
+                # Client ngắt kết nối: không chờ các symbol còn lại (task đang chạy trong executor vẫn chạy nốt,
+                # task chưa chạy bị huỷ), chỗ giữ trước chưa dùng được trả lại khi thoát `with`
+                for task in tasks:
+                    task.cancel()
+
+    @staticmethod
+    def forecast_payload(symbol: str, result_df: pd.DataFrame) -> dict:
+        """Kết quả 1 symbol dạng cột (timestamp ISO, close) dựng thẳng từ mảng NumPy."""
+        timestamps = pd.to_datetime(result_df['timestamp']).to_numpy(dtype='datetime64[s]')
+        return {
+            "symbol": symbol,
+            "success": True,
+            "timestamp": np.datetime_as_string(timestamps).tolist(),
+            "close": result_df['close'].to_numpy(dtype=np.float64).tolist(),
+        }
+
+    @staticmethod
+    def encode_stream_event(payload: dict, fmt: str = "ndjson") -> str:
+        line = json.dumps(payload, separators=(",", ":"))
+        if fmt == "sse":
+            return f"event: {'forecast' if 'symbol' in payload else 'done'}\ndata: {line}\n\n"
+        return line + "\n"
+
     @staticmethod
     def _run_prediction_sync(model_name: str, symbol: str, pred_length: int, datatype: str):
         """Run prediction synchronously"""
@@ -60,7 +134,7 @@ class AIService:
             return prediction_pipeline(
                 model_name=model_name,
                 symbol=symbol,
-                pred_length=pred_length,
+                pred_len=pred_length,
                 datatype=datatype
             )
         except ImportError as e:
@@ -80,46 +154,36 @@ class AIService:
     async def run_training(
         datatype: str,
         pre_len: int,
-        seq_len: int
+        seq_len: int,
+        fine_tune: bool = False
     ) -> TrainingResponse:
         try:
-            logger.info(f"Starting training with datatype={datatype}, pre_len={pre_len}, seq_len={seq_len}")
-            
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                AIService._run_training_sync,
-                datatype, pre_len, seq_len
-            )
-            
+            logger.info(f"Starting training with datatype={datatype}, pre_len={pre_len}, seq_len={seq_len}, fine_tune={fine_tune}")
+
+            # Chỉ đưa job vào pool process training rồi trả về ngay, không chờ train xong
+            job, created = training_job_manager.submit(datatype=datatype, pre_len=pre_len, seq_len=seq_len, fine_tune=fine_tune)
+
             return TrainingResponse(
                 success=True,
-                message="Training completed successfully",
-                model_path=f"models/timexer/day/timexer_pred_{pre_len}.ckpt"
+                message="Training job submitted" if created else "Identical training job already in progress",
+                job_id=job.job_id,
+                status=job.status
             )
-            
+
+        except ExecutorSaturated:
+            raise
         except Exception as e:
             logger.error(f"Training failed: {str(e)}")
             return TrainingResponse(
                 success=False,
                 message=f"Training failed: {str(e)}"
             )
-    
+
     @staticmethod
-    def _run_training_sync(datatype: str, pre_len: int, seq_len: int):
-        """Run training synchronously"""
-        try:
-            # Import and use existing training pipeline
-            from ..pipelines.training_pipeline import run_training_pipeline
-            
-            run_training_pipeline(
-                datatype=datatype,
-                pre_len=pre_len,
-                seq_len=seq_len
-            )
-        except ImportError as e:
-            logger.warning(f"Failed to import training pipeline: {e}")
-            # Simulate training
-            import time
-            time.sleep(2)  # Simulate training time
\ No newline at end of file
+    def get_training_job(job_id: str) -> Optional[TrainingJobStatus]:
+        job = training_job_manager.get(job_id)
+        return TrainingJobStatus(**job.to_dict()) if job else None
+
+    @staticmethod
+    def list_training_jobs() -> List[TrainingJobStatus]:
+        return [TrainingJobStatus(**job.to_dict()) for job in training_job_manager.list()]
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+import numpy as np
+from src.utils.config import load_config
+
+logger = logging.getLogger(__name__)
+
+# Lớp workload -> cấu hình mặc định (ghi đè bằng mục `executors` trong main_config.yaml)
+DEFAULT_EXECUTORS = {
+    # Gọi API ngoài (TimeGPT): chủ yếu chờ mạng, nhiều thread cũng không tốn CPU
+    "remote": {"max_workers": 16, "max_queue": 64},
+    # Dự đoán TimeXer/Ensemble trên CPU: ít worker, mỗi worker giới hạn số thread torch
+    "inference": {"max_workers": 4, "max_queue": 32, "threads_per_worker": None},
+}
+
+
+class ExecutorSaturated(Exception):
+    """Executor đã đủ số task đang chạy + chờ: request bị từ chối (HTTP 429) thay vì xếp hàng vô hạn."""
+    def __init__(self, name: str, retry_after: int = 1):
+        super().__init__(f"{name} executor is saturated, retry later")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Thread pool riêng cho 1 lớp workload:
+    - tối đa max_workers task chạy cùng lúc và max_queue task chờ, quá thì run() raise ExecutorSaturated;
+    - threads_per_worker: giới hạn số thread intra-op của torch khi chạy task (torch.set_num_threads áp dụng
+      cho cả process, nên đặt = số core / số worker inference để các worker không tranh core);
+    - đo thời gian chờ trong hàng đợi và thời gian chạy của từng task.
+    """
+    def __init__(self, name: str, max_workers: int, max_queue: int, threads_per_worker: Optional[int] = None, window: int = 1000):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.threads_per_worker = threads_per_worker
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-executor")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._torch_pinned = False
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        # Thời gian (giây) của các task gần nhất để tính percentile
+        self._queue_wait = deque(maxlen=window)
+        self._run_time = deque(maxlen=window)
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def saturated(self, slots: int = 1) -> bool:
+        with self._lock:
+            return self._pending + slots > self.capacity
+
+    def reserve(self, slots: int) -> "_Reservation":
+        """
+        Giữ trước `slots` chỗ (chạy + chờ) cho 1 nhóm task được nhận hoặc từ chối cùng lúc (vd: 1 stream nhiều symbol);
+        raise ExecutorSaturated nếu không đủ chỗ. Các task chạy bằng run(..., reservation=...) dùng dần các chỗ này,
+        chỗ chưa dùng được trả lại khi đóng reservation (dùng như context manager).
+        """
+        with self._lock:
+            if self._pending + slots > self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated(self.name)
+            self._pending += slots
+        return _Reservation(self, slots)
+
+    def _release(self, reservation: "_Reservation"):
+        with self._lock:
+            self._pending -= reservation.remaining
+            reservation.remaining = 0
+
+    async def run(self, fn: Callable, *args, reservation: Optional["_Reservation"] = None):
+        with self._lock:
+            if reservation is not None:
+                # Dùng 1 chỗ đã giữ trước thay vì xin chỗ mới
+                if reservation.remaining <= 0:
+                    raise RuntimeError(f"{self.name} executor reservation has no slot left")
+                reservation.remaining -= 1
+            elif self._pending >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated(self.name)
+            else:
+                self._pending += 1
+            self.submitted += 1
+        enqueued = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            self._pin_torch_threads()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._running -= 1
+                    self._queue_wait.append(started - enqueued)
+                    self._run_time.append(finished - started)
+
+        def on_done(future):
+            # Trả chỗ khi task thật sự xong (hoặc bị huỷ trước khi chạy), không phải khi coroutine chờ nó bị huỷ:
+            # client ngắt kết nối thì task đang chạy vẫn chiếm worker cho tới khi chạy xong
+            with self._lock:
+                self._pending -= 1
+                if future.cancelled():
+                    return
+                if future.exception() is not None:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+
+        future = self._executor.submit(task)
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def _pin_torch_threads(self):
+        # torch được import lười ở lần dự đoán đầu tiên => đặt số thread ngay khi thấy torch đã được load
+        if self.threads_per_worker is None or self._torch_pinned or "torch" not in sys.modules:
+            return
+        torch = sys.modules["torch"]
+        if torch.get_num_threads() != self.threads_per_worker:
+            torch.set_num_threads(self.threads_per_worker)
+        self._torch_pinned = True
+
+    def metrics(self) -> dict:
+        with self._lock:
+            queue_wait = np.array(self._queue_wait) * 1000
+            run_time = np.array(self._run_time) * 1000
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "queue_wait_ms": summarize_latencies(queue_wait),
+                "run_time_ms": summarize_latencies(run_time),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _Reservation:
+    """Các chỗ giữ trước trong BoundedExecutor (xem BoundedExecutor.reserve)."""
+    def __init__(self, executor: BoundedExecutor, slots: int):
+        self._executor = executor
+        self.remaining = slots
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._executor._release(self)
+
+
+def summarize_latencies(values: np.ndarray) -> dict:
+    """count/mean/p50/p95/p99/max của các thời gian đo được (cùng đơn vị với values)."""
+    if len(values) == 0:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": int(len(values)), "mean": float(values.mean()), "p50": float(p50), "p95": float(p95),
+            "p99": float(p99), "max": float(values.max())}
+
+
+_EXECUTORS: Dict[str, BoundedExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Executor của lớp workload `name`, tạo lần đầu theo mục `executors` trong config."""
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.get(name)
+        if executor is None:
+            config = {**DEFAULT_EXECUTORS[name], **(load_config().get("executors", {}).get(name) or {})}
+            threads = config.get("threads_per_worker")
+            if "threads_per_worker" in config and threads is None:
+                threads = max(1, (os.cpu_count() or 1) // config["max_workers"])
+            executor = _EXECUTORS[name] = BoundedExecutor(name, config["max_workers"], config["max_queue"], threads)
+            logger.info(f"Created {name} executor: max_workers={executor.max_workers}, max_queue={executor.max_queue}, "
+                        f"threads_per_worker={executor.threads_per_worker}")
+        return executor
+
+
+def validate_batching(config: dict) -> None:
+    """
+    Kiểm tra lúc khởi động: mỗi request dự đoán giữ 1 worker inference trong suốt lúc fetch, tính feature và chờ
+    micro-batch (MicroBatcher.submit chặn thread), nên 1 batch không bao giờ có nhiều hơn
+    executors.inference.max_workers item. max_batch_size lớn hơn thì batch không bao giờ đầy và leader luôn
+    phải chờ hết max_wait_ms.
+    """
+    max_batch_size = ((config.get("serving") or {}).get("batching") or {}).get("max_batch_size", 1)
+    inference = {**DEFAULT_EXECUTORS["inference"], **((config.get("executors") or {}).get("inference") or {})}
+    if max_batch_size > inference["max_workers"]:
+        raise ValueError(f"serving.batching.max_batch_size ({max_batch_size}) must not exceed "
+                         f"executors.inference.max_workers ({inference['max_workers']})")
+
+
+def executor_metrics() -> dict:
+    with _EXECUTORS_LOCK:
+        executors = dict(_EXECUTORS)
+    return {name: executor.metrics() for name, executor in executors.items()}
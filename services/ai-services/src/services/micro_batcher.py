@@ -0,0 +1,76 @@
+import threading
+from typing import Any, Callable, List, Optional
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: Optional[list] = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Gom các request đồng thời thành 1 lần chạy batch (vd. 1 forward pass TimeXer cho nhiều symbol).
+
+    Thread gửi item đầu tiên của batch là "leader": nó chờ tối đa `max_wait_ms` (hoặc tới khi đủ
+    `max_batch_size` item), rồi tự chạy run_batch cho cả batch và trả kết quả về từng thread đang chờ.
+    Không cần thread nền riêng; khi chỉ có 1 request thì độ trễ tăng thêm tối đa max_wait_ms.
+
+    run_batch nhận list item, trả về list kết quả cùng thứ tự; 1 phần tử là Exception thì chỉ request
+    tương ứng bị lỗi, lỗi raise từ run_batch thì cả batch bị lỗi.
+    """
+    def __init__(self, run_batch: Callable[[List[Any]], List[Any]], max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._lock = threading.Lock()
+        self._pending: Optional[_Batch] = None
+        # Thống kê cho log/benchmark
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: Any) -> Any:
+        """Chặn tới khi batch chứa item chạy xong; trả về kết quả của item (hoặc raise lỗi của batch)."""
+        with self._lock:
+            batch = self._pending
+            leader = batch is None
+            if leader:
+                batch = self._pending = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch_size:
+                self._pending = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._pending is batch:
+                    self._pending = None
+            self._run(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        result = batch.results[index]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def _run(self, batch: _Batch):
+        try:
+            results = self.run_batch(batch.items)
+            if len(results) != len(batch.items):
+                raise RuntimeError(f"run_batch returned {len(results)} results for {len(batch.items)} items")
+            batch.results = results
+        except BaseException as e:
+            batch.error = e
+        finally:
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch.items)
+            batch.done.set()
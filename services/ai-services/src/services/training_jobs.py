@@ -0,0 +1,245 @@
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+import numpy as np
+from .executors import ExecutorSaturated, summarize_latencies
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    datatype: str
+    pre_len: int
+    seq_len: int
+    fine_tune: bool = False
+    status: str = QUEUED
+    epoch: Optional[int] = None
+    max_epochs: Optional[int] = None
+    val_loss: Optional[float] = None
+    message: Optional[str] = None
+    model_path: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def key(self) -> Tuple[str, int, int, bool]:
+        return (self.datatype, self.pre_len, self.seq_len, self.fine_tune)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class QueueProgress:
+    """
+    Hàm `report` cho ProgressReporter: đẩy tiến độ của 1 job vào progress_queue.
+    Là class ở mức module (không phải lambda) để pickle được khi Lightning spawn process DDP (ddp_spawn).
+    """
+    def __init__(self, progress_queue, job_id: str):
+        self.progress_queue = progress_queue
+        self.job_id = job_id
+
+    def __call__(self, **progress):
+        self.progress_queue.put((self.job_id, progress))
+
+
+def _run_training_job(job_id: str, datatype: str, pre_len: int, seq_len: int, fine_tune: bool, progress_queue) -> dict:
+    """
+    Chạy trong process con của pool: training thật + đẩy tiến độ về process API qua progress_queue.
+    Import nặng (torch, lightning...) chỉ xảy ra ở đây, không ở process API.
+    """
+    progress_queue.put((job_id, {"status": RUNNING, "started_at": datetime.now()}))
+
+    from src.models_lib.callbacks import ProgressReporter
+    from src.pipelines.training_pipeline import run_training_pipeline
+
+    reporter = ProgressReporter(QueueProgress(progress_queue, job_id))
+    return run_training_pipeline(datatype=datatype, pre_len=pre_len, seq_len=seq_len, callbacks=[reporter], fine_tune=fine_tune)
+
+
+class TrainingJobManager:
+    """
+    Quản lý job training chạy nền trong pool process riêng:
+    - submit trả về job ngay, không giữ request HTTP trong lúc train;
+    - tối đa `max_workers` job chạy cùng lúc, các job còn lại xếp hàng (status "queued");
+    - request trùng (datatype, pre_len, seq_len, fine_tune) với job đang chờ/chạy dùng lại job đó;
+    - artifact (checkpoint, hparams, export) chỉ được đặt tên theo pre_len nên các job khác tham số nhưng cùng
+      pre_len chạy tuần tự: job sau chỉ được đưa vào pool khi job trước của pre_len đó đã xong;
+    - đã có `max_queue` job chờ thì từ chối job mới (ExecutorSaturated => HTTP 429);
+    - tiến độ (epoch, val_loss) được worker gửi qua queue và cập nhật vào trạng thái job;
+    - process train bị kill (vd: OOM) làm pool hỏng (BrokenProcessPool): các job của pool đó và các job đang chờ
+      bị đánh dấu failed, job mới chạy trên pool được tạo lại.
+    `run_job` là hàm chạy trong process con (mặc định _run_training_job), phải pickle được.
+    """
+    def __init__(self, max_workers: int = 1, max_history: int = 100, max_queue: int = 4, run_job: Callable = _run_training_job):
+        self.max_workers = max_workers
+        self.run_job = run_job
+        self.max_history = max_history
+        self.max_queue = max_queue
+        self.rejected = 0
+        self._jobs = OrderedDict()
+        # pre_len -> các job đang chờ job trước cùng pre_len chạy xong
+        self._waiting = {}
+        # RLock: done-callback có thể chạy ngay trong thread gọi submit nếu future đã xong
+        self._lock = threading.RLock()
+        self._executor = None
+        self._progress_queue = None
+
+    def _ensure_started(self):
+        if self._executor is not None:
+            return
+        # spawn: process con không kế thừa trạng thái thread/torch của process API
+        context = multiprocessing.get_context("spawn")
+        if self._progress_queue is None:
+            # Queue tiến độ nằm trong process Manager riêng nên vẫn dùng được khi pool phải tạo lại
+            self._progress_queue = context.Manager().Queue()
+            threading.Thread(target=self._drain_progress, daemon=True).start()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            # Mỗi process chỉ train 1 job rồi thoát để trả lại bộ nhớ của torch
+            max_tasks_per_child=1,
+        )
+
+    def submit(self, datatype: str, pre_len: int, seq_len: int, fine_tune: bool = False) -> Tuple[TrainingJob, bool]:
+        """
+        Đưa job vào hàng đợi. Trả về (job, created); created=False nếu đã có job giống hệt đang chờ/chạy.
+        """
+        with self._lock:
+            self._ensure_started()
+            for job in self._jobs.values():
+                if job.key == (datatype, pre_len, seq_len, fine_tune) and job.status in ACTIVE_STATUSES:
+                    return job, False
+            if sum(job.status == QUEUED for job in self._jobs.values()) >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated("training", retry_after=60)
+
+            busy = any(job.pre_len == pre_len and job.status in ACTIVE_STATUSES for job in self._jobs.values())
+            job = TrainingJob(job_id=uuid.uuid4().hex, datatype=datatype, pre_len=pre_len, seq_len=seq_len, fine_tune=fine_tune)
+            self._jobs[job.job_id] = job
+            self._evict_finished()
+
+            if busy:
+                self._waiting.setdefault(pre_len, deque()).append(job)
+            else:
+                self._start(job)
+        logger.info(f"Submitted training job {job.job_id} (datatype={datatype}, pre_len={pre_len}, seq_len={seq_len}, fine_tune={fine_tune}"
+                    f"{', waiting for the running job with the same pre_len' if busy else ''})")
+        return job, True
+
+    def _start(self, job: TrainingJob):
+        """Đưa job vào pool process; gọi khi đang giữ self._lock."""
+        self._ensure_started()
+        try:
+            future = self._executor.submit(self.run_job, job.job_id, job.datatype, job.pre_len, job.seq_len, job.fine_tune, self._progress_queue)
+        except BrokenProcessPool as e:
+            self._drop_broken_pool(job, e)
+            return
+        future.add_done_callback(lambda f, job_id=job.job_id: self._on_done(job_id, f))
+
+    def _drop_broken_pool(self, job: TrainingJob, error: Exception):
+        """
+        Pool hỏng vì 1 process con chết đột ngột: đánh dấu failed job không đưa vào pool được và mọi job đang chờ
+        (nếu không chúng ở trạng thái queued mãi, vẫn bị tính vào max_queue và dedup), bỏ pool để lần submit
+        sau _ensure_started tạo pool mới. Gọi khi đang giữ self._lock.
+        """
+        logger.error(f"Training process pool is broken, recreating it on the next submit: {error}")
+        failed = [job] + [waiting_job for waiting in self._waiting.values() for waiting_job in waiting]
+        self._waiting.clear()
+        for failed_job in failed:
+            failed_job.status = FAILED
+            failed_job.message = f"Training process pool broke (a training process was killed, e.g. out of memory): {error}"
+            failed_job.finished_at = datetime.now()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def metrics(self) -> dict:
+        """Số job theo trạng thái + thời gian chờ trong hàng đợi / thời gian train (giây) của các job đã chạy."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            rejected = self.rejected
+        started = [job for job in jobs if job.started_at is not None]
+        finished = [job for job in started if job.finished_at is not None]
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "rejected": rejected,
+            "statuses": {status: sum(job.status == status for job in jobs) for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)},
+            "queue_wait_s": summarize_latencies(np.array([(job.started_at - job.created_at).total_seconds() for job in started])),
+            "run_time_s": summarize_latencies(np.array([(job.finished_at - job.started_at).total_seconds() for job in finished])),
+        }
+
+    def _drain_progress(self):
+        while True:
+            try:
+                job_id, progress = self._progress_queue.get()
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job.status not in ACTIVE_STATUSES:
+                    continue
+                for name, value in progress.items():
+                    setattr(job, name, value)
+
+    def _on_done(self, job_id: str, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.finished_at = datetime.now()
+            try:
+                result = future.result()
+            except Exception as e:
+                job.status, job.message = FAILED, f"Training failed: {e}"
+            else:
+                # run_training_pipeline tự bắt lỗi và trả về {"status": {"error": ...}}
+                if result.get("status") == "success":
+                    job.status, job.message = SUCCEEDED, "Training completed successfully"
+                    job.model_path = f"models/timexer/day/timexer_pred_{job.pre_len}.ckpt"
+                else:
+                    job.status, job.message = FAILED, f"Training failed: {result.get('status')}"
+
+            waiting = self._waiting.get(job.pre_len)
+            if waiting:
+                next_job = waiting.popleft()
+                if not waiting:
+                    del self._waiting[job.pre_len]
+                self._start(next_job)
+        logger.info(f"Training job {job_id} finished with status {job.status}")
+
+    def _evict_finished(self):
+        """Chỉ giữ lại `max_history` job gần nhất (không xoá job đang chờ/chạy)."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+
+training_job_manager = TrainingJobManager(
+    max_workers=int(os.getenv("TRAINING_MAX_WORKERS", "1")),
+    max_queue=int(os.getenv("TRAINING_MAX_QUEUE", "4")),
+)
@@ -0,0 +1,199 @@
+import json
+import logging
+import math
+import multiprocessing
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TUNING_DIR = "artifacts/tuning"
+
+COMPLETED = "completed"
+PRUNED = "pruned"
+FAILED = "failed"
+
+# (training, validation) TimeSeriesDataSet, load 1 lần cho mỗi process worker và chỉ đọc trong các trial
+_DATASETS = None
+
+
+@dataclass
+class TrialResult:
+    trial_id: int
+    params: dict
+    status: str = COMPLETED
+    val_loss: Optional[float] = None
+    epochs: int = 0
+    seconds: float = 0.0
+    message: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class TuningConfig:
+    """Cấu hình tuning (mục `tuning` trong main_config.yaml)."""
+    n_trials: int = 20
+    # Số process chạy trial song song; mỗi trial dùng threads_per_trial thread torch
+    n_workers: int = None
+    threads_per_trial: int = 1
+    max_epochs: int = 30
+    # Pruning: chỉ xét từ epoch warmup_epochs và khi đã có ít nhất min_trials trial khác báo cáo cùng epoch
+    warmup_epochs: int = 3
+    min_trials: int = 3
+    seed: int = 0
+    # Mỗi tham số: list các giá trị rời rạc hoặc {low, high, log} cho giá trị thực
+    search_space: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, config: dict = None) -> "TuningConfig":
+        return cls(**(config or {}))
+
+    def workers(self) -> int:
+        if self.n_workers is not None:
+            return max(1, self.n_workers)
+        return max(1, (os.cpu_count() or 1) // max(1, self.threads_per_trial))
+
+
+def sample_params(search_space: dict, rng: random.Random) -> dict:
+    params = {}
+    for name, space in search_space.items():
+        if isinstance(space, dict):
+            low, high = float(space["low"]), float(space["high"])
+            if space.get("log", False):
+                params[name] = math.exp(rng.uniform(math.log(low), math.log(high)))
+            else:
+                params[name] = rng.uniform(low, high)
+        else:
+            params[name] = rng.choice(list(space))
+    return params
+
+
+def results_path(datatype: str, pre_len: int, seq_len: int) -> str:
+    """Kết quả tuning theo đúng bộ (datatype, pre_len, seq_len) đã dùng để dựng dataset của các trial."""
+    return f"{TUNING_DIR}/timexer_{datatype}_seq{seq_len}_pred_{pre_len}.json"
+
+
+def load_best_hparams(datatype: str, pre_len: int, seq_len: int) -> Optional[dict]:
+    """Hyperparameter tốt nhất của lần tuning gần nhất cho (datatype, pre_len, seq_len) (None nếu chưa tuning)."""
+    path = results_path(datatype, pre_len, seq_len)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        best = json.load(f).get("best")
+    return best["params"] if best else None
+
+
+def _init_worker(datasets_path: str, threads: int):
+    global _DATASETS
+    import torch
+    torch.set_num_threads(threads)
+    with open(datasets_path, "rb") as f:
+        _DATASETS = pickle.load(f)
+
+
+def _run_trial(trial_id: int, params: dict, pre_len: int, seq_len: int, config: TuningConfig, history, lock) -> TrialResult:
+    """Chạy 1 trial trong process worker, dùng lại dataset đã load sẵn của process."""
+    from src.models_lib.callbacks import MedianPruner
+    from src.models_lib.model_config.timexer_config import TimeXerConfig, TrainingResourcesConfig
+    from src.models_lib.timexer import TimeXerModel
+
+    result = TrialResult(trial_id=trial_id, params=params)
+    start = time.perf_counter()
+    trial_dir = tempfile.mkdtemp(prefix=f"timexer_trial_{trial_id}_")
+    try:
+        pruner = MedianPruner(history, lock, warmup_epochs=config.warmup_epochs, min_trials=config.min_trials)
+        model = TimeXerModel(TimeXerConfig(
+            pred=pre_len,
+            seq=seq_len,
+            path=trial_dir,
+            hparams=params,
+            datasets=_DATASETS,
+            max_epochs=config.max_epochs,
+            callbacks=[pruner],
+            resources=TrainingResourcesConfig(num_threads=config.threads_per_trial),
+        ))
+        model.train()
+        best_score = model.trainer.checkpoint_callback.best_model_score
+        result.val_loss = float(best_score) if best_score is not None else None
+        result.epochs = model.trainer.current_epoch + 1
+        result.status = PRUNED if pruner.pruned else COMPLETED
+    except Exception as e:
+        result.status, result.message = FAILED, str(e)
+    finally:
+        shutil.rmtree(trial_dir, ignore_errors=True)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+class HyperparameterTuner:
+    """
+    Random search hyperparameter TimeXer chạy song song nhiều trial trên 1 máy CPU (không cần dịch vụ ngoài):
+    - dataset (training, validation) chỉ chuẩn bị 1 lần, ghi ra file và mỗi process worker load 1 lần rồi dùng chung
+      (chỉ đọc) cho mọi trial nó chạy;
+    - các trial báo val_loss từng epoch vào history dùng chung, trial tệ hơn trung vị ở cùng epoch bị dừng sớm;
+    - kết quả mọi trial và bộ tham số tốt nhất được ghi vào artifacts/tuning/timexer_{datatype}_seq{seq_len}_pred_{pre_len}.json,
+      training pipeline dùng lại bộ tham số tốt nhất này khi train cùng datatype/pre_len/seq_len.
+    """
+    def __init__(self, config: TuningConfig):
+        self.config = config
+
+    def run(self, datasets: tuple, datatype: str, pre_len: int, seq_len: int) -> dict:
+        config = self.config
+        rng = random.Random(config.seed)
+        trials = [(trial_id, sample_params(config.search_space, rng)) for trial_id in range(config.n_trials)]
+
+        context = multiprocessing.get_context("spawn")
+        manager = context.Manager()
+        history, lock = manager.dict(), manager.Lock()
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            datasets_path = os.path.join(tmp, "datasets.pkl")
+            with open(datasets_path, "wb") as f:
+                pickle.dump(datasets, f)
+
+            with ProcessPoolExecutor(
+                max_workers=min(config.workers(), len(trials)) or 1,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(datasets_path, config.threads_per_trial),
+            ) as executor:
+                futures = [
+                    executor.submit(_run_trial, trial_id, params, pre_len, seq_len, config, history, lock)
+                    for trial_id, params in trials
+                ]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    logger.info(f"Trial {result.trial_id} {result.status}: val_loss={result.val_loss} "
+                                f"epochs={result.epochs} ({result.seconds:.0f}s) params={result.params}")
+        manager.shutdown()
+
+        results.sort(key=lambda r: r.trial_id)
+        summary = self._summarize(results, datatype, pre_len, seq_len)
+        os.makedirs(TUNING_DIR, exist_ok=True)
+        with open(results_path(datatype, pre_len, seq_len), "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    def _summarize(self, results: list, datatype: str, pre_len: int, seq_len: int) -> dict:
+        completed = [r for r in results if r.status == COMPLETED and r.val_loss is not None]
+        best = min(completed, key=lambda r: r.val_loss) if completed else None
+        return {
+            "model_name": f"timexer_pred_{pre_len}",
+            "datatype": datatype,
+            "pre_len": pre_len,
+            "seq_len": seq_len,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "best": best.to_dict() if best else None,
+            "counts": {status: sum(r.status == status for r in results) for status in (COMPLETED, PRUNED, FAILED)},
+            "trials": [r.to_dict() for r in results],
+        }
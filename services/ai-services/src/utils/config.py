@@ -0,0 +1,20 @@
+import copy
+import os
+from functools import lru_cache
+import yaml
+
+CONFIG_PATH = "configs/main_config.yaml"
+
+
+@lru_cache(maxsize=None)
+def _read_config(path: str) -> dict:
+    with open(path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """
+    main_config.yaml đã parse: mỗi process chỉ đọc + parse file 1 lần, các lần sau dùng cache.
+    Trả về bản copy nên caller có thể sửa dict mà không ảnh hưởng cache.
+    """
+    return copy.deepcopy(_read_config(os.path.abspath(path)))
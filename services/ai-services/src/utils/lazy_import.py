@@ -0,0 +1,10 @@
+import importlib
+
+
+def import_object(path: str):
+    """
+    'package.module:Name' -> object Name, chỉ import module ở lần dùng đầu tiên
+    (các factory dùng để không kéo torch, lightning, nixtla, binance... vào lúc khởi động).
+    """
+    module_name, _, name = path.partition(":")
+    return getattr(importlib.import_module(module_name), name)
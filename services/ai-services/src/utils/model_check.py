@@ -1,13 +1,11 @@
-import yaml
 import requests
+from src.utils.config import load_config
 
-CONFIG_PATH = "configs/main_config.yaml"
 MODEL_PATH = "models/timexer/day/"
 
 
 def check_model_exists(model_name: str, pred_len: int) -> bool:
-    with open(CONFIG_PATH, "r") as f:
-        config = yaml.safe_load(f)
+    config = load_config()
     model_name = "timexer" #to testing
     url = f"{config['cloudfront_url']}{MODEL_PATH}{model_name}_pred_{pred_len}.ckpt"
     print(f"Checking model at URL: {url}")
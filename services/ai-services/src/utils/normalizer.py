@@ -1,7 +1,17 @@
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
+
+GLOBAL_KEY = "global"
+
 
 class Normalizer:
+    """
+    Chuẩn hoá theo từng symbol (hoặc toàn bộ dataset) bằng ma trận tham số (n_symbols x n_columns):
+    x' = (x - offset) / scale, với offset/scale là mean/std ("standard") hoặc min/(max - min) ("minmax").
+    Mỗi lần transform chỉ là 1 phép broadcast qua mảng mã symbol, không tạo scaler sklearn cho từng cặp (symbol, cột).
+
+    File pkl cũ (lưu dict `scalers` của sklearn) vẫn load được, xem __setstate__.
+    """
     def __init__(self, method="standard", per_symbol=True, columns=None):
         """
         Parameters
@@ -14,72 +24,129 @@ class Normalizer:
         columns : list[str] | None
             Các cột numeric cần scale.
         """
+        if method not in ("standard", "minmax"):
+            raise ValueError(f"Unsupported normalization method: {method}")
         self.method = method
         self.per_symbol = per_symbol
-        self.columns = columns
-        self.scalers = {}
+        self.columns = list(columns) if columns is not None else []
+        self.keys = []
+        self.offset_ = np.zeros((0, len(self.columns)))
+        self.scale_ = np.ones((0, len(self.columns)))
 
-    def _get_scaler(self):
+    def fit(self, df, group_col="symbol"):
+        cols = self._fit_columns(df, group_col)
+        values = df[cols].to_numpy(dtype=np.float64)
+        if self._use_groups(df, group_col):
+            codes, keys = pd.factorize(df[group_col], sort=True)
+        else:
+            codes, keys = np.zeros(len(df), dtype=np.int64), [GLOBAL_KEY]
+
+        grouped = pd.DataFrame(values).groupby(codes)
         if self.method == "standard":
-            return StandardScaler()
-        elif self.method == "minmax":
-            return MinMaxScaler()
+            offset = grouped.mean().to_numpy(copy=True)
+            scale = grouped.std(ddof=0).to_numpy(copy=True)
         else:
-            raise ValueError(f"Unsupported normalization method: {self.method}")
+            offset = grouped.min().to_numpy(copy=True)
+            scale = grouped.max().to_numpy() - offset
+        # Giống sklearn: scale = 0 (cột hằng) thì giữ nguyên 1 để tránh chia cho 0
+        scale[(scale == 0) | np.isnan(scale)] = 1.0
+        offset[np.isnan(offset)] = 0.0
+
+        # Cột không có trong df lúc fit giữ tham số đồng nhất (không scale)
+        col_idx = [self.columns.index(c) for c in cols]
+        self.keys = list(keys)
+        self.offset_ = np.zeros((len(self.keys), len(self.columns)))
+        self.scale_ = np.ones((len(self.keys), len(self.columns)))
+        self.offset_[:, col_idx] = offset
+        self.scale_[:, col_idx] = scale
+        return self
 
     def fit_transform(self, df, group_col="symbol"):
-        df = df.copy()
-        if self.per_symbol and group_col in df.columns:
-            self.scalers = {}
-            for key, sub_df in df.groupby(group_col):
-                self.scalers[key] = {}
-                for col in self.columns:
-                    if col in sub_df.columns:
-                        scaler = self._get_scaler()
-                        values = scaler.fit_transform(sub_df[[col]]).ravel()
-                        df.loc[sub_df.index, col] = pd.Series(values, index=sub_df.index)
-                        self.scalers[key][col] = scaler
-        else:
-            scaler = self._get_scaler()
-            values = scaler.fit_transform(df[self.columns])
-            df[self.columns] = values
-            self.scalers["global"] = scaler
-        return df
+        return self.fit(df, group_col).transform(df, group_col)
 
     def transform(self, df, group_col="symbol"):
-        df = df.copy()
-        if self.per_symbol and group_col in df.columns:
-            for key, sub_df in df.groupby(group_col):
-                scalers_for_symbol = self.scalers.get(key)
-                if scalers_for_symbol:
-                    for col in self.columns:
-                        if col in sub_df.columns and col in scalers_for_symbol:
-                            scaler = scalers_for_symbol[col]
-                            values = scaler.transform(sub_df[[col]]).ravel()
-                            df.loc[sub_df.index, col] = pd.Series(values, index=sub_df.index)
-        else:
-            scaler = self.scalers.get("global")
-            if scaler:
-                values = scaler.transform(df[self.columns])
-                df[self.columns] = values
-        return df
+        return self._apply(df, group_col, inverse=False)
 
     def inverse_transform(self, df, group_col="symbol"):
+        return self._apply(df, group_col, inverse=True)
+
+    def _apply(self, df, group_col, inverse):
         df = df.copy()
-        available_cols = [c for c in self.columns if c in df.columns]
-
-        if self.per_symbol and group_col in df.columns:
-            for key, sub_df in df.groupby(group_col):
-                scalers_for_symbol = self.scalers.get(key)
-                if scalers_for_symbol:
-                    for col in available_cols:
-                        if col in scalers_for_symbol:
-                            scaler = scalers_for_symbol[col]
-                            values = scaler.inverse_transform(sub_df[[col]]).ravel()
-                            df.loc[sub_df.index, col] = pd.Series(values, index=sub_df.index)
+        cols = [c for c in self.columns if c in df.columns]
+        if not cols or len(df) == 0:
+            return df
+
+        # Thêm 1 dòng đồng nhất (offset 0, scale 1) cho symbol chưa từng fit => giữ nguyên giá trị
+        n_keys = len(self.keys)
+        if self._use_groups(df, group_col):
+            codes = pd.Index(self.keys).get_indexer(df[group_col])
         else:
-            scaler = self.scalers.get("global")
-            if scaler:
-                values = scaler.inverse_transform(df[available_cols])
-                df[available_cols] = values
+            codes = np.full(len(df), self.keys.index(GLOBAL_KEY) if GLOBAL_KEY in self.keys else -1)
+        codes = np.where(codes < 0, n_keys, codes)
+
+        col_idx = [self.columns.index(c) for c in cols]
+        offset = np.vstack([self.offset_, np.zeros(len(self.columns))])[:, col_idx][codes]
+        scale = np.vstack([self.scale_, np.ones(len(self.columns))])[:, col_idx][codes]
+
+        values = df[cols].to_numpy(dtype=np.float64)
+        df[cols] = values * scale + offset if inverse else (values - offset) / scale
         return df
+
+    def _use_groups(self, df, group_col):
+        return self.per_symbol and group_col in df.columns
+
+    def _fit_columns(self, df, group_col):
+        if self._use_groups(df, group_col):
+            return [c for c in self.columns if c in df.columns]
+        # Chế độ global: giống bản cũ, bắt buộc có đủ các cột
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing:
+            raise KeyError(f"Columns not found for global normalization: {missing}")
+        return list(self.columns)
+
+    def __setstate__(self, state):
+        """
+        Migrate file pkl cũ: bản cũ lưu `scalers = {symbol: {col: StandardScaler|MinMaxScaler}}`
+        (hoặc {"global": scaler}); chuyển sang ma trận offset_/scale_ tương đương.
+        """
+        scalers = state.pop("scalers", None)
+        self.__dict__.update(state)
+        if scalers is None:
+            return
+
+        self.columns = list(self.columns or [])
+        self.keys = list(scalers.keys())
+        self.offset_ = np.zeros((len(self.keys), len(self.columns)))
+        self.scale_ = np.ones((len(self.keys), len(self.columns)))
+        for i, key in enumerate(self.keys):
+            per_col = scalers[key]
+            if not isinstance(per_col, dict):
+                # scaler global của sklearn được fit trên toàn bộ self.columns
+                per_col = {col: (per_col, j) for j, col in enumerate(self.columns)}
+            else:
+                per_col = {col: (scaler, 0) for col, scaler in per_col.items()}
+            for col, (scaler, j) in per_col.items():
+                if col not in self.columns:
+                    continue
+                k = self.columns.index(col)
+                if hasattr(scaler, "data_min_"):
+                    # MinMaxScaler: x' = x * scale_ + min_  <=>  (x - (-min_ / scale_)) / (1 / scale_)
+                    self.offset_[i, k] = -scaler.min_[j] / scaler.scale_[j]
+                    self.scale_[i, k] = 1.0 / scaler.scale_[j]
+                else:
+                    self.offset_[i, k] = scaler.mean_[j] if scaler.mean_ is not None else 0.0
+                    self.scale_[i, k] = scaler.scale_[j] if scaler.scale_ is not None else 1.0
+
+
+if __name__ == "__main__":
+    # Ghi lại các file pkl cũ sang định dạng mới (không còn phụ thuộc sklearn khi load):
+    #   python -m src.utils.normalizer artifacts/normalizer_7.pkl artifacts/normalizer_14.pkl
+    import pickle
+    import sys
+
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            norm = pickle.load(f)
+        with open(path, "wb") as f:
+            pickle.dump(norm, f)
+        print(f"Migrated {path}: {len(norm.keys)} keys x {len(norm.columns)} columns")
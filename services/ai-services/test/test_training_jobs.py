@@ -0,0 +1,62 @@
+"""
+TrainingJobManager khi 1 process train bị kill (như bị OOM killer): pool hỏng (BrokenProcessPool) không được
+làm job kẹt ở trạng thái queued, và job mới phải chạy được trên pool tạo lại.
+
+Chạy từ thư mục ai-services:
+    python -m unittest discover -s test -v
+"""
+import os
+import signal
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.training_jobs import ACTIVE_STATUSES, FAILED, SUCCEEDED, TrainingJobManager
+
+TIMEOUT = 120
+
+
+def run_job(job_id, datatype, pre_len, seq_len, fine_tune, progress_queue):
+    """Thay cho _run_training_job: datatype "kill" giết process con bằng SIGKILL giữa lúc train."""
+    if datatype == "kill":
+        time.sleep(0.5)
+        os.kill(os.getpid(), signal.SIGKILL)
+    return {"model_name": f"timexer_pred_{pre_len}", "status": "success"}
+
+
+class TrainingJobManagerTest(unittest.TestCase):
+    def wait(self, manager, *jobs):
+        deadline = time.monotonic() + TIMEOUT
+        while any(manager.get(job.job_id).status in ACTIVE_STATUSES for job in jobs):
+            self.assertLess(time.monotonic(), deadline, "jobs still active")
+            time.sleep(0.1)
+
+    def test_recovers_from_killed_worker(self):
+        manager = TrainingJobManager(max_workers=1, max_queue=4, run_job=run_job)
+        killed, _ = manager.submit(datatype="kill", pre_len=1, seq_len=60)
+        # Cùng pre_len: chờ job bị kill xong rồi mới được đưa vào pool
+        waiting, _ = manager.submit(datatype="1d", pre_len=1, seq_len=60)
+        # Khác pre_len: đã nằm trong hàng đợi của pool lúc pool hỏng
+        queued, _ = manager.submit(datatype="1d", pre_len=2, seq_len=60)
+        self.wait(manager, killed, waiting, queued)
+
+        for job in (killed, waiting, queued):
+            self.assertEqual(manager.get(job.job_id).status, FAILED, job.job_id)
+            self.assertIsNotNone(manager.get(job.job_id).finished_at)
+        self.assertIn("pool broke", manager.get(waiting.job_id).message)
+        self.assertIsNone(manager._executor)
+        self.assertEqual(manager.metrics()["statuses"]["queued"], 0)
+
+        # Job giống hệt job đã hỏng không bị dedup về job đó, và chạy được trên pool mới
+        retried, created = manager.submit(datatype="1d", pre_len=1, seq_len=60)
+        self.assertTrue(created)
+        self.assertNotEqual(retried.job_id, waiting.job_id)
+        self.wait(manager, retried)
+        self.assertEqual(manager.get(retried.job_id).status, SUCCEEDED)
+        manager._executor.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Benchmark FinBERT throughput (texts/second) on CPU: one padded pass over all texts (previous behaviour)
+versus length-bucketed batches of several sizes, on synthetic texts with a long tail of long articles.
+
+Needs the model in model-finbert-sentiment. Run from the service folder:
+  python benchmarks/bench_finbert_throughput.py --texts 2000 --threads 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+WORDS = ("bitcoin ether price market rally drop investors exchange etf token regulators funds whales "
+         "trading volume liquidity surge crash bullish bearish analysts network upgrade").split()
+
+def make_texts(n, seed=0):
+  rng = random.Random(seed)
+  texts = []
+  for _ in range(n):
+    # Mostly sub-header sized texts, 5% long articles that hit the 512 token limit
+    length = rng.randint(300, 600) if rng.random() < 0.05 else rng.randint(15, 60)
+    texts.append(' '.join(rng.choice(WORDS) for _ in range(length)))
+  return texts
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--texts', type=int, default=2000)
+  parser.add_argument('--threads', type=int, default=None)
+  parser.add_argument('--batch-sizes', type=int, nargs='+', default=[8, 32, 64])
+  parser.add_argument('--quantize', action='store_true')
+  args = parser.parse_args()
+
+  from PredictModel.PredictModelFinBert import PredictModelFinBert
+  texts = make_texts(args.texts)
+
+  configurations = [('single padded pass', len(texts))] + [(f'bucketed, batch {size}', size) for size in args.batch_sizes]
+  print(f"{'configuration':<22} {'seconds':>8} {'texts/s':>8}")
+  for name, batch_size in configurations:
+    predictor = PredictModelFinBert(quantize=args.quantize, batch_size=batch_size, num_threads=args.threads)
+    predictor.predict(texts[:8])  # warm-up
+    start = time.perf_counter()
+    predictor.predict(texts)
+    seconds = time.perf_counter() - start
+    print(f"{name:<22} {seconds:>8.2f} {len(texts) / seconds:>8.1f}")
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,60 @@
+"""
+Benchmark subject classification of a crawl offline, with FakeService standing in for Gemini behind the
+client-side rate limiter: one prompt per text, packed prompts, packed prompts on a re-run (cache hits),
+and the local classifier with Gemini as fallback. The latency is divided and the quotas multiplied by
+--speedup so it finishes quickly; the number of requests is what counts against the real quota.
+
+Run from the service folder:
+  python benchmarks/bench_subject_pipeline.py --texts 500 --speedup 60
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+def make_texts(n, seed=0):
+  rng = random.Random(seed)
+  subjects = ['Bitcoin', 'BTC', 'Ethereum', 'ETH', 'NFT', 'DeFi', 'Solana', 'blockchain', 'the market', 'crypto']
+  verbs = ['rallies', 'drops', 'surges', 'stalls', 'faces pressure', 'attracts whales']
+  return [f"{rng.choice(subjects)} {rng.choice(verbs)} as traders react to news #{i}" for i in range(n)]
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--texts', type=int, default=500)
+  parser.add_argument('--latency', type=float, default=1.0, help='Seconds per fake Gemini call')
+  parser.add_argument('--speedup', type=float, default=60.0, help='Divides latency and multiplies the quotas')
+  args = parser.parse_args()
+
+  from AIService.FakeService import FakeService
+  from AIService.RateLimitedService import RateLimitedService
+  from DataProcessor.DataProcessorGemini import DataProcessorGemini
+  from DataProcessor.DataProcessorLocal import DataProcessorLocal
+
+  texts = make_texts(args.texts)
+  fake = FakeService(latency=args.latency / args.speedup)
+  service = RateLimitedService(fake, requests_per_minute=10 * args.speedup, tokens_per_minute=250000 * args.speedup,
+                               requests_per_day=None, request_burst=1)
+  packed = DataProcessorGemini(service=service)
+
+  def per_text(batch):
+    return [packed.process(text) for text in batch]
+
+  runs = [
+    ('one prompt per text', per_text),
+    ('packed prompts', packed.process_array),
+    ('packed, cached re-run', packed.process_array),
+    ('local + fallback', DataProcessorLocal(fallback=packed).process_array),
+  ]
+  print(f"{'configuration':<24} {'seconds':>8} {'texts/s':>9} {'requests':>9}")
+  for name, run in runs:
+    calls = fake.calls
+    start = time.perf_counter()
+    run(texts)
+    seconds = time.perf_counter() - start
+    print(f"{name:<24} {seconds:>8.2f} {len(texts) / seconds:>9.1f} {fake.calls - calls:>9}")
+
+if __name__ == '__main__':
+  main()
@@ -23,8 +23,14 @@ CREATE TABLE IF NOT EXISTS news (
   last_modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- create a Btree index
-CREATE INDEX idx_news_published_at ON news (utc_published_at);
+-- Btree indexes in the keyset pagination order (utc_published_at DESC, id DESC);
+-- the composite one also serves time range scans
+CREATE INDEX idx_news_published_at_id ON news (utc_published_at DESC, id DESC);
+CREATE INDEX idx_news_subject_published_at_id ON news (subject, utc_published_at DESC, id DESC);
+-- partial indexes for the sentiment filter, one per score
+CREATE INDEX idx_news_positive_published_at_id ON news (utc_published_at DESC, id DESC) WHERE sentiment_score = 1;
+CREATE INDEX idx_news_neutral_published_at_id ON news (utc_published_at DESC, id DESC) WHERE sentiment_score = 0;
+CREATE INDEX idx_news_negative_published_at_id ON news (utc_published_at DESC, id DESC) WHERE sentiment_score = -1;
 
 -- create a trigger to update last_modified_at on update
 CREATE OR REPLACE FUNCTION update_last_modified()
@@ -38,4 +44,77 @@ $$ LANGUAGE plpgsql;
 CREATE TRIGGER trg_update_last_modified
 BEFORE UPDATE ON news
 FOR EACH ROW
-EXECUTE FUNCTION update_last_modified();
\ No newline at end of file
+EXECUTE FUNCTION update_last_modified();
+
+-- cache of FinBERT outputs keyed by the hash of the scored text and the model version
+CREATE TABLE IF NOT EXISTS prediction_cache (
+  model_version TEXT NOT NULL,
+  text_hash BYTEA NOT NULL,
+  label SMALLINT NOT NULL,
+  logits REAL[] NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (model_version, text_hash)
+);
+
+-- hourly and daily sentiment of the news per subject, maintained by the triggers below
+-- (bucket_start: UTC epoch seconds of the start of the hour/day, like utc_published_at)
+CREATE TABLE IF NOT EXISTS sentiment_aggregates (
+  granularity TEXT NOT NULL CHECK (granularity in ('hour', 'day')),
+  bucket_start FLOAT NOT NULL,
+  subject TEXT NOT NULL,
+  news_count INTEGER NOT NULL DEFAULT 0,
+  score_sum FLOAT NOT NULL DEFAULT 0,
+  positive_count INTEGER NOT NULL DEFAULT 0,
+  negative_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (granularity, bucket_start, subject)
+);
+
+-- add the inserted rows to / remove the deleted rows from their buckets, once per statement
+CREATE OR REPLACE FUNCTION update_sentiment_aggregates()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    INSERT INTO sentiment_aggregates AS a (granularity, bucket_start, subject, news_count, score_sum, positive_count, negative_count)
+    SELECT g.granularity, floor(o.utc_published_at / g.seconds) * g.seconds, o.subject,
+      -count(*), -sum(o.sentiment_score), -count(*) FILTER (WHERE o.sentiment_score > 0), -count(*) FILTER (WHERE o.sentiment_score < 0)
+    FROM old_rows o CROSS JOIN (VALUES ('hour', 3600), ('day', 86400)) AS g(granularity, seconds)
+    GROUP BY 1, 2, 3
+    ON CONFLICT (granularity, bucket_start, subject) DO UPDATE SET
+      news_count = a.news_count + EXCLUDED.news_count,
+      score_sum = a.score_sum + EXCLUDED.score_sum,
+      positive_count = a.positive_count + EXCLUDED.positive_count,
+      negative_count = a.negative_count + EXCLUDED.negative_count;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO sentiment_aggregates AS a (granularity, bucket_start, subject, news_count, score_sum, positive_count, negative_count)
+    SELECT g.granularity, floor(n.utc_published_at / g.seconds) * g.seconds, n.subject,
+      count(*), sum(n.sentiment_score), count(*) FILTER (WHERE n.sentiment_score > 0), count(*) FILTER (WHERE n.sentiment_score < 0)
+    FROM new_rows n CROSS JOIN (VALUES ('hour', 3600), ('day', 86400)) AS g(granularity, seconds)
+    GROUP BY 1, 2, 3
+    ON CONFLICT (granularity, bucket_start, subject) DO UPDATE SET
+      news_count = a.news_count + EXCLUDED.news_count,
+      score_sum = a.score_sum + EXCLUDED.score_sum,
+      positive_count = a.positive_count + EXCLUDED.positive_count,
+      negative_count = a.negative_count + EXCLUDED.negative_count;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_sentiment_aggregates_insert
+AFTER INSERT ON news
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_sentiment_aggregates();
+
+CREATE TRIGGER trg_sentiment_aggregates_update
+AFTER UPDATE ON news
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_sentiment_aggregates();
+
+CREATE TRIGGER trg_sentiment_aggregates_delete
+AFTER DELETE ON news
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_sentiment_aggregates();
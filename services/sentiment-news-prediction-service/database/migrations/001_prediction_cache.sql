@@ -0,0 +1,9 @@
+-- FinBERT output cache (see init.sql) for databases created before it; PredictModelCached is on by default
+CREATE TABLE IF NOT EXISTS prediction_cache (
+  model_version TEXT NOT NULL,
+  text_hash BYTEA NOT NULL,
+  label SMALLINT NOT NULL,
+  logits REAL[] NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (model_version, text_hash)
+);
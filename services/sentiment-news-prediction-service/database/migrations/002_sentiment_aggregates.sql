@@ -0,0 +1,78 @@
+-- Sentiment aggregates (see init.sql) for databases created before them.
+-- Writes to news wait until the triggers exist and the table is rebuilt from the news already stored,
+-- so every news row is counted exactly once.
+LOCK TABLE news IN SHARE ROW EXCLUSIVE MODE;
+
+-- hourly and daily sentiment of the news per subject, maintained by the triggers below
+-- (bucket_start: UTC epoch seconds of the start of the hour/day, like utc_published_at)
+CREATE TABLE IF NOT EXISTS sentiment_aggregates (
+  granularity TEXT NOT NULL CHECK (granularity in ('hour', 'day')),
+  bucket_start FLOAT NOT NULL,
+  subject TEXT NOT NULL,
+  news_count INTEGER NOT NULL DEFAULT 0,
+  score_sum FLOAT NOT NULL DEFAULT 0,
+  positive_count INTEGER NOT NULL DEFAULT 0,
+  negative_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (granularity, bucket_start, subject)
+);
+
+-- add the inserted rows to / remove the deleted rows from their buckets, once per statement
+CREATE OR REPLACE FUNCTION update_sentiment_aggregates()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    INSERT INTO sentiment_aggregates AS a (granularity, bucket_start, subject, news_count, score_sum, positive_count, negative_count)
+    SELECT g.granularity, floor(o.utc_published_at / g.seconds) * g.seconds, o.subject,
+      -count(*), -sum(o.sentiment_score), -count(*) FILTER (WHERE o.sentiment_score > 0), -count(*) FILTER (WHERE o.sentiment_score < 0)
+    FROM old_rows o CROSS JOIN (VALUES ('hour', 3600), ('day', 86400)) AS g(granularity, seconds)
+    GROUP BY 1, 2, 3
+    ON CONFLICT (granularity, bucket_start, subject) DO UPDATE SET
+      news_count = a.news_count + EXCLUDED.news_count,
+      score_sum = a.score_sum + EXCLUDED.score_sum,
+      positive_count = a.positive_count + EXCLUDED.positive_count,
+      negative_count = a.negative_count + EXCLUDED.negative_count;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO sentiment_aggregates AS a (granularity, bucket_start, subject, news_count, score_sum, positive_count, negative_count)
+    SELECT g.granularity, floor(n.utc_published_at / g.seconds) * g.seconds, n.subject,
+      count(*), sum(n.sentiment_score), count(*) FILTER (WHERE n.sentiment_score > 0), count(*) FILTER (WHERE n.sentiment_score < 0)
+    FROM new_rows n CROSS JOIN (VALUES ('hour', 3600), ('day', 86400)) AS g(granularity, seconds)
+    GROUP BY 1, 2, 3
+    ON CONFLICT (granularity, bucket_start, subject) DO UPDATE SET
+      news_count = a.news_count + EXCLUDED.news_count,
+      score_sum = a.score_sum + EXCLUDED.score_sum,
+      positive_count = a.positive_count + EXCLUDED.positive_count,
+      negative_count = a.negative_count + EXCLUDED.negative_count;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_sentiment_aggregates_insert ON news;
+CREATE TRIGGER trg_sentiment_aggregates_insert
+AFTER INSERT ON news
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_sentiment_aggregates();
+
+DROP TRIGGER IF EXISTS trg_sentiment_aggregates_update ON news;
+CREATE TRIGGER trg_sentiment_aggregates_update
+AFTER UPDATE ON news
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_sentiment_aggregates();
+
+DROP TRIGGER IF EXISTS trg_sentiment_aggregates_delete ON news;
+CREATE TRIGGER trg_sentiment_aggregates_delete
+AFTER DELETE ON news
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_sentiment_aggregates();
+
+-- rebuild from the stored news: one grouped insert per granularity instead of replaying the rows
+DELETE FROM sentiment_aggregates;
+INSERT INTO sentiment_aggregates (granularity, bucket_start, subject, news_count, score_sum, positive_count, negative_count)
+SELECT g.granularity, floor(n.utc_published_at / g.seconds) * g.seconds, n.subject,
+  count(*), sum(n.sentiment_score), count(*) FILTER (WHERE n.sentiment_score > 0), count(*) FILTER (WHERE n.sentiment_score < 0)
+FROM news n CROSS JOIN (VALUES ('hour', 3600), ('day', 86400)) AS g(granularity, seconds)
+GROUP BY 1, 2, 3;
@@ -0,0 +1,8 @@
+-- Keyset pagination indexes (see init.sql) for databases created before them
+CREATE INDEX IF NOT EXISTS idx_news_published_at_id ON news (utc_published_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_news_subject_published_at_id ON news (subject, utc_published_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_news_positive_published_at_id ON news (utc_published_at DESC, id DESC) WHERE sentiment_score = 1;
+CREATE INDEX IF NOT EXISTS idx_news_neutral_published_at_id ON news (utc_published_at DESC, id DESC) WHERE sentiment_score = 0;
+CREATE INDEX IF NOT EXISTS idx_news_negative_published_at_id ON news (utc_published_at DESC, id DESC) WHERE sentiment_score = -1;
+-- the composite index above covers the time range scans of the old single-column one
+DROP INDEX IF EXISTS idx_news_published_at;
@@ -0,0 +1,50 @@
+from .IService import IService
+import ast
+import json
+import time
+
+SUBJECTS = ['NFT', 'Bitcoin', 'Ethereum', 'Altcoin', 'Blockchain', 'DeFi']
+
+class FakeService(IService):
+  """
+  Offline stand-in for GeminiService to run and benchmark the pipeline without an API key or quota.
+
+  It answers the subject prompts of DataProcessorGemini: the texts are read from the end of the prompt and
+  each gets a deterministic subject. `latency` (seconds per call) and `latency_per_item` simulate the time
+  the remote model takes.
+  """
+  def __init__(self, latency: float = 1.0, latency_per_item: float = 0.0, model_name: str = 'fake'):
+    self.__latency = latency
+    self.__latency_per_item = latency_per_item
+    self.__model_name = model_name
+    self.calls = 0
+
+  @property
+  def model_name(self) -> str:
+    return self.__model_name
+
+  def __subject(self, text: str) -> str:
+    lowered = text.lower()
+    for subject in SUBJECTS:
+      if subject.lower() in lowered:
+        return subject
+    return SUBJECTS[sum(map(ord, text)) % len(SUBJECTS)]
+
+  def generate(self, prompt: str) -> str:
+    """
+    Process the input data and return a result.
+
+    :param prompt: A DataProcessorGemini subject prompt.
+    :return: The JSON answer as a string.
+    """
+    self.calls += 1
+    marker = 'Now, process the following input:'
+    if marker in prompt:
+      texts = ast.literal_eval(prompt.split(marker, 1)[1].strip())
+      answer = [{'crypto_type': self.__subject(text)} for text in texts]
+    else:
+      text = prompt.rsplit('Here is the raw data:', 1)[-1].strip().strip('"')
+      texts = [text]
+      answer = {'crypto_type': self.__subject(text)}
+    time.sleep(self.__latency + self.__latency_per_item * len(texts))
+    return json.dumps(answer)
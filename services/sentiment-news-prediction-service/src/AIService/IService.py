@@ -13,4 +13,13 @@ class IService(ABC):
     :param data: The input data to be processed.
     :return: The processed result as a string.
     """
-    ...
\ No newline at end of file
+    ...
+
+  def invalidate(self, prompt: str):
+    """
+    Forget any cached response to the prompt, e.g. once the caller found it malformed, so the next call asks
+    the model again. Services without a cache have nothing to do.
+
+    :param prompt: The prompt whose response must not be reused.
+    """
+    pass
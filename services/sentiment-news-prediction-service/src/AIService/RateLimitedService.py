@@ -0,0 +1,136 @@
+from .IService import IService
+from .TokenBucket import TokenBucket
+from collections import OrderedDict
+import hashlib
+import os
+import random
+import threading
+import time
+
+# HTTP codes of quota and overload errors worth retrying
+RETRYABLE_CODES = {429, 500, 503}
+
+def estimate_tokens(text: str) -> int:
+  """
+  Rough token count of a text (about 4 characters per token for English).
+  """
+  return len(text) // 4 + 1
+
+class RateLimitedService(IService):
+  """
+  AI Service wrapper enforcing the quotas of the wrapped service on the client side:
+  - requests per minute, tokens per minute and requests per day, each with a token bucket
+    (prompt tokens are charged before the call, response tokens once the response is received);
+  - retries with exponential backoff and jitter when the service answers with a quota or overload error;
+  - caches responses by the hash of the model name and prompt, in memory and optionally in `cache_dir`,
+    so a repeated prompt does not use the quota at all; callers that cannot parse a response `invalidate` it.
+  """
+  def __init__(self, service: IService, requests_per_minute: float = 10, tokens_per_minute: float = 250000,
+               requests_per_day: float | None = 250, request_burst: int | None = None, max_retries: int = 5,
+               backoff: float = 2.0, cache_size: int = 1024, cache_dir: str | None = None):
+    self.__service = service
+    # By default a whole minute of requests may be sent at once, as the quota allows
+    self.__requests = TokenBucket(rate=requests_per_minute / 60, capacity=request_burst or requests_per_minute)
+    self.__tokens = TokenBucket(rate=tokens_per_minute / 60, capacity=tokens_per_minute)
+    self.__daily_requests = TokenBucket(rate=requests_per_day / 86400, capacity=requests_per_day) if requests_per_day else None
+    self.__max_retries = max_retries
+    self.__backoff = backoff
+    self.__cache = OrderedDict()
+    self.__cache_size = cache_size
+    self.__cache_dir = cache_dir
+    self.__lock = threading.Lock()
+    if cache_dir:
+      os.makedirs(cache_dir, exist_ok=True)
+    self.stats = {'calls': 0, 'cache_hits': 0, 'retries': 0, 'invalidated': 0, 'throttled_seconds': 0.0}
+
+  @property
+  def model_name(self) -> str:
+    return getattr(self.__service, 'model_name', type(self.__service).__name__)
+
+  def __key(self, prompt: str) -> str:
+    return hashlib.sha256(f'{self.model_name}\n{prompt}'.encode('utf-8')).hexdigest()
+
+  def __cache_get(self, key: str) -> str | None:
+    with self.__lock:
+      if key in self.__cache:
+        self.__cache.move_to_end(key)
+        return self.__cache[key]
+    if self.__cache_dir:
+      path = os.path.join(self.__cache_dir, f'{key}.txt')
+      if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+          response = f.read()
+        self.__cache_put(key, response, persist=False)
+        return response
+    return None
+
+  def __cache_put(self, key: str, response: str, persist: bool = True):
+    with self.__lock:
+      self.__cache[key] = response
+      self.__cache.move_to_end(key)
+      while len(self.__cache) > self.__cache_size:
+        self.__cache.popitem(last=False)
+    if persist and self.__cache_dir:
+      path = os.path.join(self.__cache_dir, f'{key}.txt')
+      with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        f.write(response)
+      os.replace(f'{path}.tmp', path)
+
+  def invalidate(self, prompt: str):
+    """
+    Drop the cached response to the prompt from memory and from `cache_dir`.
+
+    :param prompt: The prompt whose response must not be reused.
+    """
+    key = self.__key(prompt)
+    with self.__lock:
+      self.__cache.pop(key, None)
+    if self.__cache_dir:
+      path = os.path.join(self.__cache_dir, f'{key}.txt')
+      if os.path.exists(path):
+        os.remove(path)
+    self.stats['invalidated'] += 1
+
+  def __is_retryable(self, error: Exception) -> bool:
+    code = getattr(error, 'code', None) or getattr(error, 'status_code', None)
+    return code in RETRYABLE_CODES
+
+  def __throttle(self, prompt_tokens: int):
+    waited = self.__requests.acquire()
+    if self.__daily_requests is not None:
+      waited += self.__daily_requests.acquire()
+    waited += self.__tokens.acquire(prompt_tokens)
+    self.stats['throttled_seconds'] += waited
+
+  def generate(self, prompt: str) -> str:
+    """
+    Process the input data using the wrapped AI service and return a result.
+
+    :param prompt: The prompt to send.
+    :return: The processed result as a string.
+    """
+    key = self.__key(prompt)
+    response = self.__cache_get(key)
+    if response is not None:
+      self.stats['cache_hits'] += 1
+      return response
+
+    prompt_tokens = estimate_tokens(prompt)
+    for attempt in range(self.__max_retries + 1):
+      self.__throttle(prompt_tokens)
+      self.stats['calls'] += 1
+      try:
+        response = self.__service.generate(prompt)
+        break
+      except Exception as e:
+        if attempt == self.__max_retries or not self.__is_retryable(e):
+          raise
+        delay = self.__backoff * 2 ** attempt * (0.5 + random.random())
+        print(f"{self.model_name} quota error ({e}), retrying in {delay:.1f}s")
+        self.stats['retries'] += 1
+        time.sleep(delay)
+
+    self.__tokens.consume(estimate_tokens(response or ''))
+    if response:
+      self.__cache_put(key, response)
+    return response
@@ -0,0 +1,48 @@
+import threading
+import time
+
+class TokenBucket:
+  """
+  Thread-safe token bucket refilling `rate` tokens per second up to `capacity`.
+
+  `consume` may take the bucket below zero (e.g. to charge output tokens once they are known); later
+  `acquire` calls then wait until the debt is paid back.
+  """
+  def __init__(self, rate: float, capacity: float):
+    self.__rate = rate
+    self.__capacity = capacity
+    self.__tokens = float(capacity)
+    self.__updated_at = time.monotonic()
+    self.__lock = threading.Lock()
+
+  def __refill(self):
+    now = time.monotonic()
+    self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated_at) * self.__rate)
+    self.__updated_at = now
+
+  def acquire(self, amount: float = 1.0) -> float:
+    """
+    Blocks until `amount` tokens (at most the capacity) are available and takes them.
+
+    :param amount: Number of tokens to take.
+    :return: Seconds spent waiting.
+    """
+    amount = min(amount, self.__capacity)
+    waited = 0.0
+    while True:
+      with self.__lock:
+        self.__refill()
+        if self.__tokens >= amount:
+          self.__tokens -= amount
+          return waited
+        wait = (amount - self.__tokens) / self.__rate
+      time.sleep(wait)
+      waited += wait
+
+  def consume(self, amount: float):
+    """
+    Takes `amount` tokens without waiting, possibly leaving the bucket in debt.
+    """
+    with self.__lock:
+      self.__refill()
+      self.__tokens -= amount
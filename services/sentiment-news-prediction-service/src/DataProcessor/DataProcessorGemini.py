@@ -1,16 +1,38 @@
 from .IDataProcessor import IDataProcessor
 from AIService.IService import IService
+from AIService.RateLimitedService import estimate_tokens
 import json
 
 class DataProcessorGemini(IDataProcessor):
   """
   Data Processor for Gemini.
+
+  process_array packs as many texts as fit in `max_prompt_tokens` (and at most `max_items`) into each
+  prompt, so a large crawl costs a few requests instead of one per text or one oversized prompt.
   """
-  def __init__(self, service: IService):
+  def __init__(self, service: IService, max_prompt_tokens: int = 8000, max_items: int = 100):
     self.__service = service
+    self.__max_prompt_tokens = max_prompt_tokens
+    self.__max_items = max_items
   def __retrieve_json_from_string(self, str_json: str): 
     return json.loads(str_json)
 
+  def __generate_json(self, prompt: str, expected_items: int | None = None):
+    """
+    Ask the service and parse its JSON answer. A malformed answer is invalidated in the service cache before
+    raising, so retrying the same texts asks the model again instead of replaying the bad answer.
+    """
+    res = self.__service.generate(prompt)
+    res = res.strip('\n').removeprefix('```json').removesuffix('```')
+    try:
+      result = self.__retrieve_json_from_string(res)
+      if expected_items is not None and (not isinstance(result, list) or len(result) != expected_items):
+        raise ValueError(f"Expected a list of {expected_items} subjects, got: {res[:200]}")
+    except ValueError:
+      self.__service.invalidate(prompt)
+      raise
+    return result
+
   def process(self, raw_data: str):
     """
     Process the input data and return a result.
@@ -29,10 +51,23 @@ Do *NOT* include any explanations or text outside of the final JSON object, even
 Here is the raw data:
 "{raw_data}"
     """
-    res = self.__service.generate(prompt)
-    res = res.strip('\n').removeprefix('```json').removesuffix('```')
-    return self.__retrieve_json_from_string(res)
+    return self.__generate_json(prompt)
   
+  def __chunks(self, list_raw_data: list) -> list[list]:
+    overhead = estimate_tokens(self.__array_prompt([]))
+    chunks, chunk, chunk_tokens = [], [], overhead
+    for raw_data in list_raw_data:
+      # repr adds quotes and a separator around every text
+      tokens = estimate_tokens(repr(raw_data)) + 1
+      if chunk and (chunk_tokens + tokens > self.__max_prompt_tokens or len(chunk) >= self.__max_items):
+        chunks.append(chunk)
+        chunk, chunk_tokens = [], overhead
+      chunk.append(raw_data)
+      chunk_tokens += tokens
+    if chunk:
+      chunks.append(chunk)
+    return chunks
+
   def process_array(self, list_raw_data: list):
     """
     Process the input data and return a result.
@@ -40,8 +75,14 @@ Here is the raw data:
     :param raw_data: The input raw data to be processed.
     :return: The processed result as a json.
     """
+    results = []
+    for chunk in self.__chunks(list(list_raw_data)):
+      results.extend(self.__generate_json(self.__array_prompt(chunk), expected_items=len(chunk)))
+    return results
+
+  def __array_prompt(self, list_raw_data: list) -> str:
     # Implement the processing logic specific to Gemini here
-    prompt = f"""
+    return f"""
 You are an expert data extraction AI. Your task is to analyze a list of short texts and identify the primary cryptocurrency or blockchain-related term mentioned in each.
 
 The term you extract must be one of the following exact values: ['NFT', 'Bitcoin', 'Ethereum', 'Altcoin', 'Blockchain', 'DeFi'].
@@ -74,7 +115,4 @@ Here is an example:
 
 Now, process the following input:
 {list_raw_data}
-    """
-    res = self.__service.generate(prompt)
-    res = res.strip('\n').removeprefix('```json').removesuffix('```')
-    return self.__retrieve_json_from_string(res)
\ No newline at end of file
+    """
\ No newline at end of file
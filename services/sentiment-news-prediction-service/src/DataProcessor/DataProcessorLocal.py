@@ -0,0 +1,164 @@
+from .IDataProcessor import IDataProcessor
+import re
+import zlib
+import numpy as np
+
+SUBJECTS = ['NFT', 'Bitcoin', 'Ethereum', 'Altcoin', 'Blockchain', 'DeFi']
+
+# Keyword rules: (pattern, weight) per subject, matched case-insensitively on word boundaries
+KEYWORDS = {
+  'NFT': [
+    (r'nfts?', 3.0), (r'non-fungible', 3.0), (r'opensea', 2.0), (r'bored ape', 2.0), (r'cryptopunks?', 2.0),
+    (r'digital (art|collectibles?)', 1.5), (r'collectibles?', 1.0), (r'mint(ed|ing)?', 0.5),
+  ],
+  'Bitcoin': [
+    (r'bitcoin', 3.0), (r'btc', 3.0), (r'satoshis?', 1.5), (r'halving', 1.5), (r'lightning network', 1.5),
+    (r'saylor', 1.0), (r'microstrategy', 1.0), (r'ordinals', 0.5),
+  ],
+  'Ethereum': [
+    (r'ethereum', 3.0), (r'eth', 3.0), (r'ether', 2.0), (r'vitalik', 1.5), (r'buterin', 1.5), (r'erc-?20', 1.0),
+    (r'layer[- ]?2', 1.0), (r'arbitrum', 1.0), (r'pectra', 1.0),
+  ],
+  'Altcoin': [
+    (r'altcoins?', 3.0), (r'solana', 2.0), (r'sol', 1.5), (r'xrp', 2.0), (r'ripple', 1.5), (r'cardano', 2.0),
+    (r'dogecoin', 2.0), (r'doge', 1.5), (r'shiba inu', 2.0), (r'meme ?coins?', 2.0), (r'bnb', 1.5), (r'tron', 1.5),
+    (r'avalanche', 1.5), (r'polkadot', 1.5), (r'litecoin', 1.5), (r'presale', 1.0), (r'tokens?', 0.3),
+  ],
+  'Blockchain': [
+    (r'blockchains?', 2.0), (r'distributed ledger', 3.0), (r'web3', 1.5), (r'mainnet', 1.0), (r'testnet', 1.0),
+    (r'cbdcs?', 1.5), (r'tokeniz(ed|ation)', 1.5), (r'validators?', 0.5), (r'nodes?', 0.5),
+  ],
+  'DeFi': [
+    (r'defi', 3.0), (r'decentralized finance', 3.0), (r'yield( farming)?', 1.5), (r'liquidity pools?', 2.0),
+    (r'lending', 1.0), (r'dexs?', 1.5), (r'uniswap', 2.0), (r'aave', 2.0), (r'tvl', 1.5), (r'staking', 1.0),
+    (r'stablecoins?', 1.0),
+  ],
+}
+
+class DataProcessorLocal(IDataProcessor):
+  """
+  Data Processor classifying the subject (`crypto_type`) of news locally.
+
+  Each text is scored by keyword rules and, once `fit` has been given labelled news (e.g. the subjects
+  already stored in the database), by the cosine similarity of its hashed bag of words to the centroid
+  of every subject. Texts whose best subject has a probability below `min_confidence` are sent to the
+  optional `fallback` processor (e.g. DataProcessorGemini) in one call; if the fallback fails or returns
+  an unknown subject, the local guess is kept.
+  """
+  def __init__(self, fallback: IDataProcessor | None = None, min_confidence: float = 0.6,
+               n_features: int = 1 << 16, temperature: float = 2.0, centroid_weight: float = 4.0):
+    self.__fallback = fallback
+    self.__min_confidence = min_confidence
+    self.__n_features = n_features
+    self.__temperature = temperature
+    self.__centroid_weight = centroid_weight
+    self.__patterns = [
+      [(re.compile(rf'\b{pattern}\b', re.IGNORECASE), weight) for pattern, weight in KEYWORDS[subject]]
+      for subject in SUBJECTS
+    ]
+    self.__centroids = None
+    self.fallback_items = 0
+
+  def __tokens(self, text: str) -> list[str]:
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+  def __embed(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sparse L2-normalized hashed bag of words and bigrams as (buckets, weights); crc32 keeps the buckets
+    the same in every process.
+    """
+    buckets = [zlib.crc32(token.encode('utf-8')) % self.__n_features for token in self.__tokens(text)]
+    buckets, counts = np.unique(np.array(buckets, dtype=np.int64), return_counts=True)
+    weights = counts.astype(np.float32)
+    return buckets, weights / max(float(np.linalg.norm(weights)), 1e-12)
+
+  def __centroid_scores(self, texts: list[str]) -> np.ndarray:
+    scores = np.zeros((len(texts), len(SUBJECTS)), dtype=np.float32)
+    for i, text in enumerate(texts):
+      buckets, weights = self.__embed(text)
+      scores[i] = self.__centroids[:, buckets] @ weights
+    return scores
+
+  def __keyword_scores(self, texts: list[str]) -> np.ndarray:
+    scores = np.zeros((len(texts), len(SUBJECTS)), dtype=np.float32)
+    for i, text in enumerate(texts):
+      for j, patterns in enumerate(self.__patterns):
+        scores[i, j] = sum(weight for pattern, weight in patterns if pattern.search(text))
+    return scores
+
+  def fit(self, texts: list[str], subjects: list[str]):
+    """
+    Fit the subject centroids from labelled texts; texts with an unknown subject are ignored.
+
+    :param texts: Texts of the news.
+    :param subjects: Subject of each text.
+    :return: self
+    """
+    pairs = [(text, SUBJECTS.index(subject)) for text, subject in zip(texts, subjects) if subject in SUBJECTS]
+    if not pairs:
+      return self
+    centroids = np.zeros((len(SUBJECTS), self.__n_features), dtype=np.float32)
+    for text, label in pairs:
+      buckets, weights = self.__embed(text)
+      centroids[label, buckets] += weights
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    self.__centroids = centroids / np.maximum(norms, 1e-12)
+    print(f"Subject classifier fitted on {len(pairs)} news")
+    return self
+
+  def predict_proba(self, texts: list[str]) -> np.ndarray:
+    """
+    Probability of every subject for each text, columns in the order of SUBJECTS.
+    """
+    scores = self.__keyword_scores(texts)
+    if self.__centroids is not None:
+      scores += self.__centroid_weight * self.__centroid_scores(texts)
+    logits = self.__temperature * scores
+    logits -= logits.max(axis=1, keepdims=True)
+    probabilities = np.exp(logits)
+    return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+  def __ask_fallback(self, texts: list[str]) -> list[str | None]:
+    try:
+      results = self.__fallback.process_array(list_raw_data=texts)
+    except Exception as e:
+      print(f"Subject fallback failed, keeping local subjects: {e}")
+      return [None] * len(texts)
+    if not isinstance(results, list) or len(results) != len(texts):
+      print("Subject fallback returned a malformed result, keeping local subjects")
+      return [None] * len(texts)
+    return [item.get('crypto_type') if isinstance(item, dict) and item.get('crypto_type') in SUBJECTS else None
+            for item in results]
+
+  def process(self, raw_data: str):
+    """
+    Process the input data and return a result.
+
+    :param raw_data: The input raw data to be processed.
+    :return: The processed result as a json.
+    """
+    return self.process_array([raw_data])[0]
+
+  def process_array(self, list_raw_data: list):
+    """
+    Process the input data and return a result.
+
+    :param raw_data: The input raw data to be processed.
+    :return: The processed result as a json.
+    """
+    texts = list(list_raw_data)
+    if not texts:
+      return []
+    probabilities = self.predict_proba(texts)
+    subjects = [SUBJECTS[i] for i in probabilities.argmax(axis=1)]
+
+    uncertain = np.flatnonzero(probabilities.max(axis=1) < self.__min_confidence)
+    if self.__fallback is not None and len(uncertain) > 0:
+      answers = self.__ask_fallback([texts[i] for i in uncertain])
+      for i, answer in zip(uncertain, answers):
+        if answer is not None:
+          subjects[i] = answer
+      self.fallback_items += len(uncertain)
+      print(f"Subject classifier: {len(texts) - len(uncertain)} local, {len(uncertain)} sent to fallback")
+    return [{'crypto_type': subject} for subject in subjects]
@@ -0,0 +1,52 @@
+from psycopg_pool import ConnectionPool
+import os
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'migrations')
+# Any constant shared by the service instances, so only one of them migrates at a time
+MIGRATION_LOCK_ID = 4815162342
+
+class SchemaMigrator:
+  """
+  Brings an existing database up to the schema of database/init.sql.
+
+  init.sql only runs when the Postgres volume is created, so tables, triggers and indexes added later are
+  missing from databases created before them. Every `.sql` file in `migrations_dir` is applied once, in name
+  order, and recorded in `schema_migrations`. The files are idempotent (IF NOT EXISTS / OR REPLACE), so they
+  are also safe on a database that init.sql already created with the latest schema.
+  """
+  def __init__(self, pool: ConnectionPool, migrations_dir: str = MIGRATIONS_DIR):
+    self.__pool = pool
+    self.__migrations_dir = migrations_dir
+
+  def migrate(self) -> list[str]:
+    """
+    Apply the migrations not applied yet, each in its own transaction.
+
+    :return: Names of the applied migrations.
+    """
+    if not os.path.isdir(self.__migrations_dir):
+      print(f"No migrations folder at {self.__migrations_dir}")
+      return []
+    applied = []
+    for name in sorted(file for file in os.listdir(self.__migrations_dir) if file.endswith('.sql')):
+      with open(os.path.join(self.__migrations_dir, name), encoding='utf-8') as f:
+        sql = f.read()
+      with self.__pool.connection() as conn:
+        with conn.cursor() as cursor:
+          cursor.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATION_LOCK_ID,))
+          cursor.execute(
+            """
+              CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+              );
+            """
+          )
+          cursor.execute("SELECT 1 FROM schema_migrations WHERE name = %s;", (name,))
+          if cursor.fetchone() is not None:
+            continue
+          cursor.execute(sql)
+          cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s);", (name,))
+      print(f"Applied migration {name}")
+      applied.append(name)
+    return applied
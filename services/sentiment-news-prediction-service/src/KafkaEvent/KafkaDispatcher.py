@@ -0,0 +1,161 @@
+from KafkaEvent.KafkaRequest import KafkaRequest
+from kafka import KafkaConsumer
+from kafka.structs import OffsetAndMetadata
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+import queue
+import threading
+import time
+
+class KafkaDispatcher:
+  """
+  Consumes requests and runs them off the consumer thread.
+
+  - Every request is handled on a small thread pool, so a quick 'select' never waits behind another request.
+    A handler may return a Future (e.g. SingleFlightAnalysis.submit for 'analyze'); the request then counts as
+    done when the Future completes.
+  - Offsets are committed manually (enable_auto_commit=False) and only up to the first request not yet done, so
+    a crash redelivers unfinished requests (at-least-once). Failed requests are counted and committed to not
+    block the partition.
+  - When `max_in_flight` requests are unfinished, the assigned partitions are paused until some complete.
+  - metrics() reports the consumer lag per partition and the latency (receive to done) per request name.
+  """
+  def __init__(self, consumer: KafkaConsumer, handlers: dict[str, Callable[[KafkaRequest], Future | None]],
+               workers: int = 4, max_in_flight: int = 100, window: int = 1000):
+    self.__consumer = consumer
+    self.__handlers = handlers
+    self.__executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='kafka-handler')
+    self.__max_in_flight = max_in_flight
+    self.__window = window
+    self.__done = queue.Queue()
+    # partition -> offsets received but not done yet / highest offset received
+    self.__pending = {}
+    self.__received = {}
+    self.__lock = threading.Lock()
+    self.__stats = {}
+    self.__lag = {}
+    self.__committed = {}
+    self.__paused = False
+
+  def __record(self, name: str, latency: float, error: bool):
+    with self.__lock:
+      stats = self.__stats.setdefault(name, {'count': 0, 'errors': 0, 'latencies': deque(maxlen=self.__window)})
+      stats['count'] += 1
+      stats['errors'] += int(error)
+      stats['latencies'].append(latency)
+
+  def __handle(self, partition, offset: int, values: dict, received: float):
+    def finish(error: BaseException | None = None):
+      if error is not None:
+        print(f"Error handling request at {partition.topic}[{partition.partition}]@{offset}: {error}")
+      self.__record(name, time.monotonic() - received, error is not None)
+      self.__done.put((partition, offset))
+
+    name = values.get('name') if isinstance(values, dict) else None
+    handler = self.__handlers.get(name)
+    if handler is None:
+      print(f"Unknown request name: {name}")
+      self.__done.put((partition, offset))
+      return
+    try:
+      request = KafkaRequest(id=values['id'], from_service=values['from_service'], name=name, payload=values['payload'])
+      result = handler(request)
+    except Exception as e:
+      finish(e)
+      return
+    if isinstance(result, Future):
+      result.add_done_callback(lambda future: finish(future.exception()))
+    else:
+      finish()
+
+  def __commit_done(self):
+    while True:
+      try:
+        partition, offset = self.__done.get_nowait()
+      except queue.Empty:
+        break
+      if partition in self.__pending:
+        self.__pending[partition].discard(offset)
+
+    assignment = self.__consumer.assignment()
+    for partition in [partition for partition in self.__pending if partition not in assignment]:
+      # Revoked by a rebalance: the new owner restarts from the last committed offset
+      del self.__pending[partition]
+      self.__received.pop(partition, None)
+      self.__committed.pop(partition, None)
+
+    offsets = {}
+    for partition, pending in self.__pending.items():
+      # Everything before the oldest unfinished request is done
+      commit = min(pending) if pending else self.__received[partition] + 1
+      if self.__committed.get(partition) != commit:
+        offsets[partition] = OffsetAndMetadata(commit, '', -1)
+    if offsets:
+      self.__consumer.commit(offsets)
+      for partition, offset in offsets.items():
+        self.__committed[partition] = offset.offset
+
+  def __apply_backpressure(self):
+    in_flight = sum(len(pending) for pending in self.__pending.values())
+    if not self.__paused and in_flight >= self.__max_in_flight:
+      self.__consumer.pause(*self.__consumer.assignment())
+      self.__paused = True
+    elif self.__paused and in_flight < self.__max_in_flight // 2:
+      self.__consumer.resume(*self.__consumer.paused())
+      self.__paused = False
+
+  def __update_lag(self):
+    lag = {}
+    for partition in self.__consumer.assignment():
+      highwater = self.__consumer.highwater(partition)
+      if highwater is None:
+        continue
+      # Before the first commit of this process, count from the first offset it received
+      committed = self.__committed.get(partition, min(self.__pending.get(partition) or [highwater]))
+      lag[f'{partition.topic}[{partition.partition}]'] = highwater - committed
+    with self.__lock:
+      self.__lag = lag
+
+  def poll_once(self, timeout_ms: int = 100):
+    """
+    Dispatches the new requests and commits the offsets of the finished ones.
+    """
+    records = self.__consumer.poll(timeout_ms=timeout_ms)
+    received = time.monotonic()
+    for partition, messages in records.items():
+      pending = self.__pending.setdefault(partition, set())
+      for message in messages:
+        pending.add(message.offset)
+        self.__received[partition] = message.offset
+        self.__executor.submit(self.__handle, partition, message.offset, message.value, received)
+    self.__commit_done()
+    self.__apply_backpressure()
+    self.__update_lag()
+
+  def run(self):
+    """
+    Consumes requests forever (the consumer is only used from this thread).
+    """
+    while True:
+      try:
+        self.poll_once()
+      except Exception as e:
+        print(f"Error in Kafka dispatcher: {e}")
+        time.sleep(1)
+
+  def metrics(self) -> dict:
+    with self.__lock:
+      requests = {}
+      for name, stats in self.__stats.items():
+        latencies = sorted(stats['latencies'])
+        requests[name] = {
+          'count': stats['count'],
+          'errors': stats['errors'],
+          'latency_ms': {
+            'p50': latencies[len(latencies) // 2] * 1000,
+            'p95': latencies[int(len(latencies) * 0.95)] * 1000,
+            'max': latencies[-1] * 1000
+          } if latencies else None
+        }
+      return {'lag': dict(self.__lag), 'paused': self.__paused, 'requests': requests}
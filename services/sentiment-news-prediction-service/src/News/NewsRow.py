@@ -0,0 +1,43 @@
+import base64
+
+class NewsRow:
+  """
+  Read-only news row as served by the API: plain slots filled straight from the query, with the
+  published time already formatted by the database.
+  """
+  __slots__ = ('id', 'subject', 'text', 'title', 'url', 'published_time', 'sentiment_score', 'created_at', 'last_modified_at', 'utc_published_at')
+
+  def __init__(self, id, subject, text, title, url, published_time, sentiment_score, created_at, last_modified_at, utc_published_at):
+    self.id = id
+    self.subject = subject
+    self.text = text
+    self.title = title
+    self.url = url
+    self.published_time = published_time
+    self.sentiment_score = sentiment_score
+    self.created_at = created_at
+    self.last_modified_at = last_modified_at
+    self.utc_published_at = utc_published_at
+
+  @property
+  def cursor(self) -> str:
+    """
+    Opaque keyset cursor (utc_published_at, id) pointing after this row.
+    """
+    return base64.urlsafe_b64encode(f'{self.utc_published_at!r}:{self.id}'.encode('ascii')).decode('ascii')
+
+  def __repr__(self):
+    return f"NewsRow(id={self.id}, subject={self.subject}, title={self.title}, published_time={self.published_time}, sentiment_score={self.sentiment_score})"
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+  """
+  Decodes a cursor made by NewsRow.cursor.
+
+  :param cursor: The cursor string.
+  :return: (utc_published_at, id) of the row the cursor points after.
+  """
+  try:
+    published_at, id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split(':')
+    return float(published_at), int(id)
+  except ValueError as e:
+    raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,42 @@
+class SentimentAggregate:
+  """
+  Sentiment of the news published in one hour or day, overall and per subject.
+  """
+  __slots__ = ('granularity', 'bucket_start', 'subject', 'news_count', 'mean_score', 'positive_count', 'negative_count', 'subjects')
+
+  def __init__(self, granularity: str, bucket_start: float, subject: str | None = None, news_count: int = 0,
+               mean_score: float = 0.0, positive_count: int = 0, negative_count: int = 0, subjects: list | None = None):
+    """
+    :param granularity: 'hour' or 'day'.
+    :param bucket_start: UTC epoch seconds of the start of the bucket.
+    :param subject: Subject of the news, None for all subjects.
+    :param subjects: SentimentAggregate of every subject in the bucket (their `subjects` is None).
+    """
+    self.granularity = granularity
+    self.bucket_start = bucket_start
+    self.subject = subject
+    self.news_count = news_count
+    self.mean_score = mean_score
+    self.positive_count = positive_count
+    self.negative_count = negative_count
+    self.subjects = subjects
+
+  @property
+  def neutral_count(self) -> int:
+    return self.news_count - self.positive_count - self.negative_count
+
+  def __repr__(self):
+    return f"SentimentAggregate(granularity={self.granularity}, bucket_start={self.bucket_start}, subject={self.subject}, news_count={self.news_count}, mean_score={self.mean_score})"
+
+  def __dict__(self):
+    return {
+      'granularity': self.granularity,
+      'bucket_start': self.bucket_start,
+      'subject': self.subject,
+      'news_count': self.news_count,
+      'mean_score': self.mean_score,
+      'positive_count': self.positive_count,
+      'negative_count': self.negative_count,
+      'neutral_count': self.neutral_count,
+      'subjects': [subject.__dict__() for subject in self.subjects] if self.subjects is not None else None
+    }
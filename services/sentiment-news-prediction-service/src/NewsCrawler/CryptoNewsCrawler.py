@@ -1,46 +1,115 @@
 from .NewsCrawler import NewsCrawler
 from .RawCryptoNews import RawCryptoNews
-import requests
+from .PolitenessScheduler import PolitenessScheduler
+import asyncio
+from typing import Callable, Optional
 from bs4 import BeautifulSoup
 from datetime import datetime, timezone
 import random
-import time
-from curl_cffi import requests
+from curl_cffi.requests import AsyncSession
+from curl_cffi.requests.exceptions import RequestException
 
-URL = "https://cryptonews.com/news/page/1/"
+URL = "https://cryptonews.com/news/page/{page}/"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 class CryptoNewsCrawler(NewsCrawler):
-  __url = URL
+  """
+  Crawls the cryptonews.com listing pages and the sub header of every listed article.
+
+  All requests share one async session; the politeness scheduler bounds the concurrency and the request
+  rate per host, and failed requests (network errors, 429, 5xx) are retried with exponential backoff.
+  """
   # __headers = { "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:142.0) Gecko/20100101 Firefox/142.0" }
 
-  def __init__(self):
+  def __init__(self, url: str = URL, pages: int = 1, max_concurrency: int = 4, requests_per_second: float = 2.0,
+               burst: int = 4, max_retries: int = 3, backoff: float = 0.5, timeout: float = 10):
     super().__init__()
+    self.__url = url
+    self.__pages = pages
+    self.__max_concurrency = max_concurrency
+    self.__requests_per_second = requests_per_second
+    self.__burst = burst
+    self.__max_retries = max_retries
+    self.__backoff = backoff
+    self.__timeout = timeout
+
+  def crawl(self, known_urls: Optional[Callable[[list[str]], set[str]]] = None) -> list:
+    return asyncio.run(self.crawl_async(known_urls))
+
+  async def crawl_async(self, known_urls: Optional[Callable[[list[str]], set[str]]] = None) -> list:
+    scheduler = PolitenessScheduler(
+      max_concurrency=self.__max_concurrency,
+      requests_per_second=self.__requests_per_second,
+      burst=self.__burst
+    )
+    async with AsyncSession(impersonate='firefox135', timeout=self.__timeout) as session:
+      listings = await asyncio.gather(*(
+        self.__fetch(session, scheduler, self.__url.format(page=page)) for page in range(1, self.__pages + 1)
+      ))
+
+      temp_news, seen = [], set()
+      for content in listings:
+        for news in self.__get_list_metadata(content):
+          if news['link'] not in seen:
+            seen.add(news['link'])
+            temp_news.append(news)
+
+      if known_urls and temp_news:
+        # Already stored articles are never downloaded, classified or scored again
+        known = known_urls([news['link'] for news in temp_news])
+        temp_news = [news for news in temp_news if news['link'] not in known]
+        print(f"Skipping {len(known)} already stored articles, {len(temp_news)} new")
+
+      sub_headers = await asyncio.gather(
+        *(self.__get_subheader_from_link(session, scheduler, news['link']) for news in temp_news),
+        return_exceptions=True
+      )
 
-  def crawl(self) -> list:
-    response = requests.get(url=CryptoNewsCrawler.__url, impersonate='firefox135', timeout=10) # headers=CryptoNewsCrawler.__headers
-
-    if (response.status_code != 200):
-      raise Exception(f"Failed to fetch news: {response.status_code}")
-
-    temp_news = self.__get_list_metadata(response.content)
     res = []
-    for news in temp_news:
-      time.sleep(random.uniform(0.5, 2))
-      sub_header = self.__get_subheader_from_link(url=news['link'])
+    for news, sub_header in zip(temp_news, sub_headers):
+      if isinstance(sub_header, Exception):
+        print(f"Skipping {news['link']}: {sub_header}")
+        continue
       res.append( RawCryptoNews(title=news['title'], sub_header=sub_header, published_time=news['published_time'], url=news['link']) )
     return res
 
-  def __get_subheader_from_link(self, url: str) -> str:
+  async def __fetch(self, session: AsyncSession, scheduler: PolitenessScheduler, url: str) -> bytes:
     """
-    Extract content from the raw HTML content.
+    GET a page, retrying network errors and retryable status codes with exponential backoff and jitter.
 
-    :param raw_html: The raw HTML content to parse.
-    :return: A list of CryptoNews objects containing the subject, text, and title.
+    :param url: The URL to fetch.
+    :return: The response body.
     """
-    response = requests.get(url=url, impersonate='firefox135', timeout=10)
-    if (response.status_code != 200):
-      raise Exception(f"Failed to fetch news content: {response.status_code}")
-    soup = BeautifulSoup(response.content, 'html.parser')
+    for attempt in range(self.__max_retries + 1):
+      retry_after = None
+      try:
+        async with scheduler.slot(url):
+          response = await session.get(url)
+        if response.status_code == 200:
+          return response.content
+        if response.status_code not in RETRY_STATUSES:
+          raise Exception(f"Failed to fetch {url}: {response.status_code}")
+        error = Exception(f"Failed to fetch {url}: {response.status_code}")
+        retry_after = response.headers.get('Retry-After')
+      except RequestException as e:
+        error = e
+
+      if attempt == self.__max_retries:
+        raise error
+      delay = self.__backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+      if retry_after and retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+      await asyncio.sleep(delay)
+
+  async def __get_subheader_from_link(self, session: AsyncSession, scheduler: PolitenessScheduler, url: str) -> str:
+    """
+    Extract the sub header of an article.
+
+    :param url: The URL of the article.
+    :return: The sub header (or first paragraph) of the article.
+    """
+    content = await self.__fetch(session, scheduler, url)
+    soup = BeautifulSoup(content, 'html.parser')
     news = soup.find('div', class_='single-post__subheader')
     if not news:
       news = soup.find('p')
@@ -70,19 +139,17 @@ class CryptoNewsCrawler(NewsCrawler):
 
     temp_news = []
     for news in all_news:
-      soup_news = BeautifulSoup(str(news), 'html.parser')
-
-      title_div = soup_news.find('div', class_='archive-template-latest-news__title')
+      title_div = news.find('div', class_='archive-template-latest-news__title')
       title = title_div.text.strip()
 
-      published_time_div = soup_news.find('div', class_='archive-template-latest-news__time')
+      published_time_div = news.find('div', class_='archive-template-latest-news__time')
       published_time = published_time_div['data-utctime']
 
-      link = soup_news.find('a')
+      link = news.find('a')
 
       temp_news.append({
         'title': title,
         'link': link['href'],
         'published_time': self.__retrieve_published_timestamp(published_time)
       })
-    return temp_news
\ No newline at end of file
+    return temp_news
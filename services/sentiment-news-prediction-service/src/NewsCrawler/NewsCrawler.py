@@ -1,5 +1,13 @@
+from typing import Callable, Optional
 from NewsCrawler.IRawNews import IRawNews
 
 class NewsCrawler:
-  def crawl(self) -> list[IRawNews]:
+  def crawl(self, known_urls: Optional[Callable[[list[str]], set[str]]] = None) -> list[IRawNews]:
+    """
+    Crawl the latest news.
+
+    :param known_urls: Optional function returning which of the given URLs are already stored;
+                       those articles are dropped right after the listing is parsed, before their bodies are fetched.
+    :return: A list of raw news.
+    """
     pass
\ No newline at end of file
@@ -0,0 +1,49 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+class PolitenessScheduler:
+  """
+  Per-host politeness for async crawling: at most `max_concurrency` requests in flight per host and a
+  token bucket allowing `requests_per_second` on average with bursts of up to `burst` requests.
+  """
+  def __init__(self, max_concurrency: int = 4, requests_per_second: float = 2.0, burst: int = 4):
+    self.__max_concurrency = max_concurrency
+    self.__rate = requests_per_second
+    self.__burst = burst
+    self.__hosts = {}
+
+  def __host_state(self, host: str) -> dict:
+    state = self.__hosts.get(host)
+    if state is None:
+      state = self.__hosts[host] = {
+        'semaphore': asyncio.Semaphore(self.__max_concurrency),
+        'lock': asyncio.Lock(),
+        'tokens': float(self.__burst),
+        'updated_at': time.monotonic()
+      }
+    return state
+
+  async def __take_token(self, state: dict):
+    async with state['lock']:
+      while True:
+        now = time.monotonic()
+        state['tokens'] = min(self.__burst, state['tokens'] + (now - state['updated_at']) * self.__rate)
+        state['updated_at'] = now
+        if state['tokens'] >= 1:
+          state['tokens'] -= 1
+          return
+        await asyncio.sleep((1 - state['tokens']) / self.__rate)
+
+  @asynccontextmanager
+  async def slot(self, url: str):
+    """
+    Waits until a request to the host of `url` is allowed.
+
+    :param url: URL about to be requested.
+    """
+    state = self.__host_state(urlsplit(url).netloc)
+    async with state['semaphore']:
+      await self.__take_token(state)
+      yield
@@ -24,17 +24,44 @@ class INewsRepository(ABC):
   #   """
   #   ...
   
-  # @abstractmethod
-  # def get_by_timeframe(self, start, end) -> list:
-  #   """
-  #   Fetch news within a specific timeframe.
+  @abstractmethod
+  def get_page(self, limit: int = 10, after: tuple[float, int] | None = None, subject: str | None = None,
+               sentiment_score: int | None = None) -> list:
+    """
+    Fetch the latest news by keyset pagination, newest first.
+
+    :param limit: The maximum number of news items to fetch.
+    :param after: (utc_published_at, id) of the last item of the previous page.
+    :param subject: Only fetch the news of this subject.
+    :param sentiment_score: Only fetch the news with this sentiment score (-1, 0 or 1).
+    :return: A list of NewsRow.
+    """
+    ...
+
+  @abstractmethod
+  def get_by_timeframe(self, start: float, end: float) -> list:
+    """
+    Fetch news within a specific timeframe.
+
+    :param start: The start of the timeframe (UTC epoch seconds, inclusive).
+    :param end: The end of the timeframe (UTC epoch seconds, exclusive).
+    :return: A list of news items within the specified timeframe, oldest first.
+    """
+    ...
+
+  @abstractmethod
+  def get_sentiment_aggregates(self, start: float, end: float, granularity: str = 'hour', subject: str | None = None) -> list:
+    """
+    Fetch the sentiment of the news per hour or day.
+
+    :param start: The start of the timeframe (UTC epoch seconds, inclusive).
+    :param end: The end of the timeframe (UTC epoch seconds, exclusive).
+    :param granularity: 'hour' or 'day'.
+    :param subject: Only count the news of this subject.
+    :return: A list of SentimentAggregate with a per-subject breakdown, oldest first.
+    """
+    ...
 
-  #   :param start: The start datetime for the timeframe.
-  #   :param end: The end datetime for the timeframe.
-  #   :return: A list of news items within the specified timeframe.
-  #   """
-  #   ...
-  
   @abstractmethod
   def get_n_latest(self, n: int) -> list:
     """
@@ -49,6 +76,16 @@ class INewsRepository(ABC):
   def get_by_url(self, url: str):
     ...
 
+  @abstractmethod
+  def get_existing_urls(self, urls: list[str]) -> set[str]:
+    """
+    Find which of the given URLs are already stored.
+
+    :param urls: URLs to look up.
+    :return: The subset of urls that already exist.
+    """
+    ...
+
   @abstractmethod
   def create(self, news) -> int:
     """
@@ -60,7 +97,13 @@ class INewsRepository(ABC):
     ...
 
   @abstractmethod
-  def create_many(self, news_list) -> None:
+  def create_many(self, news_list) -> list[int]:
+    """
+    Create many news items, skipping those whose URL is already stored.
+
+    :param news_list: A list of INews to be created.
+    :return: The IDs of the newly created news items.
+    """
     ...
   
   # @abstractmethod
@@ -1,7 +1,24 @@
 from NewsRepository.INewsRepository import INewsRepository
 from News.CryptoNews import CryptoNews
+from News.SentimentAggregate import SentimentAggregate
+from News.NewsRow import NewsRow
 from psycopg_pool import ConnectionPool
 
+NEWS_COLUMNS = "title, subject, text, utc_published_at, sentiment_score, url"
+# Rows per multi-row INSERT (6 parameters each, well below the 65535 parameter limit)
+INSERT_BATCH_SIZE = 1000
+# Above this many rows, create_many streams them with COPY into a staging table instead
+COPY_THRESHOLD = 5000
+# Columns of NewsRow: the published time is formatted and the timestamps converted to epoch seconds in SQL
+NEWS_ROW_COLUMNS = """
+    id, subject, text, title, url,
+    to_char(to_timestamp(utc_published_at) AT TIME ZONE 'UTC', 'DD/MM/YYYY HH24:MI:SS'),
+    sentiment_score, extract(epoch FROM created_at)::float, extract(epoch FROM last_modified_at)::float,
+    utc_published_at
+"""
+# Bucket sizes of the sentiment_aggregates table, in seconds
+GRANULARITIES = {'hour': 3600, 'day': 86400}
+
 class NewsRepositoryPostgres(INewsRepository):
     """
     Implementation of the News Repository using PostgreSQL.
@@ -26,21 +43,58 @@ class NewsRepositoryPostgres(INewsRepository):
                 _ = cursor.fetchone()
                 print(f"Database connected successfully")
     
-    def get_all(self, page: int = 1, limit: int = 10) -> list[CryptoNews]:
+    def get_all(self, page: int = 1, limit: int = 10) -> list[NewsRow]:
+        """
+        Page of the latest news by page number (OFFSET); get_page scales to deep pages.
+        """
         offset = (limit * (page - 1))
         with self.__pool.connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(
-                    """
-                        SELECT subject, text, title, url, utc_published_at, sentiment_score, created_at, last_modified_at, id
+                    f"""
+                        SELECT {NEWS_ROW_COLUMNS}
                         FROM news
-                        ORDER BY utc_published_at DESC
+                        ORDER BY utc_published_at DESC, id DESC
                         LIMIT %s OFFSET %s;
                     """,
                     (limit, offset,)
                 )
                 news_items = cursor.fetchall()
-        return [CryptoNews(*item) for item in news_items] if news_items else []
+        return [NewsRow(*item) for item in news_items]
+
+    def get_page(self, limit: int = 10, after: tuple[float, int] | None = None, subject: str | None = None,
+                 sentiment_score: int | None = None) -> list[NewsRow]:
+        """
+        Page of the latest news by keyset: the rows after `after` = (utc_published_at, id) in
+        (utc_published_at DESC, id DESC) order. Every page is one index range scan, however deep.
+        """
+        conditions, params = [], []
+        if after is not None:
+            conditions.append("(utc_published_at, id) < (%s, %s)")
+            params.extend(after)
+        if subject is not None:
+            conditions.append("subject = %s")
+            params.append(subject)
+        if sentiment_score is not None:
+            # Literal value so the planner can pick the partial index of that score
+            if sentiment_score not in (-1, 0, 1):
+                raise ValueError(f"Invalid sentiment score: {sentiment_score}")
+            conditions.append(f"sentiment_score = {int(sentiment_score)}")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.__pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                        SELECT {NEWS_ROW_COLUMNS}
+                        FROM news
+                        {where}
+                        ORDER BY utc_published_at DESC, id DESC
+                        LIMIT %s;
+                    """,
+                    (*params, limit,)
+                )
+                news_items = cursor.fetchall()
+        return [NewsRow(*item) for item in news_items]
 
     def get_by_id(self, id: int) -> CryptoNews | None:
         with self.__pool.connection() as conn:
@@ -70,11 +124,74 @@ class NewsRepositoryPostgres(INewsRepository):
                 news_item = cursor.fetchone()
         return CryptoNews(*news_item) if news_item else None
 
-    def get_by_timeframe(self, start, end) -> list[CryptoNews]:
-        # Implementation for fetching news within a specific timeframe
+    def get_existing_urls(self, urls: list[str]) -> set[str]:
+        if not urls:
+            return set()
         with self.__pool.connection() as conn:
             with conn.cursor() as cursor:
-                pass
+                cursor.execute(
+                    """
+                        SELECT url
+                        FROM news
+                        WHERE url = ANY(%s);
+                    """,
+                    (list(urls),)
+                )
+                rows = cursor.fetchall()
+        return {row[0] for row in rows}
+
+    def get_by_timeframe(self, start: float, end: float) -> list[CryptoNews]:
+        with self.__pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                        SELECT subject, text, title, url, utc_published_at, sentiment_score, created_at, last_modified_at, id
+                        FROM news
+                        WHERE utc_published_at >= %s AND utc_published_at < %s
+                        ORDER BY utc_published_at;
+                    """,
+                    (start, end,)
+                )
+                news_items = cursor.fetchall()
+        return [CryptoNews(*item) for item in news_items] if news_items else []
+
+    def get_sentiment_aggregates(self, start: float, end: float, granularity: str = 'hour', subject: str | None = None) -> list[SentimentAggregate]:
+        """
+        Read the buckets starting in [start, end) from the sentiment_aggregates table (one range scan of its
+        primary key), oldest first; buckets without news are left out.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}, expected one of {list(GRANULARITIES)}")
+        with self.__pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                        SELECT bucket_start, subject, news_count, score_sum, positive_count, negative_count
+                        FROM sentiment_aggregates
+                        WHERE granularity = %s AND bucket_start >= %s AND bucket_start < %s
+                          AND news_count > 0 AND (%s::text IS NULL OR subject = %s)
+                        ORDER BY bucket_start, subject;
+                    """,
+                    (granularity, start, end, subject, subject,)
+                )
+                rows = cursor.fetchall()
+
+        buckets = {}
+        for bucket_start, row_subject, news_count, score_sum, positive_count, negative_count in rows:
+            bucket = buckets.get(bucket_start)
+            if bucket is None:
+                bucket = buckets[bucket_start] = SentimentAggregate(granularity, bucket_start, subjects=[])
+            bucket.subjects.append(SentimentAggregate(
+                granularity, bucket_start, row_subject, news_count, score_sum / news_count, positive_count, negative_count
+            ))
+            bucket.news_count += news_count
+            bucket.mean_score += score_sum
+            bucket.positive_count += positive_count
+            bucket.negative_count += negative_count
+        for bucket in buckets.values():
+            # mean_score held the sum of the scores until now
+            bucket.mean_score /= bucket.news_count
+        return list(buckets.values())
 
     def get_n_latest(self, n: int) -> CryptoNews:
         with self.__pool.connection() as conn:
@@ -112,9 +229,16 @@ class NewsRepositoryPostgres(INewsRepository):
                 news_id = cursor.fetchone()[0]
         return news_id
     
-    def create_many(self, news_list: list[CryptoNews]) -> None:
-        data_to_insert = [
-            (
+    def create_many(self, news_list: list[CryptoNews]) -> list[int]:
+        """
+        Insert many news items in one transaction, skipping URLs that already exist (ON CONFLICT DO NOTHING).
+        Small lists use one multi-row INSERT per batch; large backfills are streamed with COPY into a
+        staging table and inserted with a single INSERT ... SELECT.
+
+        :return: The IDs of the inserted news items (existing URLs are not included).
+        """
+        data_to_insert = list({
+            news.url: (
                 news.title,
                 news.subject,
                 news.text,
@@ -122,25 +246,51 @@ class NewsRepositoryPostgres(INewsRepository):
                 news.sentiment_score if news.sentiment_score is not None else 0,
                 news.url
             ) for news in news_list
-        ]
-
-        while 1:
-            data = data_to_insert[-1]
-            if self.get_by_url(data[5]):
-                # url already exists, remove it from the list
-                data_to_insert.pop(-1)
-            else:
-                break
-
+        }.values())
         if not data_to_insert:
-            return
+            return []
+
+        inserted_ids = []
         with self.__pool.connection() as conn:
             with conn.cursor() as cursor:
-                sql = """
-                    INSERT INTO news (title, subject, text, utc_published_at, sentiment_score, url)
-                    VALUES (%s, %s, %s, %s, %s, %s);
-                """
-                cursor.executemany(sql, data_to_insert)
+                if len(data_to_insert) > COPY_THRESHOLD:
+                    inserted_ids = self.__copy_many(cursor, data_to_insert)
+                else:
+                    for start in range(0, len(data_to_insert), INSERT_BATCH_SIZE):
+                        batch = data_to_insert[start:start + INSERT_BATCH_SIZE]
+                        placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(batch))
+                        cursor.execute(
+                            f"""
+                                INSERT INTO news ({NEWS_COLUMNS})
+                                VALUES {placeholders}
+                                ON CONFLICT (url) DO NOTHING
+                                RETURNING id;
+                            """,
+                            [value for row in batch for value in row]
+                        )
+                        inserted_ids.extend(row[0] for row in cursor.fetchall())
+        return inserted_ids
+
+    def __copy_many(self, cursor, data_to_insert: list[tuple]) -> list[int]:
+        cursor.execute(
+            """
+                CREATE TEMP TABLE news_staging (
+                    title TEXT, subject TEXT, text TEXT, utc_published_at FLOAT, sentiment_score FLOAT, url TEXT
+                ) ON COMMIT DROP;
+            """
+        )
+        with cursor.copy(f"COPY news_staging ({NEWS_COLUMNS}) FROM STDIN") as copy:
+            for row in data_to_insert:
+                copy.write_row(row)
+        cursor.execute(
+            f"""
+                INSERT INTO news ({NEWS_COLUMNS})
+                SELECT {NEWS_COLUMNS} FROM news_staging
+                ON CONFLICT (url) DO NOTHING
+                RETURNING id;
+            """
+        )
+        return [row[0] for row in cursor.fetchall()]
 
     def update(self, options: dict) -> bool:
         # Implementation for updating an existing news item
@@ -0,0 +1,50 @@
+from .IPredictModel import IPredictModel
+from PredictionCache.IPredictionCache import IPredictionCache
+import hashlib
+import numpy as np
+
+class PredictModelCached(IPredictModel):
+  """
+  Predict model answering already seen texts from a persistent cache.
+
+  The wrapped predictor must expose `predict_logits(texts)` and `model_version` (e.g. PredictModelFinBert).
+  Texts are keyed by the SHA-256 of their content and entries are tagged with the model version, so a
+  change of weights or settings starts a new cache instead of serving stale scores. Only texts missing
+  from the cache reach the model, each distinct text once.
+  """
+  def __init__(self, predictor, cache: IPredictionCache):
+    self.__predictor = predictor
+    self.__cache = cache
+    self.hits = 0
+    self.misses = 0
+
+  @staticmethod
+  def __hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+  def predict(self, input_data):
+    """
+    Predicts the output based on the input data.
+
+    :param data: Input data for prediction.
+    :return: Predicted output.
+    """
+    texts = list(input_data)
+    hashes = [self.__hash(text) for text in texts]
+    model_version = self.__predictor.model_version
+    results = self.__cache.get_many(model_version, list(set(hashes)))
+
+    missing = {}
+    for text, text_hash in zip(texts, hashes):
+      if text_hash not in results:
+        missing.setdefault(text_hash, text)
+    if missing:
+      logits = self.__predictor.predict_logits(list(missing.values()))
+      computed = {text_hash: (int(row.argmax()), row.tolist()) for text_hash, row in zip(missing.keys(), logits)}
+      self.__cache.put_many(model_version, computed)
+      results.update(computed)
+
+    self.hits += len(texts) - len(missing)
+    self.misses += len(missing)
+    print(f"Prediction cache: {len(texts) - len(missing)} hits, {len(missing)} computed")
+    return np.array([results[text_hash][0] for text_hash in hashes], dtype=np.int64)
@@ -1,22 +1,132 @@
 from .IPredictModel import IPredictModel
+from .QuantizationCheck import load_holdout, compare_models, passes
+import hashlib
 import os
+import numpy as np
 import torch
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
 
 class PredictModelFinBert(IPredictModel):
   """
   Predict model using FinBERT for sentiment analysis.
+
+  Texts are sorted by token length and run in batches of at most `batch_size`, so a long article only pads
+  the texts of similar length in its own batch and memory stays bounded for large backfills.
+
+  With quantize=True the Linear layers are converted to dynamic int8 on CPU. When a held-out set is given,
+  the int8 model is only kept if its labels stay close enough to the fp32 model, otherwise fp32 is used.
+
+  `model_version` identifies the weights and settings the logits come from, so cached scores can be
+  invalidated when the model changes.
   """
-  def __init__(self):
+  def __init__(self, quantize=False, holdout_path=None, min_agreement=0.98, max_accuracy_drop=0.01,
+               batch_size=32, max_length=512, num_threads=None):
+    self.__quantize = quantize
+    self.__batch_size = batch_size
+    self.__max_length = max_length
+    if num_threads:
+      torch.set_num_threads(num_threads)
     self.__setup()
+    if self.__reference_model is not None:
+      if holdout_path:
+        self.__check_quantization(holdout_path, min_agreement, max_accuracy_drop)
+      else:
+        print('FinBERT int8 enabled without a held-out set, accuracy was not checked')
+      self.__reference_model = None
+    self.__model_version = self.__version()
 
   def __setup(self):
     self.__device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 
     model_path = os.path.join(os.path.dirname(__file__), '../../model-finbert-sentiment')
     self.__model = AutoModelForSequenceClassification.from_pretrained(model_path).to(self.__device)
+    self.__model.eval()
+    self.__reference_model = None
+    self.__quantized = False
+
+    if self.__quantize:
+      if self.__device.type != 'cpu':
+        print(f'Dynamic int8 quantization only runs on CPU, using fp32 FinBERT on {self.__device}')
+      else:
+        self.__reference_model = self.__model
+        self.__model = torch.ao.quantization.quantize_dynamic(self.__model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.__quantized = True
 
     self.__tokenizer = AutoTokenizer.from_pretrained(model_path)
+    self.__weights_hash = self.__hash_files(model_path)
+
+  def __hash_files(self, path):
+    """
+    Hash of the content of every file (weights, config, vocabulary) in the model folder.
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+      dirs.sort()
+      for name in sorted(files):
+        file_path = os.path.join(root, name)
+        digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+        with open(file_path, 'rb') as f:
+          for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+  def __version(self):
+    # int8 and truncation change the logits, so they are part of the version
+    return f"finbert-{self.__weights_hash}-{'int8' if self.__quantized else 'fp32'}-len{self.__max_length}"
+
+  def __check_quantization(self, holdout_path, min_agreement, max_accuracy_drop):
+    texts, labels = load_holdout(holdout_path)
+    reference_model, quantized_model = self.__reference_model, self.__model
+    report = compare_models(
+      reference=lambda batch: self.__predict_with(reference_model, batch),
+      candidate=lambda batch: self.__predict_with(quantized_model, batch),
+      texts=texts,
+      labels=labels
+    )
+    if passes(report, min_agreement=min_agreement, max_accuracy_drop=max_accuracy_drop):
+      print(f'Using int8 FinBERT: {report}')
+    else:
+      print(f'int8 FinBERT failed the accuracy check, using fp32: {report}')
+      self.__model = reference_model
+      self.__quantized = False
+
+  def __predict_with(self, model, input_data):
+    return self.__logits_with(model, input_data).argmax(axis=1)
+
+  def __logits_with(self, model, input_data):
+    """
+    Logits of every text, computed in length-sorted batches and returned in the input order.
+    """
+    texts = list(input_data)
+    logits = np.zeros((len(texts), model.config.num_labels), dtype=np.float32)
+    if not texts:
+      return logits
+    encoded = self.__tokenizer(texts, truncation=True, max_length=self.__max_length)
+    order = np.argsort([len(ids) for ids in encoded['input_ids']], kind='stable')
+    for start in range(0, len(order), self.__batch_size):
+      indices = order[start:start + self.__batch_size]
+      batch = self.__tokenizer.pad(
+        {key: [encoded[key][i] for i in indices] for key in encoded.keys()},
+        padding=True,
+        return_tensors='pt'
+      )
+      with torch.inference_mode():
+        inputs = {key: value.to(self.__device) for key, value in batch.items()}
+        logits[indices] = model(**inputs).logits.float().cpu().numpy()
+    return logits
+
+  @property
+  def model_version(self):
+    return self.__model_version
+
+  def predict_logits(self, input_data):
+    """
+    Computes the logits of every input text.
+
+    :param input_data: List of texts.
+    :return: Array of shape (len(input_data), number of labels).
+    """
+    return self.__logits_with(self.__model, input_data)
 
   def predict(self, input_data):
     """
@@ -25,12 +135,4 @@ class PredictModelFinBert(IPredictModel):
     :param data: Input data for prediction.
     :return: Predicted output.
     """
-    # Placeholder for actual prediction logic
-    tokenized_data = self.__tokenizer(list(input_data), padding=True, truncation=True, return_tensors='pt').to(self.__device)
-    self.__model.eval()
-    with torch.no_grad():
-      inputs = {key: value.to(self.__device) for key, value in tokenized_data.items()}
-      outputs = self.__model(**inputs)
-      logits = outputs.logits
-      _, predicted_labels = torch.max(logits, 1)
-    return predicted_labels.cpu().numpy()
\ No newline at end of file
+    return self.__predict_with(self.__model, input_data)
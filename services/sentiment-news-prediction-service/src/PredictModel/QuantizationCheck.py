@@ -0,0 +1,58 @@
+import csv
+import numpy as np
+
+def load_holdout(path):
+  """
+  Loads a held-out set from a CSV file with a `text` column and an optional `label` column.
+
+  :param path: Path of the CSV file.
+  :return: (texts, labels) where labels is None when the file has no labels.
+  """
+  with open(path, newline='', encoding='utf-8') as f:
+    rows = list(csv.DictReader(f))
+  texts = [row['text'] for row in rows]
+  labels = [int(row['label']) for row in rows] if rows and rows[0].get('label') not in (None, '') else None
+  return texts, labels
+
+def compare_models(reference, candidate, texts, labels=None, batch_size=32):
+  """
+  Compares the labels predicted by a candidate model (e.g. int8) with a reference model (fp32).
+
+  :param reference: Function predicting the labels of a list of texts with the reference model.
+  :param candidate: Function predicting the labels of a list of texts with the candidate model.
+  :param texts: Held-out texts.
+  :param labels: Optional true labels of the texts.
+  :param batch_size: Number of texts per predict call.
+  :return: Report with the agreement between both models and their accuracy when labels are given.
+  """
+  reference_labels, candidate_labels = [], []
+  for start in range(0, len(texts), batch_size):
+    batch = texts[start:start + batch_size]
+    reference_labels.extend(reference(batch))
+    candidate_labels.extend(candidate(batch))
+  reference_labels = np.asarray(reference_labels)
+  candidate_labels = np.asarray(candidate_labels)
+
+  report = {
+    'samples': len(texts),
+    'agreement': float((reference_labels == candidate_labels).mean()) if len(texts) else 1.0,
+  }
+  if labels is not None and len(texts):
+    labels = np.asarray(labels)
+    report['accuracy_reference'] = float((reference_labels == labels).mean())
+    report['accuracy_candidate'] = float((candidate_labels == labels).mean())
+  return report
+
+def passes(report, min_agreement=0.98, max_accuracy_drop=0.01):
+  """
+  Whether the candidate model may replace the reference model.
+
+  :param report: Report returned by compare_models.
+  :param min_agreement: Minimum share of texts where both models predict the same label.
+  :param max_accuracy_drop: Maximum accuracy loss against the true labels, when available.
+  """
+  if report['agreement'] < min_agreement:
+    return False
+  if 'accuracy_candidate' in report:
+    return report['accuracy_candidate'] >= report['accuracy_reference'] - max_accuracy_drop
+  return True
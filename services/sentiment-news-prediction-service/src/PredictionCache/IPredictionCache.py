@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+
+class IPredictionCache(ABC):
+  """
+  Interface for a persistent cache of model outputs keyed by text hash and model version.
+  """
+  @abstractmethod
+  def get_many(self, model_version: str, text_hashes: list[bytes]) -> dict:
+    """
+    Fetch the cached outputs of the given texts.
+
+    :param model_version: Version of the model the outputs were computed with.
+    :param text_hashes: Hashes of the texts to look up.
+    :return: Mapping text hash -> (label, logits) for the texts found in the cache.
+    """
+    ...
+
+  @abstractmethod
+  def put_many(self, model_version: str, entries: dict):
+    """
+    Store the outputs of new texts; existing entries are kept.
+
+    :param model_version: Version of the model the outputs were computed with.
+    :param entries: Mapping text hash -> (label, logits).
+    :return: None
+    """
+    ...
@@ -0,0 +1,52 @@
+from PredictionCache.IPredictionCache import IPredictionCache
+from psycopg_pool import ConnectionPool
+
+class PredictionCachePostgres(IPredictionCache):
+  """
+  Prediction cache stored in the `prediction_cache` table, next to the news it was computed for.
+  Entries of older model versions are never read; delete_other_versions removes them.
+  """
+  def __init__(self, pool: ConnectionPool):
+    self.__pool = pool
+
+  def get_many(self, model_version: str, text_hashes: list[bytes]) -> dict:
+    if not text_hashes:
+      return {}
+    with self.__pool.connection() as conn:
+      with conn.cursor() as cursor:
+        cursor.execute(
+          """
+            SELECT text_hash, label, logits
+            FROM prediction_cache
+            WHERE model_version = %s AND text_hash = ANY(%s);
+          """,
+          (model_version, list(text_hashes),)
+        )
+        rows = cursor.fetchall()
+    return {bytes(text_hash): (label, logits) for text_hash, label, logits in rows}
+
+  def put_many(self, model_version: str, entries: dict):
+    if not entries:
+      return
+    with self.__pool.connection() as conn:
+      with conn.cursor() as cursor:
+        cursor.executemany(
+          """
+            INSERT INTO prediction_cache (model_version, text_hash, label, logits)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (model_version, text_hash) DO NOTHING;
+          """,
+          [(model_version, text_hash, int(label), [float(value) for value in logits]) for text_hash, (label, logits) in entries.items()]
+        )
+
+  def delete_other_versions(self, model_version: str) -> int:
+    """
+    Delete the entries computed by any other model version.
+
+    :param model_version: Version to keep.
+    :return: Number of deleted entries.
+    """
+    with self.__pool.connection() as conn:
+      with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM prediction_cache WHERE model_version <> %s;", (model_version,))
+        return cursor.rowcount
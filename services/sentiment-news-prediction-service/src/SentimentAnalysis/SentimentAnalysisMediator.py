@@ -17,7 +17,7 @@ class SentimentAnalysisMediator(ISentimentAnalysis):
     self.__repository = repository
 
   def __crawl_news(self):
-    return self.__crawler.crawl()
+    return self.__crawler.crawl(known_urls=self.__repository.get_existing_urls)
   
   def __get_processed_news(self, raw_news: list[IRawNews]) -> list[CryptoNews]:
     processed_news = []
@@ -59,7 +59,9 @@ class SentimentAnalysisMediator(ISentimentAnalysis):
     """
     # 1. crawl the raw news
     raw_news = self.__crawl_news()
-
+    if not raw_news:
+      print("No new news to process")
+      return
 
     # 2. process the raw news
     processed_news = self.__get_processed_news(raw_news)
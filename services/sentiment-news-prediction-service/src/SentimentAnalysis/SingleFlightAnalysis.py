@@ -0,0 +1,56 @@
+from SentimentAnalysis.ISentimentAnalysis import ISentimentAnalysis
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+class SingleFlightAnalysis(ISentimentAnalysis):
+  """
+  Runs the wrapped analysis on its own worker thread, at most one run at a time.
+
+  A request made while a run is in progress joins that run instead of starting another one, so
+  duplicate 'analyze' requests and the hourly schedule collapse into a single crawl.
+  """
+  def __init__(self, analysis: ISentimentAnalysis):
+    self.__analysis = analysis
+    self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analysis')
+    self.__lock = threading.Lock()
+    self.__current: Future | None = None
+    self.__runs = 0
+    self.__joined = 0
+    self.__last_duration = None
+
+  def __run(self):
+    started = time.monotonic()
+    try:
+      return self.__analysis.process()
+    finally:
+      self.__last_duration = time.monotonic() - started
+
+  def submit(self) -> Future:
+    """
+    Starts an analysis, or joins the one in progress.
+
+    :return: Future completed when the (joined) analysis has finished.
+    """
+    with self.__lock:
+      if self.__current is not None and not self.__current.done():
+        self.__joined += 1
+        return self.__current
+      self.__runs += 1
+      self.__current = self.__executor.submit(self.__run)
+      return self.__current
+
+  def process(self):
+    """
+    Analyze the sentiment of the latest news, waiting for the run to finish.
+    """
+    return self.submit().result()
+
+  def metrics(self) -> dict:
+    with self.__lock:
+      return {
+        'running': self.__current is not None and not self.__current.done(),
+        'runs': self.__runs,
+        'joined': self.__joined,
+        'last_duration_seconds': self.__last_duration
+      }
@@ -9,22 +9,51 @@ load_dotenv()
 ###############################################
 # initialize components
 from SentimentAnalysis.SentimentAnalysisMediator import SentimentAnalysisMediator
+from SentimentAnalysis.SingleFlightAnalysis import SingleFlightAnalysis
 from SentimentSelector.SentimentSelectorMediator import SentimentSelectorMediator
 from NewsCrawler.CryptoNewsCrawler import CryptoNewsCrawler
 from AIService.GeminiService import GeminiService
+from AIService.RateLimitedService import RateLimitedService
 from DataProcessor.DataProcessorGemini import DataProcessorGemini
+from DataProcessor.DataProcessorLocal import DataProcessorLocal
 from PredictModel.PredictModelFinBert import PredictModelFinBert
+from PredictModel.PredictModelCached import PredictModelCached
+from PredictionCache.PredictionCachePostgres import PredictionCachePostgres
 from NewsRepository.NewsRepositoryPostgres import NewsRepositoryPostgres
+from Database.SchemaMigrator import SchemaMigrator
 from psycopg_pool import ConnectionPool
 from kafka import KafkaProducer, KafkaConsumer
 import json
 from KafkaEvent.KafkaRequest import KafkaRequest
 from KafkaEvent.KafkaResponse import KafkaResponse
+from KafkaEvent.KafkaDispatcher import KafkaDispatcher
 
-crawler = CryptoNewsCrawler()
-ai_service = GeminiService(api_key=os.getenv('GEMINI_API_KEY'))
+crawler = CryptoNewsCrawler(
+  pages=int(os.getenv('CRAWLER_PAGES', '1')),
+  max_concurrency=int(os.getenv('CRAWLER_MAX_CONCURRENCY', '4')),
+  requests_per_second=float(os.getenv('CRAWLER_REQUESTS_PER_SECOND', '2'))
+)
+ai_service = RateLimitedService(
+  service=GeminiService(api_key=os.getenv('GEMINI_API_KEY')),
+  requests_per_minute=float(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '10')),
+  tokens_per_minute=float(os.getenv('GEMINI_TOKENS_PER_MINUTE', '250000')),
+  requests_per_day=float(os.getenv('GEMINI_REQUESTS_PER_DAY', '250')),
+  cache_dir=os.getenv('GEMINI_CACHE_DIR')
+)
 processor = DataProcessorGemini(service=ai_service)
-predictor = PredictModelFinBert()
+if os.getenv('SUBJECT_CLASSIFIER', 'local').lower() == 'local':
+  # Gemini only labels the news the local classifier is unsure about
+  processor = DataProcessorLocal(
+    fallback=processor,
+    min_confidence=float(os.getenv('SUBJECT_MIN_CONFIDENCE', '0.6'))
+  )
+predictor = PredictModelFinBert(
+  quantize=os.getenv('FINBERT_QUANTIZE', 'false').lower() == 'true',
+  holdout_path=os.getenv('FINBERT_HOLDOUT_PATH'),
+  min_agreement=float(os.getenv('FINBERT_MIN_AGREEMENT', '0.98')),
+  batch_size=int(os.getenv('FINBERT_BATCH_SIZE', '32')),
+  num_threads=int(os.getenv('FINBERT_NUM_THREADS', '0')) or None
+)
 
 DB_CONNECTION_STRING = os.environ.get("DATABASE_URL")
 connectionPool = ConnectionPool(
@@ -33,22 +62,33 @@ connectionPool = ConnectionPool(
   max_size=10,
   open=True
 )
-repository = NewsRepositoryPostgres(pool=connectionPool)
 atexit.register(connectionPool.close)
-
-sentiment_analysis = SentimentAnalysisMediator(
+# init.sql only runs on a new volume: add the tables/indexes introduced since to existing databases
+SchemaMigrator(pool=connectionPool).migrate()
+repository = NewsRepositoryPostgres(pool=connectionPool)
+if isinstance(processor, DataProcessorLocal):
+  labelled_news = repository.get_n_latest(n=int(os.getenv('SUBJECT_TRAINING_SIZE', '5000')))
+  processor.fit(texts=[news.text for news in labelled_news], subjects=[news.subject for news in labelled_news])
+if os.getenv('FINBERT_CACHE', 'true').lower() == 'true':
+  predictor = PredictModelCached(predictor=predictor, cache=PredictionCachePostgres(pool=connectionPool))
+
+# Kafka 'analyze' requests and the schedule share one analysis at a time
+sentiment_analysis = SingleFlightAnalysis(SentimentAnalysisMediator(
   crawler=crawler,
   ai_service=ai_service,
   processor=processor,
   predictor=predictor,
   repository=repository
-)
+))
 
 consumer = KafkaConsumer(
   'sentiment_news_requests',
   bootstrap_servers=['kafka:9092'],
   value_deserializer=lambda x: json.loads(x.decode('utf-8')),
-  api_version_auto_timeout_ms=10000
+  api_version_auto_timeout_ms=10000,
+  group_id=os.getenv('KAFKA_GROUP_ID', 'sentiment-service'),
+  # offsets are committed by the dispatcher once requests are done
+  enable_auto_commit=False
 )
 atexit.register(consumer.close)
 
@@ -63,47 +103,49 @@ sentiment_selector = SentimentSelectorMediator(repository=repository)
 ###############################################
 ###############################################
 # kafka thread
+def handle_analyze(request: KafkaRequest):
+  future = sentiment_analysis.submit()
+  future.add_done_callback(lambda f: print("Analysis completed." if f.exception() is None else f"Analysis failed: {f.exception()}"))
+  return future
+
+def handle_select(request: KafkaRequest):
+  n_records = request.payload.get('n') if request.payload and request.payload.get('n') else 1
+  res = sentiment_selector.process(n_records=n_records)
+  producer.send('sentiment_news_responses', value=str({
+    'id': request.id,
+    'to_service': request.from_service,
+    'name': request.name,
+    'payload': [item.__dict__() for item in res]
+  }))
+  print(f"Response sent for request id {request.id}.")
+
+dispatcher = KafkaDispatcher(
+  consumer=consumer,
+  handlers={'analyze': handle_analyze, 'select': handle_select},
+  workers=int(os.getenv('KAFKA_HANDLER_WORKERS', '4'))
+)
+
 def kafka_thread():
-  while True:
-    try:
-      for message in consumer:
-        print("Message received.")
-        values = message.value
-        request = KafkaRequest(id=values['id'], from_service=values['from_service'], name=values['name'], payload=values['payload'])
-        match request.name:
-          case 'analyze':
-            sentiment_analysis.process()
-            print("Analysis completed.")
-          case 'select':
-              n_records = request.payload.get('n') if request.payload and request.payload.get('n') else 1
-              res = sentiment_selector.process(n_records=n_records)
-              producer.send('sentiment_news_responses', value=str({
-                'id': request.id,
-                'to_service': request.from_service,
-                'name': request.name,
-                'payload': [item.__dict__() for item in res]
-              }))
-              print(f"Response sent for request id {request.id}.")
-          case _:
-            print(f"Unknown request name: {request.name}")
-            continue
-    except Exception as e:
-      print(f"Error in Kafka thread: {e}")
+  dispatcher.run()
 
 ###############################################
 ###############################################
 # flask and graphql
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
 
-from typing import List
+from typing import List, Optional
 
 app = Flask(__name__)
 CORS(app)
 
+@app.route('/metrics')
+def metrics():
+  return jsonify({'kafka': dispatcher.metrics(), 'analysis': sentiment_analysis.metrics()})
+
 import strawberry
 from strawberry.flask.views import GraphQLView
-from datetime import datetime, timezone
+from News.NewsRow import decode_cursor
 
 @strawberry.federation.type(keys=["id"])
 class News:
@@ -117,14 +159,55 @@ class News:
   created_at: float
   last_modified_at: float
 
+@strawberry.type
+class NewsPage:
+  items: List[News]
+  next_cursor: Optional[str]
+
+@strawberry.type
+class SentimentBucket:
+  granularity: str
+  bucket_start: float
+  subject: Optional[str]
+  news_count: int
+  mean_score: float
+  positive_count: int
+  negative_count: int
+  neutral_count: int
+  subjects: Optional[List["SentimentBucket"]]
+
+# Largest page size served by the news queries
+MAX_NEWS_LIMIT = 100
+
 @strawberry.type
 class Query:
   @strawberry.field
   def news(self, page: int = 1, limit: int = 10) -> List["News"]:
-    news_items = repository.get_all(page=page, limit=limit)
-    for item in news_items:
-      item.published_time = datetime.fromtimestamp(item.published_time, tz=timezone.utc).strftime('%d/%m/%Y %H:%M:%S') if item.published_time else None
-    return news_items
+    # Negative or zero values would reach SQL as a negative LIMIT / OFFSET
+    return repository.get_all(page=max(1, page), limit=max(1, min(limit, MAX_NEWS_LIMIT)))
+
+  @strawberry.field
+  def news_page(self, limit: int = 10, after: Optional[str] = None, subject: Optional[str] = None, sentiment_score: Optional[int] = None) -> NewsPage:
+    """
+    Latest news by keyset pagination: pass the next_cursor of a page as `after` to get the following one.
+    """
+    limit = max(1, min(limit, MAX_NEWS_LIMIT))
+    # One extra row tells whether there is a next page
+    rows = repository.get_page(
+      limit=limit + 1,
+      after=decode_cursor(after) if after else None,
+      subject=subject,
+      sentiment_score=sentiment_score
+    )
+    items = rows[:limit]
+    return NewsPage(items=items, next_cursor=items[-1].cursor if len(rows) > limit else None)
+
+  @strawberry.field
+  def sentiment_aggregates(self, start: float, end: float, granularity: str = 'hour', subject: Optional[str] = None) -> List[SentimentBucket]:
+    """
+    Hourly or daily sentiment of the news published in [start, end) (UTC epoch seconds), with a per-subject breakdown.
+    """
+    return repository.get_sentiment_aggregates(start=start, end=end, granularity=granularity, subject=subject)
 
 schema = strawberry.federation.Schema(
   enable_federation_2=True,
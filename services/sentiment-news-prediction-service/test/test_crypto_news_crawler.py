@@ -0,0 +1,123 @@
+"""
+Crawls a local fixture server with CryptoNewsCrawler: listing pages sharing some articles, articles failing
+with 500 before succeeding, and one article answering 429 with Retry-After before succeeding.
+
+Run from the service folder:
+  python -m unittest discover -s test -v
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from NewsCrawler.CryptoNewsCrawler import CryptoNewsCrawler
+
+PAGES = 2
+ARTICLES_PER_PAGE = 10
+# Listing page p shows articles [(p - 1) * STRIDE, (p - 1) * STRIDE + ARTICLES_PER_PAGE), so consecutive pages overlap
+STRIDE = 7
+FLAKY_ARTICLES = {2: 1, 9: 2}      # article -> number of 500 answers before a 200
+RATE_LIMITED_ARTICLE = 5           # answers 429 with Retry-After once
+RETRY_AFTER = 1
+LATENCY = 0.05
+
+class FixtureServer:
+  """Serves fake cryptonews.com pages on localhost and records the time of every request per path."""
+  def __init__(self):
+    self.requests = defaultdict(list)
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+      def do_GET(self):
+        server.requests[self.path].append(time.monotonic())
+        time.sleep(LATENCY)
+        status, headers, body = server.answer(self.path)
+        self.send_response(status)
+        for name, value in headers.items():
+          self.send_header(name, value)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, *args):
+        pass
+
+    self.__httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    self.base_url = f'http://127.0.0.1:{self.__httpd.server_address[1]}'
+
+  def __enter__(self):
+    threading.Thread(target=self.__httpd.serve_forever, daemon=True).start()
+    return self
+
+  def __exit__(self, *exc):
+    self.__httpd.shutdown()
+    self.__httpd.server_close()
+
+  def article_url(self, i: int) -> str:
+    return f'{self.base_url}/article/{i}/'
+
+  def answer(self, path: str):
+    parts = path.strip('/').split('/')
+    if parts[:2] == ['news', 'page']:
+      first = (int(parts[2]) - 1) * STRIDE
+      items = ''.join(
+        '<div class="archive-template-latest-news__wrap">'
+        f'<a href="{self.article_url(i)}"></a>'
+        f'<div class="archive-template-latest-news__title">Article {i}</div>'
+        '<div class="archive-template-latest-news__time" data-utctime="2025-01-01 00:00:00"></div>'
+        '</div>'
+        for i in range(first, first + ARTICLES_PER_PAGE)
+      )
+      return 200, {}, f'<html><body>{items}</body></html>'.encode()
+    if parts[0] == 'article':
+      i, attempt = int(parts[1]), len(self.requests[path])
+      if attempt <= FLAKY_ARTICLES.get(i, 0):
+        return 500, {}, b'error'
+      if i == RATE_LIMITED_ARTICLE and attempt == 1:
+        return 429, {'Retry-After': str(RETRY_AFTER)}, b'slow down'
+      return 200, {}, f'<div class="single-post__subheader">Sub header {i}</div>'.encode()
+    return 404, {}, b'not found'
+
+class CryptoNewsCrawlerTest(unittest.TestCase):
+  def crawl(self, server: FixtureServer, **kwargs):
+    crawler = CryptoNewsCrawler(url=server.base_url + '/news/page/{page}/', pages=PAGES, backoff=0.05, **kwargs)
+    started = time.perf_counter()
+    news = crawler.crawl()
+    elapsed = time.perf_counter() - started
+    print(f'\n  {self.id().rsplit(".", 1)[-1]}: {sum(map(len, server.requests.values()))} requests, {elapsed:.2f}s')
+    return news, elapsed
+
+  def test_retries_dedup_and_retry_after(self):
+    with FixtureServer() as server:
+      news, _ = self.crawl(server, max_concurrency=8, requests_per_second=50, burst=8)
+
+    unique = (PAGES - 1) * STRIDE + ARTICLES_PER_PAGE
+    self.assertEqual(sorted(item.url for item in news), sorted(server.article_url(i) for i in range(unique)))
+    self.assertEqual({item.sub_header for item in news}, {f'Sub header {i}' for i in range(unique)})
+    for i in range(unique):
+      # Articles listed on both pages are downloaded once; flaky ones once more per 500 answer
+      expected = 1 + FLAKY_ARTICLES.get(i, 0) + (i == RATE_LIMITED_ARTICLE)
+      self.assertEqual(len(server.requests[f'/article/{i}/']), expected, f'article {i}')
+    first, second = server.requests[f'/article/{RATE_LIMITED_ARTICLE}/']
+    self.assertGreaterEqual(second - first, RETRY_AFTER)
+
+  def test_default_politeness(self):
+    with FixtureServer() as server:
+      news, elapsed = self.crawl(server)
+      times = sorted(t for requests in server.requests.values() for t in requests)
+
+    self.assertEqual(len(news), (PAGES - 1) * STRIDE + ARTICLES_PER_PAGE)
+    # Default token bucket: 2 requests per second per host with bursts of 4, so any n requests span (n - 4) / 2 s
+    self.assertGreaterEqual(elapsed, (len(times) - 4) / 2.0)
+    n = 9
+    for i in range(len(times) - n + 1):
+      self.assertGreaterEqual(times[i + n - 1] - times[i], (n - 4) / 2.0 - 0.05)
+
+if __name__ == '__main__':
+  unittest.main()